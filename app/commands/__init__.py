@@ -0,0 +1,9 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+from .races import register_commands
+
+__all__ = [
+    "register_commands",
+]
@@ -0,0 +1,230 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Flask CLI commands for race maintenance tasks.
+"""
+import signal
+import sys
+from datetime import timedelta
+from pathlib import Path
+from typing import cast
+
+import click
+from flask import current_app
+from flask.app import Flask
+from flask.cli import with_appcontext
+from sqlalchemy import func, select
+
+from app import db
+from app.core import settings
+from app.core.assets import build_assets
+from app.dtos import DataVersion, DuplicateReport, ImportReport, LinkCheckReport
+from app.models import CityDAO, create_schema, load_gazetteer, rebuild_name_index, rebuild_search_index, rebuild_stats
+from app.models.links import LINK_BROKEN
+from app.models.races import RaceDAO
+from app.services import (
+    ChangeFeed,
+    DuplicateDetector,
+    JobRunner,
+    LinkChecker,
+    RaceExporter,
+    RaceImporter,
+    SnapshotPublisher,
+    get_race_cache,
+)
+from app.services.exports import MIMETYPES, ExportFormat
+
+
+@click.command(name="import-races")
+@click.argument("csv_path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--batch-size", type=click.IntRange(min=1), default=None, help="Rows per insert batch and transaction.")
+@with_appcontext
+def import_races_command(csv_path: Path, batch_size: int | None) -> None:
+    """Stream races from a gare_podistiche.csv-style file into the database."""
+    with csv_path.open(encoding="utf-8", newline="") as csv_file:
+        report: ImportReport = RaceImporter(batch_size=batch_size).import_csv(csv_file)
+
+    click.echo(f"Rows read:     {report.total_rows}")
+    click.echo(f"Rows inserted: {report.inserted_rows} in {report.batches} batches")
+    click.echo(f"Rows rejected: {report.rejected_rows}")
+    click.echo(f"Elapsed:       {report.elapsed_seconds:.2f}s ({report.rows_per_second:.0f} rows/s)")
+    for rejection in report.rejections:
+        click.echo(f"  line {rejection.line}: {rejection.error}", err=True)
+    if report.rejected_rows > len(report.rejections):
+        click.echo(f"  ... and {report.rejected_rows - len(report.rejections)} more rejected rows", err=True)
+
+
+@click.command(name="export-races")
+@click.option("--format", "export_format", type=click.Choice(sorted(MIMETYPES)), default="csv", help="Output format.")
+@click.option("--output", "-o", type=click.Path(dir_okay=False, path_type=Path), default=None, help="Output file.")
+@with_appcontext
+def export_races_command(export_format: str, output: Path | None) -> None:
+    """Stream the race table as CSV, NDJSON, JSON or iCalendar to a file or stdout."""
+    chunks = RaceExporter().iter_export(export_format=cast(ExportFormat, export_format))
+    if output is None:
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+        return
+    with output.open(mode="w", encoding="utf-8", newline="") as export_file:
+        for chunk in chunks:
+            export_file.write(chunk)
+    click.echo(f"Exported races to {output}", err=True)
+
+
+@click.command(name="rebuild-search-index")
+@with_appcontext
+def rebuild_search_index_command() -> None:
+    """Rebuild the full-text search index from the race table."""
+    with db.engine.begin() as connection:
+        rebuild_search_index(connection)
+    get_race_cache().invalidate()
+    click.echo("Search index rebuilt")
+
+
+@click.command(name="rebuild-stats")
+@with_appcontext
+def rebuild_stats_command() -> None:
+    """Recount the race statistics summary table from the race table."""
+    with db.engine.begin() as connection:
+        rebuild_stats(connection)
+    get_race_cache().invalidate()
+    click.echo("Race statistics rebuilt")
+
+
+@click.command(name="init-db")
+@with_appcontext
+def init_db_command() -> None:
+    """Create the tables, indexes and search index that are missing (safe to run on every deploy)."""
+    create_schema()
+    click.echo("Database schema is up to date")
+    gazetteer: Path = Path(current_app.root_path) / settings.geo.gazetteer_path
+    if gazetteer.is_file() and db.session.query(CityDAO.id).first() is None:
+        with db.engine.begin() as connection:
+            cities: int = load_gazetteer(connection, gazetteer)
+        get_race_cache().invalidate()
+        click.echo(f"Loaded {cities} localities from {gazetteer}")
+
+
+@click.command(name="load-cities")
+@click.option(
+    "--file",
+    "gazetteer",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="Gazetteer CSV with name,province,latitude,longitude (default: geo.gazetteer_path).",
+)
+@with_appcontext
+def load_cities_command(gazetteer: Path | None) -> None:
+    """Insert or update the localities of a gazetteer and link the races to them."""
+    gazetteer = gazetteer or Path(current_app.root_path) / settings.geo.gazetteer_path
+    with db.engine.begin() as connection:
+        cities: int = load_gazetteer(connection, gazetteer)
+        unlinked: int = connection.execute(select(func.count()).where(RaceDAO.city_id.is_(None))).scalar_one()
+    get_race_cache().invalidate()
+    click.echo(f"Loaded {cities} localities from {gazetteer} ({unlinked} races in unknown cities)")
+
+
+@click.command(name="build-assets")
+@with_appcontext
+def build_assets_command() -> None:
+    """Write content-hashed, precompressed copies of the static files and their manifest."""
+    manifest = build_assets(Path(current_app.static_folder or "static"))
+    for logical, entry in manifest.items():
+        encodings: str = ", ".join(entry["encodings"]) or "uncompressed"
+        click.echo(f"{logical} -> {entry['path']} ({encodings})")
+    click.echo(f"Built {len(manifest)} assets: restart the app to serve them")
+
+
+@click.command(name="compact-races")
+@click.option(
+    "--days",
+    type=click.FloatRange(min=0),
+    default=None,
+    help="Purge races deleted more than this many days ago (default: changes.tombstone_retention_days).",
+)
+@with_appcontext
+def compact_races_command(days: float | None) -> None:
+    """Purge the tombstones of deleted races that every change feed client should have seen."""
+    purged: int = ChangeFeed().compact_tombstones(older_than=timedelta(days=days) if days is not None else None)
+    click.echo(f"Purged {purged} deleted races")
+
+
+@click.command(name="publish-snapshot")
+@with_appcontext
+def publish_snapshot_command() -> None:
+    """Render the race list, races.json and races.ics into the snapshot directory."""
+    publisher: SnapshotPublisher = SnapshotPublisher(current_app, settings.snapshots)
+    version: DataVersion = publisher.publish()
+    click.echo(f"Published snapshot of version {version.version} to {publisher.directory}")
+
+
+@click.command(name="find-duplicates")
+@with_appcontext
+def find_duplicates_command() -> None:
+    """List the pairs of races that look like the same race."""
+    report: DuplicateReport = DuplicateDetector().find_all_duplicates()
+    for pair in report.pairs:
+        click.echo(
+            f"{pair.race.id} '{pair.race.name}' ({pair.race.city}) ~ {pair.duplicate.id} '{pair.duplicate.name}' "
+            f"({pair.duplicate.city}) on {pair.duplicate.time:%Y-%m-%d}: {', '.join(pair.reasons)}, "
+            f"name similarity {pair.similarity:.2f}"
+        )
+    click.echo(f"{len(report.pairs)} duplicate pairs among {report.races} races ({report.comparisons} comparisons)")
+
+
+@click.command(name="rebuild-name-index")
+@with_appcontext
+def rebuild_name_index_command() -> None:
+    """Rebuild the race name trigram index used by duplicate detection."""
+    with db.engine.begin() as connection:
+        rebuild_name_index(connection)
+    click.echo("Name index rebuilt")
+
+
+@click.command(name="check-links")
+@click.option("--limit", type=click.IntRange(min=1), default=None, help="Probe at most this many links.")
+@with_appcontext
+def check_links_command(limit: int | None) -> None:
+    """Probe the race websites not checked within their TTL and record the broken ones."""
+    report: LinkCheckReport = LinkChecker().check_links(limit=limit)
+    for check in LinkChecker().get_checks(status=LINK_BROKEN):
+        click.echo(f"{check.url}: {check.reason} ({check.failures} failed checks)")
+    click.echo(
+        f"Checked {report.checked} links in {report.elapsed_seconds:.1f} s: {report.ok} ok "
+        f"({report.not_modified} not modified), {report.broken} broken"
+    )
+
+
+@click.command(name="run-jobs")
+@with_appcontext
+def run_jobs_command() -> None:
+    """Run queued background jobs until interrupted; SIGINT/SIGTERM wait for the running jobs."""
+    # The pool threads push app contexts of their own: hand them the app, not the current_app proxy
+    app: Flask = current_app._get_current_object()  # type: ignore[attr-defined]
+    runner: JobRunner = JobRunner(app, settings.jobs)
+    signal.signal(signal.SIGTERM, lambda signum, frame: runner.stop())
+    click.echo(f"Running jobs with {settings.jobs.max_workers} workers (Ctrl+C to stop)")
+    try:
+        runner.run()
+    except KeyboardInterrupt:
+        pass
+    click.echo("Job runner stopped")
+
+
+def register_commands(app: Flask) -> None:
+    """Register the race CLI commands on the Flask app."""
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(import_races_command)
+    app.cli.add_command(export_races_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(rebuild_stats_command)
+    app.cli.add_command(build_assets_command)
+    app.cli.add_command(compact_races_command)
+    app.cli.add_command(publish_snapshot_command)
+    app.cli.add_command(load_cities_command)
+    app.cli.add_command(find_duplicates_command)
+    app.cli.add_command(rebuild_name_index_command)
+    app.cli.add_command(check_links_command)
+    app.cli.add_command(run_jobs_command)
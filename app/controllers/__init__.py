@@ -2,8 +2,12 @@
 # Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
 # Licensed under the MIT License. See LICENSE.md for details.
 # -----------------------------------------------------------------------------
+from .api import RaceApiController
+from .metrics import MetricsController
 from .races import RaceController
 
 __all__ = [
+    "MetricsController",
+    "RaceApiController",
     "RaceController",
 ]
@@ -0,0 +1,297 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+from datetime import datetime
+from pathlib import Path
+from typing import Any, cast
+
+from flask import Response, jsonify, request, send_file, stream_with_context, url_for
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.controllers.types import ApiResponse
+from app.core.log import LoggerManager
+from app.dtos import BatchResult, ChangePage, City, Job, NearbyRaces, Race, RaceBatch, RaceFilter, RaceRecord
+from app.models.jobs import JOB_CANCELLED, JOB_FAILED, JOB_FINISHED, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED
+from app.models.links import LINK_BROKEN, LINK_OK
+from app.services import (
+    ChangeFeed,
+    ChangesExpiredError,
+    InvalidCursorError,
+    JobNotFoundError,
+    JobService,
+    JobStateError,
+    LinkChecker,
+    RaceExporter,
+    RaceService,
+)
+from app.services.changes import STREAM_BUSY_RETRY_SECONDS, decode_change_cursor
+from app.services.exports import MIMETYPES, ExportFormat
+from app.services.jobs import JOB_KINDS
+from app.services.races import DEFAULT_SEARCH_LIMIT
+
+JOB_STATUSES: tuple[str, ...] = (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+MAX_JOBS_LISTED = 200
+BATCH_OPERATIONS: tuple[str, ...] = ("create", "update", "delete")
+
+
+class RaceApiController:
+    """JSON endpoints for machine clients (search, bulk import, export, background jobs, ...)."""
+
+    def __init__(self) -> None:
+        self.service = RaceService()
+        self.feed = ChangeFeed()
+        self.logger = LoggerManager.get_logger(self.__class__.__name__)
+
+    def search_races(self) -> ApiResponse:
+        """Return the races best matching the 'q' query string parameter."""
+        query: str = request.args.get(key="q", default="").strip()
+        if not query:
+            return jsonify(error="Missing search query 'q'"), 400
+        limit: int = request.args.get(key="limit", default=DEFAULT_SEARCH_LIMIT, type=int)
+        races: list[RaceRecord] = self.service.search_races(query=query, limit=limit)
+        return jsonify(query=query, results=[race.model_dump(mode="json") for race in races])
+
+    def get_race_stats(self) -> ApiResponse:
+        """Return the race counts per month, city and distance range."""
+        return jsonify(self.service.get_stats().to_dict())
+
+    def get_races_nearby(self) -> ApiResponse:
+        """
+        Return the races within 'radius_km' of a point, nearest first.
+
+        The centre is either 'lat' and 'lon' or a gazetteer locality given as 'city'
+        ("Tivoli", "Tivoli (RM)"); 'date_from' (YYYY-MM-DD) skips earlier races.
+        """
+        latitude: float | None = request.args.get(key="lat", type=float)
+        longitude: float | None = request.args.get(key="lon", type=float)
+        city_name: str = request.args.get(key="city", default="").strip()
+        if city_name:
+            city: City | None = self.service.find_city(city_name)
+            if city is None:
+                return jsonify(error=f"Unknown city '{city_name}'"), 404
+            latitude, longitude = city.latitude, city.longitude
+        if latitude is None or longitude is None:
+            return jsonify(error="Give the centre as 'lat' and 'lon' or as 'city'"), 400
+
+        radius_km: float | None = request.args.get(key="radius_km", type=float)
+        if radius_km is not None and radius_km <= 0:
+            return jsonify(error="radius_km must be greater than 0"), 400
+        limit: int | None = request.args.get(key="limit", type=int)
+        if limit is not None and limit <= 0:
+            return jsonify(error="limit must be greater than 0"), 400
+        date_from: datetime | None = None
+        if request.args.get(key="date_from"):
+            try:
+                date_from = datetime.strptime(request.args["date_from"], "%Y-%m-%d")
+            except ValueError:
+                return jsonify(error="date_from must be a date (YYYY-MM-DD)"), 400
+
+        try:
+            nearby: NearbyRaces = self.service.get_races_nearby(
+                latitude=latitude, longitude=longitude, radius_km=radius_km, limit=limit, date_from=date_from
+            )
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+        return jsonify(nearby.to_dict())
+
+    def find_duplicates(self) -> ApiResponse:
+        """Queue the duplicates report (a full table scan); the pairs are the result of the returned job."""
+        try:
+            job: Job = JobService().submit(kind="find-duplicates")
+        except SQLAlchemyError:
+            return jsonify(error="Database error queueing the duplicates report"), 500
+        return self._job_accepted(job)
+
+    def get_link_checks(self) -> ApiResponse:
+        """Return the link checker results, optionally only those with the 'status' parameter (ok, broken)."""
+        status: str | None = request.args.get(key="status")
+        if status not in (None, LINK_OK, LINK_BROKEN):
+            return jsonify(error=f"Unsupported status '{status}', use '{LINK_OK}' or '{LINK_BROKEN}'"), 400
+        return jsonify(links=[check.to_dict() for check in LinkChecker().get_checks(status=status)])
+
+    def import_races(self) -> ApiResponse:
+        """Queue the import of an uploaded CSV file; the import report is the result of the returned job."""
+        upload = request.files.get("file")
+        if upload is None or not upload.filename:
+            return jsonify(error="Missing CSV file in the 'file' field"), 400
+
+        batch_size: int | None = request.args.get(key="batch_size", type=int)
+        if batch_size is not None and batch_size <= 0:
+            return jsonify(error="batch_size must be greater than 0"), 400
+
+        # Werkzeug spools large uploads to disk; the job copies the stream to its input file
+        params: dict[str, Any] = {"batch_size": batch_size} if batch_size is not None else {}
+        try:
+            job: Job = JobService().submit(kind="import-races", params=params, input_file=upload.stream)
+        except SQLAlchemyError:
+            return jsonify(error="Database error queueing the import"), 500
+        return self._job_accepted(job)
+
+    def batch_races(self) -> ApiResponse:
+        """Create, update and delete races from a JSON body {"create": [...], "update": [...], "delete": [ids]}."""
+        body: Any = request.get_json(silent=True)
+        if not isinstance(body, dict) or not all(isinstance(body.get(key, []), list) for key in BATCH_OPERATIONS):
+            return jsonify(error="Give the batch as JSON with 'create', 'update' and 'delete' lists"), 400
+
+        errors: list[dict[str, Any]] = []
+        races: dict[str, list[Race]] = {"create": [], "update": []}
+        for operation in races:
+            for index, item in enumerate(body.get(operation, [])):
+                try:
+                    races[operation].append(Race.model_validate(obj=item))
+                except ValidationError as e:
+                    fields: list[str] = [".".join(map(str, error["loc"])) for error in e.errors()]
+                    errors.append({"operation": operation, "index": index, "error": f"Invalid fields: {fields}"})
+        delete: list[int] = []
+        for index, race_id in enumerate(body.get("delete", [])):
+            if isinstance(race_id, int) and not isinstance(race_id, bool):
+                delete.append(race_id)
+            else:
+                errors.append({"operation": "delete", "index": index, "error": "Not a race id"})
+        if errors:
+            return jsonify(error="Invalid batch items, nothing was applied", items=errors), 400
+
+        try:
+            result: BatchResult = self.service.apply_batch(
+                batch=RaceBatch(create=races["create"], update=races["update"], delete=delete)
+            )
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+        except SQLAlchemyError:
+            return jsonify(error="Database error applying the batch, nothing was applied"), 500
+        return jsonify(result.to_dict())
+
+    def export_races(self) -> ApiResponse:
+        """Stream the (optionally filtered) race table as CSV, NDJSON, JSON or iCalendar."""
+        export_format: str = request.args.get(key="format", default="csv")
+        if export_format not in MIMETYPES:
+            return jsonify(error=f"Unsupported format '{export_format}', use one of {sorted(MIMETYPES)}"), 400
+        try:
+            args: dict[str, str] = {key: value for key, value in request.args.items() if value.strip()}
+            filters: RaceFilter = RaceFilter.model_validate(obj=args)
+        except ValidationError as e:
+            self.logger.warning(f"Filter parsing error: {e}")
+            return jsonify(error="Invalid filters"), 400
+
+        chunks = RaceExporter().iter_export(export_format=cast(ExportFormat, export_format), filters=filters)
+        return Response(
+            response=stream_with_context(chunks),
+            mimetype=MIMETYPES[export_format],
+            headers={"Content-Disposition": f"attachment; filename=races.{export_format}"},
+        )
+
+    def get_changes(self) -> ApiResponse:
+        """Return the races created, updated or deleted after the 'cursor' query string parameter."""
+        limit: int | None = request.args.get(key="limit", type=int)
+        if limit is not None and limit <= 0:
+            return jsonify(error="limit must be greater than 0"), 400
+        try:
+            page: ChangePage = self.feed.get_changes(cursor=request.args.get(key="cursor"), limit=limit)
+        except InvalidCursorError as e:
+            return jsonify(error=str(e)), 400
+        except ChangesExpiredError as e:
+            return jsonify(error=str(e), reset=True), 410
+        return jsonify(page.to_dict())
+
+    def stream_changes(self) -> ApiResponse:
+        """Push pages of changes as Server-Sent Events, resuming from Last-Event-ID or the 'cursor' parameter."""
+        cursor: str | None = request.headers.get(key="Last-Event-ID") or request.args.get(key="cursor")
+        try:
+            decode_change_cursor(cursor)
+        except InvalidCursorError as e:
+            return jsonify(error=str(e)), 400
+        # Each stream holds a request thread: past max_streams, leave the pool to the other requests
+        if not self.feed.acquire_stream_slot():
+            busy: Response = jsonify(error="Too many change streams open, retry later or poll /api/races/changes")
+            busy.headers["Retry-After"] = str(STREAM_BUSY_RETRY_SECONDS)
+            return busy, 503
+        response: Response = Response(
+            response=stream_with_context(self.feed.iter_events(cursor=cursor)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+        response.call_on_close(self.feed.release_stream_slot)
+        return response
+
+    def submit_job(self) -> ApiResponse:
+        """Queue a job from a JSON body {"kind": ..., "params": {...}} and return it with 202 Accepted."""
+        body: Any = request.get_json(silent=True)
+        if not isinstance(body, dict) or not isinstance(body.get("kind"), str):
+            return jsonify(error=f"Give the job as JSON with 'kind' (one of {sorted(JOB_KINDS)}) and 'params'"), 400
+        params: Any = body.get("params") or {}
+        if not isinstance(params, dict):
+            return jsonify(error="params must be a JSON object"), 400
+        if body["kind"] in JOB_KINDS and JOB_KINDS[body["kind"]].needs_input:
+            return jsonify(error=f"Job kind '{body['kind']}' needs a file: upload it to its own endpoint"), 400
+        try:
+            job: Job = JobService().submit(kind=body["kind"], params=params)
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+        except SQLAlchemyError:
+            return jsonify(error="Database error queueing the job"), 500
+        return self._job_accepted(job)
+
+    def list_jobs(self) -> ApiResponse:
+        """Return the most recent jobs, optionally only those with the 'status' parameter."""
+        status: str | None = request.args.get(key="status")
+        if status is not None and status not in JOB_STATUSES:
+            return jsonify(error=f"Unsupported status '{status}', use one of {list(JOB_STATUSES)}"), 400
+        limit: int = request.args.get(key="limit", default=50, type=int)
+        if limit <= 0:
+            return jsonify(error="limit must be greater than 0"), 400
+        jobs: list[Job] = JobService().list_jobs(status=status, limit=min(limit, MAX_JOBS_LISTED))
+        return jsonify(jobs=[job.to_dict() for job in jobs])
+
+    def get_job(self, job_id: int) -> ApiResponse:
+        """Return a job with its progress, and its result once finished."""
+        try:
+            return jsonify(JobService().get_job(job_id).to_dict())
+        except JobNotFoundError as e:
+            return jsonify(error=str(e)), 404
+
+    def cancel_job(self, job_id: int) -> ApiResponse:
+        """Cancel a queued job, or ask a running one to stop (it is cancelled at its next progress report)."""
+        try:
+            return jsonify(JobService().cancel_job(job_id).to_dict())
+        except JobNotFoundError as e:
+            return jsonify(error=str(e)), 404
+        except JobStateError as e:
+            return jsonify(error=str(e)), 409
+
+    def retry_job(self, job_id: int) -> ApiResponse:
+        """Queue a failed or cancelled job again."""
+        try:
+            return self._job_accepted(JobService().retry_job(job_id))
+        except JobNotFoundError as e:
+            return jsonify(error=str(e)), 404
+        except JobStateError as e:
+            return jsonify(error=str(e)), 409
+
+    def get_job_file(self, job_id: int) -> ApiResponse:
+        """Download the file produced by a job (e.g. an export)."""
+        service: JobService = JobService()
+        try:
+            job: Job = service.get_job(job_id)
+        except JobNotFoundError as e:
+            return jsonify(error=str(e)), 404
+        if job.status not in JOB_FINISHED:
+            return jsonify(error=f"Job {job_id} is {job.status}: poll it until it finishes"), 409
+        path: Path | None = service.get_output_path(job)
+        if path is None:
+            return jsonify(error=f"Job {job_id} has no file"), 404
+        return send_file(
+            path,
+            mimetype=MIMETYPES.get(path.suffix.lstrip("."), "application/octet-stream"),
+            as_attachment=True,
+            download_name=f"races{path.suffix}",
+        )
+
+    @staticmethod
+    def _job_accepted(job: Job) -> Response:
+        """Return 202 Accepted with the job and its status URL in Location."""
+        response: Response = jsonify(job.to_dict())
+        response.status_code = 202
+        response.headers["Location"] = url_for("races_blueprint.get_job", job_id=job.id)
+        return response
@@ -0,0 +1,20 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+from flask import Response, abort
+
+from app.core.metrics import CONTENT_TYPE, MetricsRegistry, registry
+
+
+class MetricsController:
+    """Prometheus scrape endpoint."""
+
+    def __init__(self, metrics_registry: MetricsRegistry | None = None) -> None:
+        self.registry: MetricsRegistry = metrics_registry or registry
+
+    def get_metrics(self) -> Response:
+        """Render every registered metric in the Prometheus text format (404 when metrics are disabled)."""
+        if not self.registry.enabled:
+            abort(404)
+        return Response(response=self.registry.render(), content_type=CONTENT_TYPE)
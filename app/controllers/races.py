@@ -2,29 +2,153 @@
 # Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
 # Licensed under the MIT License. See LICENSE.md for details.
 # -----------------------------------------------------------------------------
+import hashlib
+import json
+from collections.abc import Callable, Iterator
 from datetime import datetime
-from typing import Any
+from functools import cache
+from pathlib import Path
+from typing import Any, cast
 
-from flask import abort, flash, redirect, render_template, request, url_for
+from flask import (
+    Response,
+    abort,
+    current_app,
+    flash,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    session,
+    stream_with_context,
+    url_for,
+)
 from pydantic import ValidationError
 
 from app.controllers.types import WebResponse
+from app.core import settings
+from app.core.assets import GZIP_ETAG_SUFFIX, load_manifest, send_precompressed
 from app.core.log import LoggerManager
-from app.dtos import Race
-from app.services import RaceNotFoundError, RaceService
+from app.dtos import DataVersion, Race, RaceFilter, RacePage, RaceRecord
+from app.services import (
+    DEFAULT_PAGE_SIZE,
+    CalendarService,
+    DuplicateRaceError,
+    InvalidCursorError,
+    RaceNotFoundError,
+    RaceService,
+)
+from app.services.exports import MIMETYPES, ExportFormat
+from app.services.snapshots import INDEX_FILE, SnapshotPublisher, get_snapshot_publisher
 
 GET_RACES_ENDPOINT = "races_blueprint.get_races"
 
 
+@cache
+def render_fingerprint() -> str:
+    """Hash of the templates and the asset manifest, so pages rendered by another release get other ETags."""
+    digest = hashlib.sha256()
+    loader = current_app.jinja_loader
+    if loader is not None:
+        for name in sorted(loader.list_templates()):
+            digest.update(name.encode())
+            digest.update(loader.get_source(current_app.jinja_env, name)[0].encode())
+    manifest: dict[str, Any] = load_manifest(Path(current_app.static_folder or "static"))
+    digest.update(json.dumps(manifest, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
 class RaceController:
     def __init__(self) -> None:
         self.service = RaceService()
+        self.calendar = CalendarService()
         self.logger = LoggerManager.get_logger(self.__class__.__name__)
 
     def get_races(self) -> WebResponse:
-        """Return the list of races."""
-        races: list[Race] = self.service.get_all_races()
-        return render_template(template_name_or_list="index.html", races=races)
+        """Return a filtered page of the list of races (304 if the client's copy is still current)."""
+        # The unfiltered first page is the published snapshot, unless a flashed message must be shown
+        if not request.args and "_flashes" not in session:
+            snapshot: Response | None = self._send_snapshot(INDEX_FILE)
+            if snapshot is not None:
+                return snapshot
+        filters: RaceFilter = self._extract_race_filter()
+        return self._render_conditional(
+            version=self.service.get_data_version(), render=lambda: self._render_races_page(filters)
+        )
+
+    def _render_races_page(self, filters: RaceFilter) -> WebResponse:
+        """Load and render the page of races selected by the filters and cursors of the query string."""
+        limit: int = request.args.get(key="limit", default=DEFAULT_PAGE_SIZE, type=int)
+        after: str | None = request.args.get(key="after")
+        before: str | None = request.args.get(key="before")
+        try:
+            page: RacePage = self.service.get_races_page(filters=filters, limit=limit, after=after, before=before)
+        except InvalidCursorError as e:
+            self.logger.warning(f"Pagination error: {e}")
+            abort(400, "Invalid pagination cursor")
+        return render_template(
+            template_name_or_list="index.html",
+            races=page.races,
+            page=page,
+            filters=filters,
+            filter_args=filters.to_query_args(),
+            broken_links=self.service.get_broken_links(),
+        )
+
+    def get_calendar(self, export_format: str) -> WebResponse:
+        """
+        Return the races as races.ics or races.json, optionally filtered (?city=...&distance_min=...).
+
+        The unfiltered calendar is the published snapshot when there is one; other feeds are
+        cached per filter combination and answer 304 until the next write.
+        """
+        if not request.args:
+            snapshot: Response | None = self._send_snapshot(f"races.{export_format}")
+            if snapshot is not None:
+                return snapshot
+        filters: RaceFilter = self._extract_race_filter()
+        version: DataVersion = self.service.get_data_version()
+        return self._render_conditional(
+            version=version, render=lambda: self._render_calendar(export_format, filters, version)
+        )
+
+    def _render_calendar(self, export_format: str, filters: RaceFilter, version: DataVersion) -> WebResponse:
+        """Return the cached feed, or stream it while it is generated."""
+        feed: str | Iterator[str] = self.calendar.get_feed(
+            export_format=cast(ExportFormat, export_format), filters=filters, version=version
+        )
+        body: str | Iterator[str] = feed if isinstance(feed, str) else stream_with_context(feed)
+        return Response(response=body, mimetype=MIMETYPES[export_format])
+
+    def _send_snapshot(self, filename: str) -> Response | None:
+        """
+        Send a published snapshot file (revalidated with its own ETag on every use).
+
+        Returns None if snapshots are disabled, not published yet or older than the data
+        (e.g. after a write of a CLI command, which cannot republish them), in which case a
+        publication is scheduled and the caller renders the response itself.
+        """
+        publisher: SnapshotPublisher | None = get_snapshot_publisher(current_app)
+        if publisher is None:
+            return None
+        published: int | None = publisher.published_version()
+        if (
+            publisher.path(filename) is None
+            or published is None
+            or published < self.service.get_data_version().version
+        ):
+            publisher.schedule()
+            return None
+        response: Response = send_precompressed(publisher.directory, filename, publisher.encodings(filename))
+        response.cache_control.no_cache = True
+        return response
+
+    def get_stats(self) -> WebResponse:
+        """Return the statistics page (304 if the client's copy is still current)."""
+        return self._render_conditional(
+            version=self.service.get_data_version(),
+            render=lambda: render_template(template_name_or_list="stats.html", stats=self.service.get_stats()),
+        )
 
     def delete_race(self, race_id: int) -> WebResponse:
         """Delete a race and redirect to the list."""
@@ -45,18 +169,67 @@ class RaceController:
         return self._handle_race_form_submission(is_update=False)
 
     def update_race(self, race_id: int) -> WebResponse:
-        """Update an existing race."""
+        """Update an existing race (the GET form answers 304 if the client's copy is still current)."""
+        if request.method == "GET":
+            return self._render_conditional(
+                version=self.service.get_data_version(), render=lambda: self._render_update_form(race_id)
+            )
+
         try:
-            race: Race = self.service.get_race_by_id(race_id)
+            self.service.get_race_by_id(race_id)
         except RaceNotFoundError:
             flash(message="Gara non trovata.", category="warning")
             return redirect(location=url_for(endpoint=GET_RACES_ENDPOINT))
 
-        if request.method == "GET":
-            return render_template(template_name_or_list="update-race.html", race=race)
-
         return self._handle_race_form_submission(is_update=True, race_id=race_id)
 
+    def _render_update_form(self, race_id: int) -> WebResponse:
+        """Render the update form of a race, or redirect to the list if it does not exist."""
+        try:
+            race: RaceRecord = self.service.get_race_by_id(race_id)
+        except RaceNotFoundError:
+            flash(message="Gara non trovata.", category="warning")
+            return redirect(location=url_for(endpoint=GET_RACES_ENDPOINT))
+        return render_template(template_name_or_list="update-race.html", race=race)
+
+    def _render_conditional(self, version: DataVersion, render: Callable[[], WebResponse]) -> WebResponse:
+        """
+        Answer a GET with validators derived from the data version.
+
+        If the client's If-None-Match or If-Modified-Since still matches, return an empty 304
+        without calling render (no race query, no template); otherwise return render()'s
+        response with a strong ETag, Last-Modified and Cache-Control: no-cache, so clients and
+        proxies revalidate on every use. Pages carrying flashed messages are never validated.
+        """
+        # Flashed messages are shown once, by the response that consumes them
+        if "_flashes" in session:
+            return render()
+        key: str = f"{version.version}|{request.full_path}|{render_fingerprint()}"
+        etag: str = f"v{version.version}-{hashlib.sha256(key.encode()).hexdigest()[:16]}"
+        last_modified: datetime = version.last_modified.replace(microsecond=0)
+
+        response: Response
+        if request.if_none_match:
+            # The client may hold the gzipped variant, whose ETag carries a suffix
+            matched: str | None = next(
+                (tag for tag in (etag, etag + GZIP_ETAG_SUFFIX) if request.if_none_match.contains_weak(tag)), None
+            )
+            not_modified: bool = matched is not None
+            etag = matched or etag
+        else:
+            not_modified = request.if_modified_since is not None and last_modified <= request.if_modified_since
+
+        if not_modified:
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(render())
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.cache_control.no_cache = True
+        return response
+
     def _handle_race_form_submission(self, is_update: bool, race_id: int | None = None) -> WebResponse:
         """Process form data for create or update operations."""
         try:
@@ -69,7 +242,8 @@ class RaceController:
                 self.service.update_race(race_id=race_id, race=race_obj)
                 flash(message="Gara aggiornata con successo.", category="success")
             else:
-                created_race: Race = self.service.create_new_race(race=race_obj)
+                check_duplicates: bool = settings.duplicates.check_on_create and "allow_duplicate" not in request.form
+                created_race: Race = self.service.create_new_race(race=race_obj, check_duplicates=check_duplicates)
                 flash(message=f"Gara '{created_race.name}' creata con successo.", category="success")
 
         except ValidationError as e:
@@ -77,12 +251,30 @@ class RaceController:
             flash(message="Dati della gara invalidi. Controlla i campi del modulo.", category="warning")
         except RaceNotFoundError:
             flash(message="Gara non trovata.", category="warning")
+        except DuplicateRaceError as e:
+            existing: RaceRecord = e.matches[0].race
+            flash(
+                message=f"Gara non aggiunta: somiglia a '{existing.name}' del {existing.time:%d/%m/%Y} "
+                f"a {existing.city}. Seleziona 'Aggiungi anche se somiglia a una gara già presente' "
+                "per aggiungerla comunque.",
+                category="warning",
+            )
         except Exception as e:
             self.logger.error(f"Unexpected error processing race form: {e}")
             flash(message="Errore del Server durante l'operazione.", category="danger")
 
         return redirect(location=url_for(endpoint=GET_RACES_ENDPOINT))
 
+    def _extract_race_filter(self) -> RaceFilter:
+        """Extract the listing filters from the query string, ignoring empty fields."""
+        try:
+            args: dict[str, str] = {key: value for key, value in request.args.items() if value.strip()}
+            return RaceFilter.model_validate(obj=args)
+        except ValidationError as e:
+            self.logger.warning(f"Filter parsing error: {e}")
+            abort(400, "Invalid filters")
+            raise  # This line is never reached but helps mypy understand abort() doesn't return
+
     def _extract_race_data(self) -> dict[str, Any]:
         """Extract and validate form data, with minimal sanitization."""
         try:
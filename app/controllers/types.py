@@ -4,3 +4,4 @@ from werkzeug.wrappers.response import Response
 
 # Type aliases for Flask response types
 WebResponse: TypeAlias = str | Response  # HTML pages (templates or redirects)
+ApiResponse: TypeAlias = Response | tuple[Response, int]  # JSON payloads, optionally with a status code
@@ -2,6 +2,6 @@
 # Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
 # Licensed under the MIT License. See LICENSE.md for details.
 # -----------------------------------------------------------------------------
-from .config import settings
+from .config import get_settings, settings
 
-__all__ = ["settings"]
+__all__ = ["get_settings", "settings"]
@@ -0,0 +1,220 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Fingerprinted, precompressed static assets and on-the-fly response compression.
+build_assets() copies every static file to dist/ under a content-hashed name, with
+.gz (and .br when the brotli package is installed) siblings, and records them in
+dist/manifest.json. Templates link assets with asset_url(), which resolves the
+fingerprinted name, and those names are served with Cache-Control: immutable.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any
+
+from flask import Flask, Response, request, send_from_directory, url_for
+
+from app.core.config import AssetsConfig
+from app.core.log import LoggerManager
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # optional: only gzip variants are built without it
+    brotli = None
+
+# Build output, relative to the static folder
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+# Already compressed formats (images, fonts) gain nothing from another pass
+COMPRESSIBLE_SUFFIXES: frozenset[str] = frozenset({".css", ".js", ".svg", ".json", ".txt", ".html", ".xml", ".map"})
+# Content-Encoding -> precompressed file suffix, in order of preference
+ENCODINGS: dict[str, str] = {"br": ".br", "gzip": ".gz"}
+# Appended to the strong ETag of a response gzipped on the fly, whose bytes differ from the original
+GZIP_ETAG_SUFFIX = "-gzip"
+
+
+def fingerprint(path: Path) -> str:
+    """Return the first 12 hex digits of the SHA-256 of the file content."""
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write data to a temporary file next to path, then rename it, so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(descriptor, "wb") as temporary_file:
+            temporary_file.write(data)
+        os.chmod(temporary, 0o644)  # mkstemp creates 0600 files, which a front-end web server could not read
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def build_assets(static_folder: Path) -> dict[str, dict[str, Any]]:
+    """
+    Fingerprint and precompress every file of static_folder into static_folder/dist.
+
+    Files of earlier builds are kept, so pages cached with the previous names keep working
+    during a deploy. Building twice without changes writes nothing new.
+
+    Returns:
+        The manifest: {"css/style.css": {"path": "dist/css/style.<hash>.css", "encodings": ["gzip"]}}
+    """
+    dist: Path = static_folder / DIST_DIR
+    manifest: dict[str, dict[str, Any]] = {}
+    # Build time is not request time: use the highest compression levels
+    compressors: dict[str, Callable[[bytes], bytes]] = {
+        "gzip": lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    }
+    if brotli is not None:
+        compressors["br"] = lambda data: brotli.compress(data, quality=11)
+    for source in sorted(static_folder.rglob("*")):
+        if not source.is_file() or dist in source.parents or source.name.startswith("."):
+            continue
+        logical: str = source.relative_to(static_folder).as_posix()
+        target: Path = dist / source.relative_to(static_folder).with_name(
+            f"{source.stem}.{fingerprint(source)}{source.suffix}"
+        )
+        content: bytes = source.read_bytes()
+        if not target.exists():
+            write_atomic(target, content)
+
+        encodings: list[str] = []
+        if source.suffix.lower() in COMPRESSIBLE_SUFFIXES:
+            for encoding, suffix in ENCODINGS.items():
+                if encoding not in compressors:
+                    continue
+                compressed_path: Path = target.with_name(target.name + suffix)
+                if not compressed_path.exists():
+                    compressed: bytes = compressors[encoding](content)
+                    # Keep the variant only if it actually saves bytes
+                    if len(compressed) >= len(content):
+                        continue
+                    write_atomic(compressed_path, compressed)
+                encodings.append(encoding)
+        manifest[logical] = {"path": target.relative_to(static_folder).as_posix(), "encodings": encodings}
+
+    write_atomic(dist / MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    return manifest
+
+
+def load_manifest(static_folder: Path) -> dict[str, dict[str, Any]]:
+    """Return the manifest written by build_assets, or an empty one if the assets were never built."""
+    manifest_path: Path = static_folder / DIST_DIR / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {}
+    return json.loads(manifest_path.read_text(encoding="utf-8"))
+
+
+def accepts_encoding(encoding: str) -> bool:
+    """Return True if the client of the current request accepts the given Content-Encoding."""
+    return request.accept_encodings[encoding] > 0
+
+
+def send_precompressed(directory: Path, filename: str, encodings: Iterable[str], **kwargs: Any) -> Response:
+    """
+    send_from_directory() serving the best precompressed sibling of filename the client accepts.
+
+    Args:
+        directory: directory holding filename and its .br/.gz siblings
+        filename: file to send, also used to guess the mimetype
+        encodings: encodings whose sibling exists
+        kwargs: passed to send_from_directory (max_age, conditional, ...)
+    """
+    available: set[str] = set(encodings)
+    encoding: str | None = next((name for name in ENCODINGS if name in available and accepts_encoding(name)), None)
+    response: Response = send_from_directory(
+        directory,
+        filename + ENCODINGS[encoding] if encoding else filename,
+        mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        **kwargs,
+    )
+    if available:
+        response.vary.add("Accept-Encoding")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+        del response.headers["Content-Disposition"]  # would name the .gz/.br file
+    return response
+
+
+def configure_assets(app: Flask, config: AssetsConfig) -> None:
+    """
+    Serve fingerprinted static files and compress dynamic responses.
+
+    Registers the asset_url() template global, replaces the "static" view and, if
+    config.compress is set, gzips large responses of the configured mimetypes.
+
+    Args:
+        app: Flask application with a static folder
+        config: asset settings (settings.assets)
+
+    Usage:
+        configure_assets(app, settings.assets)
+    """
+    logger = LoggerManager.get_logger("Assets")
+    static_folder: Path = Path(app.static_folder or "static")
+    if config.fingerprint and config.build_on_startup:
+        build_assets(static_folder)
+    manifest: dict[str, dict[str, Any]] = load_manifest(static_folder) if config.fingerprint else {}
+    # Fingerprinted path -> available precompressed encodings
+    fingerprinted: dict[str, list[str]] = {entry["path"]: entry["encodings"] for entry in manifest.values()}
+    if config.fingerprint and not manifest:
+        logger.debug("No asset manifest found: static files are served under their own names (run flask build-assets)")
+
+    def asset_url(filename: str) -> str:
+        """url_for("static", ...) replacement returning the fingerprinted name when there is one."""
+        entry: dict[str, Any] | None = manifest.get(filename)
+        return url_for("static", filename=entry["path"] if entry else filename)
+
+    app.add_template_global(asset_url)
+
+    def serve_static(filename: str) -> Response:
+        encodings: list[str] | None = fingerprinted.get(filename)
+        if encodings is None:
+            return app.send_static_file(filename)
+
+        # The content behind a fingerprinted name never changes: let clients and proxies keep it
+        response: Response = send_precompressed(static_folder, filename, encodings, max_age=config.max_age_seconds)
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions["static"] = serve_static
+
+    if config.compress:
+        compressed_mimetypes: frozenset[str] = frozenset(config.compress_mimetypes)
+
+        @app.after_request
+        def compress_response(response: Response) -> Response:
+            if (
+                response.status_code != 200
+                or response.direct_passthrough
+                or response.is_streamed
+                or "Content-Encoding" in response.headers
+                or response.mimetype not in compressed_mimetypes
+            ):
+                return response
+            data: bytes = response.get_data()
+            if len(data) < config.compress_min_size:
+                return response
+            response.vary.add("Accept-Encoding")
+            if accepts_encoding("gzip"):
+                response.set_data(gzip.compress(data, compresslevel=config.compress_level))
+                response.headers["Content-Encoding"] = "gzip"
+                etag, weak = response.get_etag()
+                if etag is not None and not weak:
+                    response.set_etag(etag + GZIP_ETAG_SUFFIX)
+            return response
+
+    logger.debug(
+        f"Assets: {len(manifest)} fingerprinted files, "
+        f"compression={'gzip>=' + str(config.compress_min_size) + 'B' if config.compress else 'off'}"
+    )
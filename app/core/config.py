@@ -3,8 +3,9 @@
 # Licensed under the MIT License. See LICENSE.md for details.
 # -----------------------------------------------------------------------------
 import os
+from functools import cache
 from pathlib import Path
-from typing import Any, ClassVar
+from typing import Any, ClassVar, Literal, cast
 
 from dotenv import load_dotenv
 from pydantic import Field
@@ -12,9 +13,6 @@ from pydantic_settings import BaseSettings, PydanticBaseSettingsSource
 from pydantic_settings.main import SettingsConfigDict
 from pydantic_settings.sources import YamlConfigSettingsSource
 
-# Load .env file at module import
-load_dotenv()
-
 
 class AppConfig(BaseSettings):
     """Application configuration settings."""
@@ -24,16 +22,78 @@ class AppConfig(BaseSettings):
     port: int = Field(default=5001, description="Port number")
     secret_key: str | None = Field(default=None, description="Secret key from environment")
 
+    # Production server (python -m app.server)
+    workers: int = Field(default=2, ge=1, description="Worker processes forked by the production server")
+    threads: int = Field(default=8, ge=1, description="Request threads per worker process")
+    keepalive: float = Field(default=5.0, gt=0, description="Seconds an idle keep-alive connection is kept open")
+    backlog: int = Field(default=2048, ge=1, description="Listen queue size of the server socket")
+    graceful_timeout: float = Field(
+        default=30.0, gt=0, description="Seconds workers get to finish in-flight requests on shutdown or restart"
+    )
+
     model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(extra="ignore")
 
 
+# SQLite PRAGMA presets applied on every new connection. "production" lets readers run
+# concurrently with the single writer (WAL) and makes writers wait instead of failing
+# with "database is locked" (busy_timeout).
+SQLITE_PROFILES: dict[str, dict[str, str | int]] = {
+    "default": {},
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,  # negative values are KiB: 64 MiB page cache per connection
+        "mmap_size": 268435456,  # 256 MiB memory-mapped I/O
+        "busy_timeout": 5000,  # milliseconds
+        "temp_store": "MEMORY",
+    },
+}
+
+
 class DatabaseConfig(BaseSettings):
     """Database configuration settings."""
 
     relative_path: str = Field(default="instance/dev.db", description="Relative path to database")
+    fast_reads: bool = Field(
+        default=True, description="Read races as column tuples (RaceRow) instead of validated ORM entities"
+    )
+
+    # SQLite connection PRAGMAs: the profile provides defaults, explicit values override them
+    profile: Literal["default", "production"] = Field(default="default", description="SQLite PRAGMA preset")
+    journal_mode: str | None = Field(default=None, description="PRAGMA journal_mode (e.g. WAL, DELETE)")
+    synchronous: str | None = Field(default=None, description="PRAGMA synchronous (OFF, NORMAL, FULL)")
+    cache_size: int | None = Field(default=None, description="PRAGMA cache_size (pages, or KiB if negative)")
+    mmap_size: int | None = Field(default=None, ge=0, description="PRAGMA mmap_size in bytes")
+    busy_timeout: int | None = Field(default=None, ge=0, description="PRAGMA busy_timeout in milliseconds")
+    temp_store: str | None = Field(default=None, description="PRAGMA temp_store (DEFAULT, FILE, MEMORY)")
+
+    # SQLAlchemy connection pool options (None keeps the SQLAlchemy default)
+    pool_size: int | None = Field(default=None, gt=0, description="Connections kept open in the pool")
+    max_overflow: int | None = Field(default=None, ge=0, description="Extra connections allowed under load")
+    pool_timeout: float | None = Field(default=None, gt=0, description="Seconds to wait for a free connection")
+    pool_recycle: int | None = Field(default=None, description="Seconds after which connections are recycled")
+    pool_pre_ping: bool = Field(default=False, description="Test connections before handing them out")
 
     model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(extra="ignore")
 
+    def get_pragmas(self) -> dict[str, str | int]:
+        """Return the PRAGMAs to apply on every connection: profile preset plus explicit overrides."""
+        pragmas: dict[str, str | int] = dict(SQLITE_PROFILES[self.profile])
+        for name in ("journal_mode", "synchronous", "cache_size", "mmap_size", "busy_timeout", "temp_store"):
+            value: str | int | None = getattr(self, name)
+            if value is not None:
+                pragmas[name] = value
+        return pragmas
+
+    def get_engine_options(self) -> dict[str, Any]:
+        """Return the SQLAlchemy create_engine options (SQLALCHEMY_ENGINE_OPTIONS)."""
+        options: dict[str, Any] = {"pool_pre_ping": self.pool_pre_ping}
+        for name in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle"):
+            value: int | float | None = getattr(self, name)
+            if value is not None:
+                options[name] = value
+        return options
+
 
 class LogConfig(BaseSettings):
     """Logging configuration settings."""
@@ -44,6 +104,208 @@ class LogConfig(BaseSettings):
     rotation: str = Field(default="10 MB", description="Log rotation size")
     retention: str = Field(default="7 days", description="Log retention period")
     compression: str = Field(default="zip", description="Log compression format")
+    mode: Literal["development", "production"] = Field(
+        default="development", description="production: non-blocking sinks, no colors, no caller info"
+    )
+    serialize: bool = Field(default=False, description="Console output as JSON lines (serialized off-thread)")
+    caller_info: bool | None = Field(
+        default=None, description="Log module/function/line (default: on in development, off in production)"
+    )
+    access_log_sampling: dict[str, float] = Field(
+        default_factory=dict, description="Fraction of werkzeug access log lines kept per level, e.g. {INFO: 0.1}"
+    )
+    access_log_rate_limit: float | None = Field(default=None, gt=0, description="Maximum access log lines per second")
+
+    model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(extra="ignore")
+
+
+class ImportConfig(BaseSettings):
+    """Bulk import configuration settings."""
+
+    batch_size: int = Field(default=5000, gt=0, description="Rows inserted per executemany batch and transaction")
+    max_reported_rejections: int = Field(default=100, ge=0, description="Rejected rows kept in the import report")
+
+    model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(extra="ignore")
+
+
+class CacheConfig(BaseSettings):
+    """RaceService read cache configuration settings."""
+
+    enabled: bool = Field(default=True, description="Enable the read-through cache")
+    backend: str = Field(
+        default="memory",
+        description="'memory' for the in-process LRU, or 'package.module:ClassName' for a shared backend",
+    )
+    max_entries: int = Field(default=1024, gt=0, description="Maximum number of cached entries per process")
+    ttl_seconds: float = Field(default=300.0, gt=0, description="Entry time-to-live as a safety net")
+
+    model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(extra="ignore")
+
+
+class InstrumentationConfig(BaseSettings):
+    """Per-request timing and slow-query logging configuration settings."""
+
+    enabled: bool = Field(default=True, description="Time requests, SQL statements and template rendering")
+    server_timing: bool = Field(default=True, description="Expose the timing breakdown in a Server-Timing header")
+    slow_request_ms: float = Field(default=500.0, ge=0, description="Log requests slower than this (milliseconds)")
+    slow_query_ms: float = Field(default=100.0, ge=0, description="Log SQL statements slower than this (milliseconds)")
+    log_parameters: bool = Field(default=True, description="Include bound parameters in slow-query log lines")
+
+    model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(extra="ignore")
+
+
+class MetricsConfig(BaseSettings):
+    """Prometheus /metrics configuration settings."""
+
+    enabled: bool = Field(default=True, description="Record request and service metrics and expose /metrics")
+    multiprocess_dir: str | None = Field(
+        default=None, description="Directory where each worker shares its metrics snapshot (multi-worker servers)"
+    )
+    flush_interval_seconds: float = Field(default=5.0, gt=0, description="Seconds between worker snapshot writes")
+    latency_buckets: list[float] = Field(
+        default=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0],
+        min_length=1,
+        description="Histogram bucket upper bounds in seconds",
+    )
+
+    model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(extra="ignore")
+
+
+class AssetsConfig(BaseSettings):
+    """Static asset fingerprinting and response compression settings."""
+
+    fingerprint: bool = Field(
+        default=True, description="Serve static files under the content-hashed names of the build manifest"
+    )
+    build_on_startup: bool = Field(
+        default=False, description="Build the fingerprinted assets when the app starts (instead of flask build-assets)"
+    )
+    max_age_seconds: int = Field(default=31536000, ge=0, description="Cache lifetime of fingerprinted static files")
+    compress: bool = Field(default=True, description="Gzip dynamic responses on the fly")
+    compress_min_size: int = Field(default=1024, ge=0, description="Smallest response body (bytes) worth compressing")
+    compress_level: int = Field(default=6, ge=1, le=9, description="gzip level of dynamic responses (1 fastest)")
+    compress_mimetypes: list[str] = Field(
+        default_factory=lambda: ["text/html", "text/calendar"],
+        description="Mimetypes of the dynamic responses to compress",
+    )
+
+    model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(extra="ignore")
+
+
+class ChangesConfig(BaseSettings):
+    """Change feed, tombstone retention and Server-Sent Events settings."""
+
+    page_size: int = Field(default=500, gt=0, description="Changes returned per feed page by default")
+    max_page_size: int = Field(default=5000, gt=0, description="Largest feed page a client may request")
+    tombstone_retention_days: float = Field(
+        default=30.0, ge=0, description="Days deleted races are kept for the feed before compaction purges them"
+    )
+    stream_poll_seconds: float = Field(
+        default=1.0, gt=0, description="How often a change stream checks the data version (writes of other workers)"
+    )
+    stream_heartbeat_seconds: float = Field(
+        default=15.0, gt=0, description="Idle seconds after which a change stream sends a keep-alive comment"
+    )
+    stream_max_seconds: float = Field(
+        default=300.0, gt=0, description="Seconds after which a stream ends (clients reconnect with Last-Event-ID)"
+    )
+    max_streams: int = Field(
+        default=4, ge=0, description="Change streams open at once per worker (keep below app.threads); then 503"
+    )
+
+    model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(extra="ignore")
+
+
+class SnapshotsConfig(BaseSettings):
+    """Pre-rendered race calendar settings."""
+
+    enabled: bool = Field(default=False, description="Serve the race list, JSON and iCalendar from published files")
+    directory: str = Field(
+        default="instance/snapshots", description="Directory of the published files (relative to the project root)"
+    )
+    debounce_seconds: float = Field(
+        default=2.0, ge=0, description="Quiet seconds after a write before the snapshot is published again"
+    )
+    max_delay_seconds: float = Field(
+        default=30.0, ge=0, description="Longest a snapshot stays stale while writes keep coming"
+    )
+
+    model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(extra="ignore")
+
+
+class GeoConfig(BaseSettings):
+    """Gazetteer and proximity search settings."""
+
+    gazetteer_path: str = Field(
+        default="gazetteer.csv", description="CSV of localities loaded by init-db (relative to the project root)"
+    )
+    default_radius_km: float = Field(default=20.0, gt=0, description="Search radius when the client gives none")
+    max_radius_km: float = Field(default=200.0, gt=0, description="Largest search radius a client may request")
+    page_size: int = Field(default=50, gt=0, description="Nearby races returned by default")
+    max_page_size: int = Field(default=500, gt=0, description="Most nearby races a client may request")
+
+    model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(extra="ignore")
+
+
+class DuplicatesConfig(BaseSettings):
+    """Duplicate race detection settings."""
+
+    check_on_create: bool = Field(
+        default=True, description="Refuse races created from the form that look like an existing race"
+    )
+    name_similarity: float = Field(
+        default=0.6, gt=0, le=1, description="Trigram similarity above which two race names are the same race"
+    )
+    city_name_similarity: float = Field(
+        default=0.3, gt=0, le=1, description="Lower name similarity that suffices for races on the same day and city"
+    )
+    distance_tolerance: float = Field(
+        default=0.1, ge=0, description="Largest relative distance difference between duplicates (0.1 = 10%)"
+    )
+    date_window_days: int = Field(
+        default=3, ge=0, description="Days apart within which similarly named races are compared"
+    )
+    candidate_limit: int = Field(default=20, gt=0, description="Similarly named races compared with each race")
+
+    model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(extra="ignore")
+
+
+class LinksConfig(BaseSettings):
+    """Race website link checker settings."""
+
+    batch_size: int = Field(default=200, gt=0, description="Races read (and links probed concurrently) per batch")
+    max_workers: int = Field(default=8, gt=0, description="Links probed at the same time")
+    timeout_seconds: float = Field(default=10.0, gt=0, description="Connect and read timeout of a probe")
+    per_host_interval_seconds: float = Field(
+        default=1.0, ge=0, description="Minimum seconds between two requests to the same host"
+    )
+    ok_ttl_hours: float = Field(default=168.0, ge=0, description="Hours before a working link is checked again")
+    broken_ttl_hours: float = Field(default=24.0, ge=0, description="Hours before a broken link is checked again")
+    user_agent: str = Field(default="Races link checker", description="User-Agent header of the probes")
+
+    model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(extra="ignore")
+
+
+class JobsConfig(BaseSettings):
+    """Background job runner settings."""
+
+    run_in_app: bool = Field(
+        default=True, description="Run queued jobs on threads of the web processes (False: only 'flask run-jobs')"
+    )
+    max_workers: int = Field(default=2, gt=0, description="Jobs run at the same time by each process")
+    poll_seconds: float = Field(default=2.0, gt=0, description="Seconds an idle runner waits before looking for jobs")
+    heartbeat_seconds: float = Field(default=5.0, gt=0, description="Seconds between two heartbeats of a running job")
+    stale_after_seconds: float = Field(
+        default=60.0, gt=0, description="Seconds without heartbeat after which a running job's worker is presumed dead"
+    )
+    max_attempts: int = Field(default=3, gt=0, description="Runs of a job whose worker died before it is failed")
+    progress_interval_seconds: float = Field(
+        default=0.5, ge=0, description="Minimum seconds between two progress writes (and cancellation checks)"
+    )
+    directory: str = Field(
+        default="instance/jobs", description="Uploaded inputs and produced files of the jobs, relative to the app root"
+    )
+    retention_days: float = Field(default=7.0, gt=0, description="Days finished jobs and their files are kept")
 
     model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(extra="ignore")
 
@@ -54,6 +316,17 @@ class Settings(BaseSettings):
     app: AppConfig
     database: DatabaseConfig
     log: LogConfig
+    imports: ImportConfig = Field(default_factory=ImportConfig)
+    cache: CacheConfig = Field(default_factory=CacheConfig)
+    instrumentation: InstrumentationConfig = Field(default_factory=InstrumentationConfig)
+    metrics: MetricsConfig = Field(default_factory=MetricsConfig)
+    assets: AssetsConfig = Field(default_factory=AssetsConfig)
+    changes: ChangesConfig = Field(default_factory=ChangesConfig)
+    snapshots: SnapshotsConfig = Field(default_factory=SnapshotsConfig)
+    geo: GeoConfig = Field(default_factory=GeoConfig)
+    duplicates: DuplicatesConfig = Field(default_factory=DuplicatesConfig)
+    links: LinksConfig = Field(default_factory=LinksConfig)
+    jobs: JobsConfig = Field(default_factory=JobsConfig)
 
     model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(
         yaml_file="config.yml",
@@ -91,5 +364,22 @@ class Settings(BaseSettings):
         return f"sqlite:///{db_path}"
 
 
-# Load settings at module import
-settings: Settings = Settings()  # type: ignore[call-arg]
+@cache
+def get_settings() -> Settings:
+    """Load .env and config.yml on first use and return the process-wide settings."""
+    load_dotenv()
+    return Settings()  # type: ignore[call-arg]
+
+
+class LazySettings:
+    """Stand-in for the Settings instance that loads it on first attribute access."""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(get_settings(), name, value)
+
+
+# Importing settings is free: config.yml is only read when an attribute is first used
+settings: Settings = cast(Settings, LazySettings())
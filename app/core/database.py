@@ -0,0 +1,43 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+SQLite connection tuning.
+PRAGMAs are connection-scoped in SQLite, so they are applied through a SQLAlchemy
+"connect" event on every new DBAPI connection the pool opens.
+"""
+from typing import Any
+
+from sqlalchemy import Engine, event
+
+from app.core.log import LoggerManager
+
+
+def configure_sqlite_engine(engine: Engine, pragmas: dict[str, str | int]) -> None:
+    """
+    Apply the given PRAGMAs to every new connection of a SQLite engine.
+
+    Args:
+        engine: SQLAlchemy engine to configure (ignored if not SQLite)
+        pragmas: PRAGMA name/value pairs, e.g. {"journal_mode": "WAL", "busy_timeout": 5000}
+
+    Usage:
+        configure_sqlite_engine(db.engine, settings.database.get_pragmas())
+    """
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    logger = LoggerManager.get_logger("Database")
+    statements: list[str] = [f"PRAGMA {name} = {value}" for name, value in pragmas.items()]
+
+    def set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    logger.info(f"SQLite PRAGMAs on connect: {', '.join(statements)}")
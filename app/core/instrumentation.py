@@ -0,0 +1,142 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Per-request timing and SQL instrumentation.
+Flask request hooks, SQLAlchemy cursor events and Jinja render signals fill a
+RequestTimings record on flask.g; the breakdown is exposed in a Server-Timing
+header and slow requests and statements are logged through LoggerManager.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from flask import Flask, Response, before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import Engine, event
+
+from app.core.config import InstrumentationConfig
+from app.core.log import LoggerManager
+from app.core.metrics import QUERY_LATENCY, registry
+
+# Longest repr of bound parameters written to a slow-query log line (executemany batches can be huge)
+MAX_LOGGED_PARAMETERS = 500
+
+
+@dataclass
+class RequestTimings:
+    """Time spent by the current request, in seconds."""
+
+    started: float = field(default_factory=time.perf_counter)
+    sql_count: int = 0
+    sql_seconds: float = 0.0
+    render_seconds: float = 0.0
+    render_started: float | None = None
+
+    @property
+    def total_seconds(self) -> float:
+        """Wall time elapsed since the request started."""
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total_seconds: float) -> str:
+        """Return the Server-Timing header value: sql, render, app (everything else) and total, in ms."""
+        app_seconds: float = max(0.0, total_seconds - self.sql_seconds - self.render_seconds)
+        return (
+            f'sql;dur={self.sql_seconds * 1000:.2f};desc="{self.sql_count} queries", '
+            f"render;dur={self.render_seconds * 1000:.2f}, "
+            f"app;dur={app_seconds * 1000:.2f}, "
+            f"total;dur={total_seconds * 1000:.2f}"
+        )
+
+
+def get_request_timings() -> RequestTimings | None:
+    """Return the timings of the current request, or None outside an instrumented request."""
+    return g.get("request_timings") if has_request_context() else None
+
+
+def configure_instrumentation(app: Flask, engine: Engine, config: InstrumentationConfig) -> None:
+    """
+    Instrument requests, SQL statements and template rendering.
+
+    The config object is read on every event, so thresholds can be changed at runtime.
+
+    Args:
+        app: Flask application to instrument
+        engine: SQLAlchemy engine whose statements are timed
+        config: instrumentation settings (settings.instrumentation)
+
+    Usage:
+        configure_instrumentation(app, db.engine, settings.instrumentation)
+    """
+    if not config.enabled:
+        return
+
+    logger = LoggerManager.get_logger("Instrumentation")
+
+    @app.before_request
+    def start_request_timer() -> None:
+        g.request_timings = RequestTimings()
+
+    @app.after_request
+    def finish_request_timer(response: Response) -> Response:
+        timings: RequestTimings | None = get_request_timings()
+        if timings is None:
+            return response
+        total_seconds: float = timings.total_seconds
+        if config.server_timing:
+            response.headers["Server-Timing"] = timings.server_timing(total_seconds)
+        if total_seconds * 1000 >= config.slow_request_ms:
+            logger.warning(
+                f"Slow request {request.method} {request.full_path.rstrip('?')} -> {response.status_code}: "
+                f"{total_seconds * 1000:.1f} ms total, {timings.sql_count} queries in "
+                f"{timings.sql_seconds * 1000:.1f} ms, render {timings.render_seconds * 1000:.1f} ms"
+            )
+        return response
+
+    def start_render_timer(sender: Flask, **extra: Any) -> None:
+        timings: RequestTimings | None = get_request_timings()
+        if timings is not None:
+            timings.render_started = time.perf_counter()
+
+    def stop_render_timer(sender: Flask, **extra: Any) -> None:
+        timings: RequestTimings | None = get_request_timings()
+        if timings is not None and timings.render_started is not None:
+            timings.render_seconds += time.perf_counter() - timings.render_started
+            timings.render_started = None
+
+    # Signals hold weak references by default: keep the receivers alive with the app
+    before_render_template.connect(start_render_timer, app, weak=False)
+    template_rendered.connect(stop_render_timer, app, weak=False)
+
+    def start_query_timer(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def stop_query_timer(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool):
+        elapsed: float = time.perf_counter() - conn.info["query_started"].pop()
+        if registry.enabled:
+            QUERY_LATENCY.observe(elapsed)
+        timings: RequestTimings | None = get_request_timings()
+        if timings is not None:
+            timings.sql_count += 1
+            timings.sql_seconds += elapsed
+        if elapsed * 1000 >= config.slow_query_ms:
+            message: str = f"Slow query ({elapsed * 1000:.1f} ms): {' '.join(statement.split())}"
+            if config.log_parameters:
+                message += f" parameters={repr(parameters)[:MAX_LOGGED_PARAMETERS]}"
+            logger.warning(message)
+
+    def discard_query_timer(exception_context: Any) -> None:
+        # after_cursor_execute is not called for failed statements
+        started: list[float] = (
+            exception_context.connection.info.get("query_started", []) if exception_context.connection else []
+        )
+        if started:
+            started.pop()
+
+    event.listen(engine, "before_cursor_execute", start_query_timer)
+    event.listen(engine, "after_cursor_execute", stop_query_timer)
+    event.listen(engine, "handle_error", discard_query_timer)
+    logger.debug(
+        f"Instrumentation enabled: slow_request={config.slow_request_ms} ms, slow_query={config.slow_query_ms} ms, "
+        f"server_timing={config.server_timing}"
+    )
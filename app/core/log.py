@@ -5,14 +5,24 @@
 """
 Logging configuration using loguru.
 Provides flexible logging with console and file output, rotation, retention, and compression.
+In production mode every sink is non-blocking, JSON lines are serialized on a background
+thread and werkzeug access logs can be sampled and rate limited.
 """
+import json
 import logging
+import queue
 import sys
+import threading
+import time
+import traceback
 from pathlib import Path
 from types import FrameType
+from typing import Any, Literal, TextIO
 
 from loguru import logger
 
+LogMode = Literal["development", "production"]
+
 # Log format constants
 APP_LOG_FORMAT = (
     "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
@@ -28,28 +38,183 @@ INTERCEPTED_LOG_FORMAT = (
     "<cyan>{line}</cyan> - <level>{message}</level>\n"
 )
 
+# Production format: no caller information, so log calls skip frame inspection entirely
+PRODUCTION_LOG_FORMAT = "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {extra[name]} - {message}\n"
+
+# Loggers whose lines are HTTP access logs (one per request)
+ACCESS_LOGGERS: tuple[str, ...] = ("werkzeug",)
+
 
 class InterceptHandler(logging.Handler):
     """
     Intercept standard logging messages and redirect them to loguru.
     This allows Flask and other libraries using standard logging to use loguru.
+
+    Level names and caller depths are cached per call site, so the frame walk runs once
+    per logging statement instead of once per record. With caller_info disabled there is
+    no frame walk at all and records are bound to the standard logger name instead.
     """
 
+    def __init__(self, caller_info: bool = True) -> None:
+        super().__init__()
+        self.caller_info: bool = caller_info
+        self._levels: dict[str, str | int] = {}
+        self._depths: dict[tuple[str, int], int] = {}
+        self._bound_loggers: dict[str, Any] = {}
+
+    def _level(self, record: logging.LogRecord) -> str | int:
+        """Return the loguru level matching the record, cached by level name."""
+        level: str | int | None = self._levels.get(record.levelname)
+        if level is None:
+            # Get corresponding Loguru level if it exists
+            try:
+                level = logger.level(record.levelname).name
+            except ValueError:
+                level = record.levelno
+            self._levels[record.levelname] = level
+        return level
+
+    def _depth(self, record: logging.LogRecord) -> int:
+        """Return the stack depth of the code that logged the record, cached by call site."""
+        key: tuple[str, int] = (record.pathname, record.lineno)
+        depth: int | None = self._depths.get(key)
+        if depth is None:
+            # Find caller from where originated the logged message
+            frame: FrameType | None = logging.currentframe()
+            depth = 2
+            while frame and frame.f_code.co_filename == logging.__file__:
+                frame = frame.f_back
+                depth += 1
+            self._depths[key] = depth
+        return depth
+
     def emit(self, record: logging.LogRecord) -> None:
-        # Get corresponding Loguru level if it exists
-        try:
-            level = logger.level(record.levelname).name
-        except ValueError:
-            level = record.levelno
+        if not self.caller_info:
+            bound = self._bound_loggers.get(record.name)
+            if bound is None:
+                bound = self._bound_loggers.setdefault(record.name, logger.bind(name=record.name))
+            bound.opt(exception=record.exc_info).log(self._level(record), record.getMessage())
+            return
+        logger.opt(depth=self._depth(record), exception=record.exc_info).log(self._level(record), record.getMessage())
+
 
-        # Find caller from where originated the logged message
-        frame: FrameType | None = logging.currentframe()
-        depth = 2
-        while frame and frame.f_code.co_filename == logging.__file__:
-            frame = frame.f_back
-            depth += 1
+class AccessLogFilter(logging.Filter):
+    """
+    Sample and rate limit access log records before they are formatted.
+
+    sampling maps a level name to the fraction of records kept (e.g. {"INFO": 0.1} keeps
+    one INFO line in ten); levels not listed are always kept. rate_limit caps the records
+    kept per second; the records dropped in a second are reported when the next one starts.
+    Sampling is deterministic: each level accumulates its fraction and a record is kept
+    whenever the accumulated credit reaches one.
+    """
 
-        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+    def __init__(self, sampling: dict[str, float] | None = None, rate_limit: float | None = None) -> None:
+        super().__init__()
+        self.sampling: dict[str, float] = {level.upper(): rate for level, rate in (sampling or {}).items()}
+        self.rate_limit: float | None = rate_limit
+        self.dropped: int = 0
+        self._credits: dict[str, float] = {}
+        self._window: int = 0
+        self._window_count: int = 0
+        self._window_dropped: int = 0
+        self._lock = threading.Lock()
+        self._logger = LoggerManager.get_logger(self.__class__.__name__)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate: float | None = self.sampling.get(record.levelname)
+        with self._lock:
+            if rate is not None:
+                credit: float = self._credits.get(record.levelname, 0.0) + rate
+                if credit < 1.0:
+                    self._credits[record.levelname] = credit
+                    self.dropped += 1
+                    return False
+                self._credits[record.levelname] = credit - 1.0
+            if self.rate_limit is None:
+                return True
+            window: int = int(time.monotonic())
+            if window != self._window:
+                if self._window_dropped:
+                    self._logger.warning(f"Rate limit dropped {self._window_dropped} access log lines")
+                self._window, self._window_count, self._window_dropped = window, 0, 0
+            if self._window_count >= self.rate_limit:
+                self._window_dropped += 1
+                self.dropped += 1
+                return False
+            self._window_count += 1
+            return True
+
+
+class BackgroundLogSink:
+    """
+    loguru sink writing to a stream from a background thread.
+
+    The logging thread only puts the message on an in-memory queue, which is much cheaper
+    than loguru's enqueue=True (a multiprocessing queue that pickles every record). With
+    serialize, building and serializing the JSON document also happen on the writer thread.
+    """
+
+    def __init__(self, stream: TextIO, serialize: bool = False, caller_info: bool = True) -> None:
+        self.stream: TextIO = stream
+        self.serialize: bool = serialize
+        self.caller_info: bool = caller_info
+        self._queue: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message: Any) -> None:
+        self._queue.put(message)
+
+    def stop(self) -> None:
+        """Write the queued records and stop the writer thread (called by logger.remove)."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def to_json(self, record: dict[str, Any]) -> str:
+        """Serialize a loguru record to a JSON line."""
+        extra: dict[str, Any] = dict(record["extra"])
+        document: dict[str, Any] = {
+            "time": record["time"].isoformat(),
+            "level": record["level"].name,
+            "logger": extra.pop("name", record["name"]),
+            "message": record["message"],
+        }
+        if self.caller_info:
+            document.update(module=record["name"], function=record["function"], line=record["line"])
+        if extra:
+            document["extra"] = extra
+        if record["exception"] is not None:
+            exc_type, exc_value, exc_traceback = record["exception"]
+            document["exception"] = {
+                "type": getattr(exc_type, "__name__", None),
+                "value": str(exc_value),
+                "traceback": "".join(traceback.format_exception(exc_type, exc_value, exc_traceback)),
+            }
+        return json.dumps(document, default=str, ensure_ascii=False) + "\n"
+
+    def _render(self, message: Any) -> str:
+        return self.to_json(message.record) if self.serialize else str(message)
+
+    def _run(self) -> None:
+        stopping: bool = False
+        while not stopping:
+            message: Any = self._queue.get()
+            if message is None:
+                break
+            lines: list[str] = [self._render(message)]
+            # Drain whatever else is queued and write it with a single call
+            while True:
+                try:
+                    message = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if message is None:
+                    stopping = True
+                    break
+                lines.append(self._render(message))
+            self.stream.write("".join(lines))
+            self.stream.flush()
 
 
 class LoggerManager:
@@ -64,6 +229,7 @@ class LoggerManager:
     - Configurable log level
     - Contextual logging with class/function/line information
     - Intercepts Flask and standard library logging
+    - Production mode: non-blocking sinks, optional JSON output, access log sampling
     """
 
     def __init__(
@@ -74,17 +240,27 @@ class LoggerManager:
         rotation: str = "10 MB",
         retention: str = "7 days",
         compression: str = "zip",
+        mode: LogMode = "development",
+        serialize: bool = False,
+        caller_info: bool | None = None,
+        access_log_sampling: dict[str, float] | None = None,
+        access_log_rate_limit: float | None = None,
     ) -> None:
         """
         Initialize the logger manager.
 
         Args:
             level: Log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-            console: Enable console logging (stdout)
+            console: Enable console logging (stderr, so stdout stays free for command output)
             file: Log file path (None to disable file logging)
             rotation: Log rotation size (e.g., "10 MB", "100 MB", "1 GB")
             retention: Log retention period (e.g., "7 days", "1 week", "1 month")
             compression: Compression format for rotated logs ("zip", "gz", "bz2", "xz")
+            mode: "production" makes every sink non-blocking and disables colors
+            serialize: Write console output as JSON lines, serialized on a background thread
+            caller_info: Include module/function/line (None: on in development, off in production)
+            access_log_sampling: Fraction of access log lines kept per level, e.g. {"INFO": 0.1}
+            access_log_rate_limit: Maximum access log lines per second (None for no limit)
         """
         self.level = level.upper()
         self.console = console
@@ -92,6 +268,11 @@ class LoggerManager:
         self.rotation = rotation
         self.retention = retention
         self.compression = compression
+        self.mode: LogMode = mode
+        self.serialize = serialize
+        self.caller_info: bool = caller_info if caller_info is not None else mode != "production"
+        self.access_log_sampling = access_log_sampling
+        self.access_log_rate_limit = access_log_rate_limit
 
         # Remove default logger
         logger.remove()
@@ -105,6 +286,8 @@ class LoggerManager:
     def _configure_logger(self):
         """Configure loguru logger based on settings."""
 
+        production: bool = self.mode == "production"
+
         # Custom formatter that handles both application logs (with extra[name]) and intercepted logs
         def format_record(record) -> str:
             # Map format based on whether 'name' exists in extra
@@ -114,14 +297,31 @@ class LoggerManager:
             }
             return format_map["name" in record["extra"]]
 
+        def format_production_record(record) -> str:
+            return PRODUCTION_LOG_FORMAT if "name" in record["extra"] else INTERCEPTED_LOG_FORMAT
+
+        record_format = format_record if self.caller_info else format_production_record
+
         # Define handlers configuration
-        handlers = []
+        handlers: list[dict[str, Any]] = []
 
-        if self.console:
+        if self.console and (production or self.serialize):
+            # Non-blocking: the calling thread formats (or, with serialize, not even that) and queues
             handlers.append(
                 {
-                    "sink": sys.stdout,
-                    "format": format_record,
+                    "sink": BackgroundLogSink(
+                        stream=sys.stderr, serialize=self.serialize, caller_info=self.caller_info
+                    ),
+                    "format": "{message}" if self.serialize else record_format,
+                    "level": self.level,
+                    "colorize": False,
+                }
+            )
+        elif self.console:
+            handlers.append(
+                {
+                    "sink": sys.stderr,
+                    "format": record_format,
                     "level": self.level,
                     "colorize": True,
                 }
@@ -135,7 +335,7 @@ class LoggerManager:
             handlers.append(
                 {
                     "sink": self.file,
-                    "format": format_record,
+                    "format": record_format,
                     "level": self.level,
                     "rotation": self.rotation,
                     "retention": self.retention,
@@ -151,12 +351,15 @@ class LoggerManager:
     def _intercept_standard_logging(self) -> None:
         """Intercept standard library logging and redirect to loguru."""
         # Intercept werkzeug (Flask) logging
-        logging.basicConfig(handlers=[InterceptHandler()], level=0, force=True)
+        logging.basicConfig(handlers=[InterceptHandler(caller_info=self.caller_info)], level=0, force=True)
 
         # Intercept specific loggers
         for logger_name in ["werkzeug", "flask.app"]:
             log = logging.getLogger(name=logger_name)
-            log.handlers = [InterceptHandler()]
+            handler: InterceptHandler = InterceptHandler(caller_info=self.caller_info)
+            if logger_name in ACCESS_LOGGERS and (self.access_log_sampling or self.access_log_rate_limit):
+                handler.addFilter(AccessLogFilter(self.access_log_sampling, self.access_log_rate_limit))
+            log.handlers = [handler]
             log.propagate = False
 
     @staticmethod
@@ -188,6 +391,11 @@ def setup_logging(
     rotation: str = "10 MB",
     retention: str = "7 days",
     compression: str = "zip",
+    mode: LogMode = "development",
+    serialize: bool = False,
+    caller_info: bool | None = None,
+    access_log_sampling: dict[str, float] | None = None,
+    access_log_rate_limit: float | None = None,
 ) -> LoggerManager:
     """
     Setup application logging.
@@ -197,11 +405,16 @@ def setup_logging(
 
     Args:
         level: Log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-        console: Enable console logging (stdout)
+        console: Enable console logging (stderr, so stdout stays free for command output)
         file: Log file path (None to disable file logging)
         rotation: Log rotation size (e.g., "10 MB", "100 MB", "1 GB")
         retention: Log retention period (e.g., "7 days", "1 week", "1 month")
         compression: Compression format for rotated logs ("zip", "gz", "bz2", "xz")
+        mode: "production" makes every sink non-blocking and disables colors
+        serialize: Write console output as JSON lines, serialized on a background thread
+        caller_info: Include module/function/line (None: on in development, off in production)
+        access_log_sampling: Fraction of access log lines kept per level, e.g. {"INFO": 0.1}
+        access_log_rate_limit: Maximum access log lines per second (None for no limit)
 
     Returns:
         LoggerManager instance
@@ -217,6 +430,9 @@ def setup_logging(
 
         # Both console and file
         setup_logging(console=True, file="logs/app.log")
+
+        # Production: non-blocking JSON on stderr, 10% of INFO access lines
+        setup_logging(mode="production", serialize=True, access_log_sampling={"INFO": 0.1})
     """
     return LoggerManager(
         level=level,
@@ -225,4 +441,9 @@ def setup_logging(
         rotation=rotation,
         retention=retention,
         compression=compression,
+        mode=mode,
+        serialize=serialize,
+        caller_info=caller_info,
+        access_log_sampling=access_log_sampling,
+        access_log_rate_limit=access_log_rate_limit,
     )
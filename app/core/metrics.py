@@ -0,0 +1,383 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+In-process metrics registry rendered in the Prometheus text exposition format.
+Counters, gauges and fixed-bucket histograms are updated under a per-metric lock,
+so recording a sample costs a dict lookup and an addition. With a multiprocess
+directory configured, each worker periodically writes a snapshot file and /metrics
+merges the snapshots of all workers.
+"""
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+from flask import Response, g, request
+
+from app.core.config import MetricsConfig
+
+LabelValues = tuple[str, ...]
+
+# Bucket upper bounds in seconds, used by the latency histograms when none are configured
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value as Prometheus expects (+Inf, integers without a fraction)."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues) -> str:
+    """Format a label set as {name="value",...}, escaping values."""
+    if not names:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+class Metric:
+    """Base class: a named family of samples, one per combination of label values."""
+
+    kind: str = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labelnames: tuple[str, ...] = labelnames
+        self._values: dict[LabelValues, Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> LabelValues:
+        """Return the label values in labelnames order. Raises ValueError on a wrong label set."""
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as e:
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}") from e
+
+    def snapshot(self) -> dict[LabelValues, Any]:
+        """Return a copy of the current values by label values."""
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._values.items()}
+
+    def _copy(self, value: Any) -> Any:
+        return value
+
+    def samples(self, values: dict[LabelValues, Any]) -> Iterator[tuple[str, str, float]]:
+        """Yield (sample name, formatted labels, value) for the given values."""
+        for key, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+    def merge(self, total: dict[LabelValues, Any], values: dict[LabelValues, Any]) -> None:
+        """Add values (e.g. from another worker) into total."""
+        for key, value in values.items():
+            total[key] = total.get(key, 0.0) + value
+
+
+class Counter(Metric):
+    """Monotonically increasing value, e.g. requests served or rows written."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Increase the counter by amount (must be >= 0)."""
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key: LabelValues = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, value: float, **labels: Any) -> None:
+        """Set the counter to a total maintained elsewhere (e.g. RaceCache hit counts)."""
+        key: LabelValues = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def get(self, **labels: Any) -> float:
+        """Return the current value for a label set."""
+        return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(Metric):
+    """Value that can go up and down, e.g. requests in flight or the cache version."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        """Set the gauge to value."""
+        key: LabelValues = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Increase (or decrease, with a negative amount) the gauge."""
+        key: LabelValues = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: Any) -> float:
+        """Return the current value for a label set."""
+        return self._values.get(self._key(labels), 0.0)
+
+
+class Histogram(Metric):
+    """
+    Distribution of observations over fixed buckets, e.g. request latency in seconds.
+
+    Each label set stores one count per bucket (non-cumulative) plus the sum of the
+    observations; cumulative bucket counts are computed only when rendering.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+
+    def set_buckets(self, buckets: tuple[float, ...]) -> None:
+        """Change the bucket bounds; observations recorded with other bounds are dropped."""
+        with self._lock:
+            if tuple(sorted(buckets)) != self.buckets:
+                self.buckets = tuple(sorted(buckets))
+                self._values.clear()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Record one observation."""
+        key: LabelValues = self._key(labels)
+        index: int = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state: list[float] | None = self._values.get(key)
+            if state is None:
+                # one slot per bucket, one for +Inf, then the sum
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    def get_count(self, **labels: Any) -> int:
+        """Return the number of observations for a label set."""
+        state: list[float] | None = self._values.get(self._key(labels))
+        return int(sum(state[:-1])) if state else 0
+
+    def _copy(self, value: Any) -> Any:
+        return list(value)
+
+    def samples(self, values: dict[LabelValues, Any]) -> Iterator[tuple[str, str, float]]:
+        names: tuple[str, ...] = (*self.labelnames, "le")
+        bounds: list[str] = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for key, state in sorted(values.items()):
+            cumulative: float = 0.0
+            for bound, count in zip(bounds, state[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket", _format_labels(names, (*key, bound)), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), state[-1]
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), cumulative
+
+    def merge(self, total: dict[LabelValues, Any], values: dict[LabelValues, Any]) -> None:
+        for key, state in values.items():
+            current: list[float] | None = total.get(key)
+            total[key] = list(state) if current is None else [a + b for a, b in zip(current, state)]
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together by /metrics.
+
+    Collectors are callables run right before rendering or snapshotting; they copy values
+    maintained elsewhere (e.g. RaceCache statistics) into registered metrics.
+
+    With multiprocess_dir set, every worker writes its snapshot to <dir>/<pid>.json at most
+    every flush_interval seconds, and render() merges all the snapshots: counters and
+    histograms are summed across workers (dead ones included, so totals never go back),
+    gauges are summed across live workers only.
+
+    Usage:
+        REQUESTS = registry.register(Counter("app_requests_total", "Requests served", ("endpoint",)))
+        REQUESTS.inc(endpoint="races")
+        text = registry.render()
+    """
+
+    def __init__(self) -> None:
+        self.enabled: bool = True
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+        self.multiprocess_dir: Path | None = None
+        self.flush_interval: float = 5.0
+        self._last_flush: float = 0.0
+        self._flush_lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Any:
+        """Register a metric and return it. Raises ValueError if the name is taken."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Run collector before every render or snapshot."""
+        self._collectors.append(collector)
+
+    def configure_multiprocess(self, directory: str | Path | None, flush_interval: float) -> None:
+        """Enable (or, with None, disable) snapshot sharing between worker processes."""
+        self.multiprocess_dir = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        if self.multiprocess_dir is not None:
+            self.multiprocess_dir.mkdir(parents=True, exist_ok=True)
+
+    def collect(self) -> dict[str, dict[LabelValues, Any]]:
+        """Run the collectors and return a snapshot of every metric of this process."""
+        for collector in self._collectors:
+            collector()
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def maybe_flush(self) -> None:
+        """Write this worker's snapshot if multiprocess mode is on and flush_interval has elapsed."""
+        if self.multiprocess_dir is None or time.monotonic() - self._last_flush < self.flush_interval:
+            return
+        self.flush()
+
+    def flush(self) -> None:
+        """Atomically write this worker's snapshot to the multiprocess directory."""
+        if self.multiprocess_dir is None:
+            return
+        with self._flush_lock:
+            self._last_flush = time.monotonic()
+            document: dict[str, list[list[Any]]] = {
+                name: [[list(key), value] for key, value in values.items()] for name, values in self.collect().items()
+            }
+            path: Path = self.multiprocess_dir / f"{os.getpid()}.json"
+            temporary: Path = path.with_suffix(".tmp")
+            temporary.write_text(json.dumps(document), encoding="utf-8")
+            os.replace(temporary, path)
+
+    def _merged_snapshots(self) -> dict[str, dict[LabelValues, Any]]:
+        """Merge the snapshot files of every worker, this one included."""
+        self.flush()
+        assert self.multiprocess_dir is not None  # nosec B101
+        totals: dict[str, dict[LabelValues, Any]] = {name: {} for name in self._metrics}
+        for path in self.multiprocess_dir.glob("*.json"):
+            try:
+                document: dict[str, list[list[Any]]] = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue  # a worker is replacing its file right now
+            alive: bool = _pid_alive(int(path.stem)) if path.stem.isdigit() else False
+            for name, entries in document.items():
+                metric: Metric | None = self._metrics.get(name)
+                if metric is None or (metric.kind == "gauge" and not alive):
+                    continue
+                metric.merge(totals[name], {tuple(key): value for key, value in entries})
+        return totals
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format (version 0.0.4)."""
+        values: dict[str, dict[LabelValues, Any]] = (
+            self._merged_snapshots() if self.multiprocess_dir is not None else self.collect()
+        )
+        lines: list[str] = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(
+                f"{sample}{labels} {_format_value(value)}" for sample, labels, value in metric.samples(values[name])
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: int) -> bool:
+    """Return True if a process with this pid exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+registry: MetricsRegistry = MetricsRegistry()
+
+# HTTP
+REQUEST_LATENCY: Histogram = registry.register(
+    Histogram(
+        "races_http_request_duration_seconds",
+        "Time spent serving HTTP requests",
+        ("endpoint", "method", "status"),
+    )
+)
+REQUESTS_IN_PROGRESS: Gauge = registry.register(
+    Gauge("races_http_requests_in_progress", "HTTP requests being served", ("endpoint",))
+)
+
+# RaceService and database
+ROWS_RETURNED: Counter = registry.register(
+    Counter("races_service_rows_returned_total", "Races returned by RaceService reads", ("operation",))
+)
+WRITES: Counter = registry.register(
+    Counter("races_service_writes_total", "Races created, updated, deleted or imported", ("operation",))
+)
+DB_ERRORS: Counter = registry.register(
+    Counter("races_db_errors_total", "SQLAlchemy errors raised by race operations", ("operation",))
+)
+QUERY_LATENCY: Histogram = registry.register(
+    Histogram(
+        "races_db_query_duration_seconds",
+        "Time spent executing SQL statements",
+    )
+)
+
+# RaceCache (copied from RaceCache.stats() by a collector)
+CACHE_HITS: Counter = registry.register(Counter("races_cache_hits_total", "RaceCache lookups served from cache"))
+CACHE_MISSES: Counter = registry.register(Counter("races_cache_misses_total", "RaceCache lookups that hit the DB"))
+CACHE_VERSION: Gauge = registry.register(Gauge("races_cache_data_version", "RaceCache data version"))
+
+
+def configure_metrics(config: MetricsConfig) -> None:
+    """Apply the metrics settings (enabled flag, latency buckets, multiprocess sharing) to the registry."""
+    registry.enabled = config.enabled
+    for histogram in (REQUEST_LATENCY, QUERY_LATENCY):
+        histogram.set_buckets(tuple(config.latency_buckets))
+    registry.configure_multiprocess(config.multiprocess_dir if config.enabled else None, config.flush_interval_seconds)
+
+
+def start_request_metrics() -> None:
+    """before_request hook: remember the start time and count the request as in progress."""
+    if not registry.enabled:
+        return
+    g.metrics_started = time.perf_counter()
+    REQUESTS_IN_PROGRESS.inc(endpoint=request.endpoint or "unmatched")
+
+
+def record_request_metrics(response: Response) -> Response:
+    """after_request hook: observe the request latency and flush the snapshot when due."""
+    started: float | None = g.get("metrics_started")
+    if started is not None:
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - started,
+            endpoint=request.endpoint or "unmatched",
+            method=request.method,
+            status=response.status_code,
+        )
+    registry.maybe_flush()
+    return response
+
+
+def end_request_metrics(exception: BaseException | None) -> None:
+    """teardown_request hook: runs even when the view raised, so the in-progress gauge never leaks."""
+    if g.pop("metrics_started", None) is not None:
+        REQUESTS_IN_PROGRESS.inc(-1, endpoint=request.endpoint or "unmatched")
@@ -2,8 +2,40 @@
 # Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
 # Licensed under the MIT License. See LICENSE.md for details.
 # -----------------------------------------------------------------------------
-from .races import Race
+from .batches import BatchItemResult, BatchResult, RaceBatch
+from .changes import ChangePage, RaceChange
+from .duplicates import DuplicateMatch, DuplicatePair, DuplicateReport
+from .geo import City, NearbyRace, NearbyRaces
+from .imports import ImportReport, RejectedRow
+from .jobs import Job
+from .links import LinkCheck, LinkCheckReport
+from .races import DataVersion, Race, RaceFilter, RacePage, RaceRecord, RaceRow, RaceSort
+from .stats import RaceStats, StatsBucket
 
 __all__ = [
+    "BatchItemResult",
+    "BatchResult",
+    "ChangePage",
+    "City",
+    "DataVersion",
+    "DuplicateMatch",
+    "DuplicatePair",
+    "DuplicateReport",
+    "ImportReport",
+    "Job",
+    "LinkCheck",
+    "LinkCheckReport",
+    "NearbyRace",
+    "NearbyRaces",
     "Race",
+    "RaceBatch",
+    "RaceChange",
+    "RaceFilter",
+    "RacePage",
+    "RaceRecord",
+    "RaceRow",
+    "RaceSort",
+    "RaceStats",
+    "RejectedRow",
+    "StatsBucket",
 ]
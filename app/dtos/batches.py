@@ -0,0 +1,64 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.dtos.races import Race, RaceRow
+
+
+@dataclass(frozen=True)
+class RaceBatch:
+    """Races to create, to update (by id) and to delete (ids), applied in one transaction."""
+
+    create: list[Race] = field(default_factory=list)
+    update: list[Race] = field(default_factory=list)
+    delete: list[int] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        """Number of items in the batch."""
+        return len(self.create) + len(self.update) + len(self.delete)
+
+
+@dataclass(frozen=True)
+class BatchItemResult:
+    """Outcome of one item of a batch: created, updated, deleted or not_found."""
+
+    operation: str
+    # Position of the item in its list of the batch
+    index: int
+    status: str
+    id: int | None = None
+    race: RaceRow | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the result as a JSON-serializable dictionary."""
+        data: dict[str, Any] = {"operation": self.operation, "index": self.index, "status": self.status, "id": self.id}
+        if self.race is not None:
+            data["race"] = self.race.model_dump(mode="json")
+        return data
+
+
+@dataclass
+class BatchResult:
+    """Per-item outcome and counts of a batch."""
+
+    items: list[BatchItemResult] = field(default_factory=list)
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    not_found: int = 0
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the result as a JSON-serializable dictionary."""
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "deleted": self.deleted,
+            "not_found": self.not_found,
+            "elapsed_seconds": round(self.elapsed_seconds, 4),
+            "items": [item.to_dict() for item in self.items],
+        }
@@ -0,0 +1,58 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from app.dtos.races import RaceRow
+
+
+def _utc_isoformat(value: datetime | None) -> str | None:
+    """Format a naive UTC datetime read from the database as ISO 8601 with an explicit offset."""
+    return value.replace(tzinfo=timezone.utc).isoformat() if value is not None else None
+
+
+@dataclass(frozen=True)
+class RaceChange:
+    """Latest state of a race written after the client's cursor; race is None for a deleted race."""
+
+    id: int
+    revision: int
+    updated_at: datetime | None
+    deleted_at: datetime | None = None
+    race: RaceRow | None = None
+
+    @property
+    def deleted(self) -> bool:
+        """True if the race was deleted (the change is a tombstone)."""
+        return self.deleted_at is not None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the change as a JSON-serializable dictionary."""
+        return {
+            "id": self.id,
+            "revision": self.revision,
+            "updated_at": _utc_isoformat(self.updated_at),
+            "deleted": self.deleted,
+            "deleted_at": _utc_isoformat(self.deleted_at),
+            "race": self.race.model_dump(mode="json") if self.race is not None else None,
+        }
+
+
+@dataclass(frozen=True)
+class ChangePage:
+    """Changes after the client's cursor, in revision order; cursor is the opaque position to resume from."""
+
+    cursor: str
+    has_more: bool = False
+    changes: list[RaceChange] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the page as a JSON-serializable dictionary."""
+        return {
+            "cursor": self.cursor,
+            "has_more": self.has_more,
+            "changes": [change.to_dict() for change in self.changes],
+        }
@@ -0,0 +1,69 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.dtos.races import RaceRow
+
+
+@dataclass(frozen=True)
+class DuplicateMatch:
+    """
+    Existing race that looks like the same race as another one.
+
+    similarity is the trigram similarity of the names (0-1); reasons lists the rules that
+    matched: "website" (same day and website), "city" (same day and city, similar name),
+    "name" (very similar name within a few days).
+    """
+
+    race: RaceRow
+    similarity: float
+    reasons: tuple[str, ...]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the match as a JSON-serializable dictionary."""
+        return {
+            "race": self.race.model_dump(mode="json"),
+            "similarity": round(self.similarity, 2),
+            "reasons": list(self.reasons),
+        }
+
+
+@dataclass(frozen=True)
+class DuplicatePair:
+    """Two races that look like the same race, the older one (lower id) first."""
+
+    race: RaceRow
+    duplicate: RaceRow
+    similarity: float
+    reasons: tuple[str, ...]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the pair as a JSON-serializable dictionary."""
+        return {
+            "race": self.race.model_dump(mode="json"),
+            "duplicate": self.duplicate.model_dump(mode="json"),
+            "similarity": round(self.similarity, 2),
+            "reasons": list(self.reasons),
+        }
+
+
+@dataclass
+class DuplicateReport:
+    """Duplicate pairs found over the whole race table, and how many comparisons it took."""
+
+    races: int = 0
+    comparisons: int = 0
+    elapsed_seconds: float = 0.0
+    pairs: list[DuplicatePair] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the report as a JSON-serializable dictionary."""
+        return {
+            "races": self.races,
+            "comparisons": self.comparisons,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "pairs": [pair.to_dict() for pair in self.pairs],
+        }
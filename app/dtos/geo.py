@@ -0,0 +1,60 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.dtos.races import RaceRow
+
+
+@dataclass(frozen=True)
+class City:
+    """Locality of the gazetteer."""
+
+    id: int
+    name: str
+    province: str
+    latitude: float
+    longitude: float
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the locality as a JSON-serializable dictionary."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "province": self.province,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+        }
+
+
+@dataclass(frozen=True)
+class NearbyRace:
+    """Race held within the search radius; distance_km is measured from the centre to its locality."""
+
+    race: RaceRow
+    distance_km: float
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the race and its distance as a JSON-serializable dictionary."""
+        return {**self.race.model_dump(mode="json"), "distance_km": round(self.distance_km, 1)}
+
+
+@dataclass(frozen=True)
+class NearbyRaces:
+    """Races within radius_km of a centre, nearest first (then by date)."""
+
+    latitude: float
+    longitude: float
+    radius_km: float
+    races: list[NearbyRace] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the search result as a JSON-serializable dictionary."""
+        return {
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "radius_km": self.radius_km,
+            "races": [race.to_dict() for race in self.races],
+        }
@@ -0,0 +1,47 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+
+@dataclass(frozen=True)
+class RejectedRow:
+    """A CSV row that failed validation, with its line number in the source file."""
+
+    line: int
+    error: str
+
+
+@dataclass
+class ImportReport:
+    """Outcome and throughput of a bulk import."""
+
+    total_rows: int = 0
+    inserted_rows: int = 0
+    rejected_rows: int = 0
+    batches: int = 0
+    elapsed_seconds: float = 0.0
+    rejections: list[RejectedRow] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        """Processed rows per second."""
+        return self.total_rows / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the report as a JSON-serializable dictionary."""
+        return {**asdict(self), "rows_per_second": round(self.rows_per_second, 1)}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ImportReport":
+        """Rebuild a report from to_dict() output."""
+        return cls(
+            total_rows=data["total_rows"],
+            inserted_rows=data["inserted_rows"],
+            rejected_rows=data["rejected_rows"],
+            batches=data["batches"],
+            elapsed_seconds=data["elapsed_seconds"],
+            rejections=[RejectedRow(**rejection) for rejection in data["rejections"]],
+        )
@@ -0,0 +1,65 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Job:
+    """A background job and its progress."""
+
+    id: int
+    kind: str
+    status: str
+    created_at: datetime
+    params: dict[str, Any] = field(default_factory=dict)
+    progress_done: int = 0
+    progress_total: int | None = None
+    message: str | None = None
+    result: dict[str, Any] | None = None
+    checkpoint: dict[str, Any] | None = None
+    error: str | None = None
+    attempts: int = 0
+    max_attempts: int = 1
+    cancel_requested: bool = False
+    started_at: datetime | None = None
+    heartbeat_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    @property
+    def finished(self) -> bool:
+        """True once the job succeeded, failed or was cancelled."""
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    @property
+    def progress(self) -> float | None:
+        """Fraction of the work done, None while the total is unknown."""
+        if self.status == "succeeded":
+            return 1.0
+        if not self.progress_total:
+            return None
+        return min(self.progress_done / self.progress_total, 1.0)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the job as a JSON-serializable dictionary."""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "params": self.params,
+            "progress": round(self.progress, 4) if self.progress is not None else None,
+            "progress_done": self.progress_done,
+            "progress_total": self.progress_total,
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "cancel_requested": self.cancel_requested,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,58 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any
+
+
+@dataclass(frozen=True)
+class LinkCheck:
+    """Outcome of the last probe of a race website."""
+
+    url: str
+    status: str
+    checked_at: datetime
+    status_code: int | None = None
+    error: str | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    failures: int = 0
+
+    @property
+    def broken(self) -> bool:
+        """True if the last probe failed."""
+        return self.status == "broken"
+
+    @property
+    def reason(self) -> str:
+        """Short human-readable cause of a failed probe ("HTTP 404", "timed out")."""
+        return f"HTTP {self.status_code}" if self.status_code is not None else self.error or ""
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the check as a JSON-serializable dictionary."""
+        return {
+            "url": self.url,
+            "status": self.status,
+            "status_code": self.status_code,
+            "error": self.error,
+            "checked_at": self.checked_at.isoformat(),
+            "failures": self.failures,
+        }
+
+
+@dataclass
+class LinkCheckReport:
+    """Outcome of a link checker run."""
+
+    checked: int = 0
+    ok: int = 0
+    broken: int = 0
+    not_modified: int = 0
+    changed: int = 0
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the report as a JSON-serializable dictionary."""
+        return {**asdict(self), "elapsed_seconds": round(self.elapsed_seconds, 3)}
@@ -2,12 +2,16 @@
 # Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
 # Licensed under the MIT License. See LICENSE.md for details.
 # -----------------------------------------------------------------------------
-from datetime import datetime
-from typing import ClassVar
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, ClassVar, Literal, NamedTuple, TypeAlias
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from pydantic.config import ConfigDict
 
+# Sort keys accepted by the race listing; a leading "-" means descending order
+RaceSort = Literal["time", "-time", "distance", "-distance"]
+
 
 class Race(BaseModel):
     id: int | None = None
@@ -18,3 +22,75 @@ class Race(BaseModel):
     website: str
 
     model_config: ClassVar[ConfigDict] = ConfigDict(from_attributes=True)
+
+
+class RaceRow(NamedTuple):
+    """
+    Lightweight read-only race built straight from a database row, without validation.
+
+    Only used on read paths for rows coming from our own schema; it exposes the same
+    attributes as Race and a compatible model_dump(), so templates and JSON
+    serialization can use either.
+    """
+
+    id: int
+    name: str
+    time: datetime
+    city: str
+    distance: int
+    website: str | None
+
+    def model_dump(self, mode: Literal["python", "json"] = "python") -> dict[str, Any]:
+        """Return the race as a dictionary, with JSON-compatible values if mode is "json"."""
+        data: dict[str, Any] = self._asdict()
+        if mode == "json":
+            data["time"] = self.time.isoformat()
+        return data
+
+
+# Any race returned by the read paths of RaceService
+RaceRecord: TypeAlias = Race | RaceRow
+
+
+class RaceFilter(BaseModel):
+    """Filters and sort order for the race listing, translated into SQL by the service."""
+
+    date_from: date | None = None
+    date_to: date | None = None
+    city: str | None = Field(default=None, min_length=1)
+    distance_min: int | None = Field(default=None, ge=0)
+    distance_max: int | None = Field(default=None, ge=0)
+    sort: RaceSort = "time"
+
+    model_config: ClassVar[ConfigDict] = ConfigDict(extra="ignore", str_strip_whitespace=True)
+
+    @model_validator(mode="after")
+    def check_ranges(self) -> "RaceFilter":
+        """Reject empty date and distance ranges."""
+        if self.date_from and self.date_to and self.date_from > self.date_to:
+            raise ValueError("date_from must not be after date_to")
+        if self.distance_min is not None and self.distance_max is not None and self.distance_min > self.distance_max:
+            raise ValueError("distance_min must not be greater than distance_max")
+        return self
+
+    def to_query_args(self) -> dict[str, str]:
+        """Return the active filters as query string arguments."""
+        return {key: str(value) for key, value in self.model_dump(exclude_defaults=True).items()}
+
+
+@dataclass(frozen=True)
+class RacePage:
+    """A single page of races with the cursors to reach its neighbours."""
+
+    races: list[RaceRecord] = field(default_factory=list)
+    limit: int = 0
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+
+@dataclass(frozen=True)
+class DataVersion:
+    """Table-level version of the races: changes with every committed write."""
+
+    version: int
+    last_modified: datetime
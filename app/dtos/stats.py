@@ -0,0 +1,38 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass(frozen=True)
+class StatsBucket:
+    """Number of live races in one bucket; key is "2024-05", a city, or a distance lower bound in meters."""
+
+    key: str
+    label: str
+    races: int
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the bucket as a JSON-serializable dictionary."""
+        return {"key": self.key, "label": self.label, "races": self.races}
+
+
+@dataclass(frozen=True)
+class RaceStats:
+    """Race counts per month (chronological), per city (most races first) and per distance range (shortest first)."""
+
+    total: int = 0
+    by_month: list[StatsBucket] = field(default_factory=list)
+    by_city: list[StatsBucket] = field(default_factory=list)
+    by_distance: list[StatsBucket] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the statistics as a JSON-serializable dictionary."""
+        return {
+            "total": self.total,
+            "by_month": [bucket.to_dict() for bucket in self.by_month],
+            "by_city": [bucket.to_dict() for bucket in self.by_city],
+            "by_distance": [bucket.to_dict() for bucket in self.by_distance],
+        }
@@ -2,8 +2,27 @@
 # Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
 # Licensed under the MIT License. See LICENSE.md for details.
 # -----------------------------------------------------------------------------
+from .cities import CityDAO, find_city, load_gazetteer
+from .duplicates import rebuild_name_index
+from .jobs import JobDAO
+from .links import LinkCheckDAO
 from .races import RaceDAO
+from .schema import create_schema
+from .search import rebuild_search_index
+from .stats import read_stats, rebuild_stats
+from .version import read_data_version
 
 __all__ = [
+    "CityDAO",
+    "JobDAO",
+    "LinkCheckDAO",
     "RaceDAO",
+    "create_schema",
+    "find_city",
+    "load_gazetteer",
+    "read_data_version",
+    "read_stats",
+    "rebuild_name_index",
+    "rebuild_search_index",
+    "rebuild_stats",
 ]
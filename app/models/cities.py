@@ -0,0 +1,162 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Gazetteer of localities and the spatial index used by proximity search.
+The city table is loaded from a CSV gazetteer (name, province, latitude, longitude).
+city_rtree is a SQLite R*Tree over the city coordinates, kept in sync with the city
+table by triggers. Races reference their locality through race.city_id, which a trigger
+resolves from the free-text race.city ("Roma(RM)", "Roma (RM)", "Viterbo") on every
+insert and city change, whichever code path performs it.
+"""
+import csv
+from pathlib import Path
+
+from sqlalchemy import Connection, Row, event, text
+
+from app import db
+
+GEO_INDEX_TABLE = "city_rtree"
+
+
+def name_key_sql(value: str) -> str:
+    """SQL expression normalizing the locality name of a "Name(PR)" string: "Rocca di Papa (RM)" -> "roccadipapa"."""
+    name: str = f"CASE WHEN instr({value}, '(') > 0 THEN substr({value}, 1, instr({value}, '(') - 1) ELSE {value} END"
+    return f"lower(replace({name}, ' ', ''))"
+
+
+def province_sql(value: str) -> str:
+    """SQL expression extracting the province of a "Name(PR)" string: "Tivoli (RM)" -> "RM", "Tivoli" -> ""."""
+    province: str = f"replace(substr({value}, instr({value}, '(') + 1), ')', '')"
+    return f"CASE WHEN instr({value}, '(') > 0 THEN upper(trim({province})) ELSE '' END"
+
+
+def city_id_sql(value: str) -> str:
+    """
+    SQL expression resolving a free-text city to a city id, or NULL.
+
+    The exact (name, province) match wins; otherwise the name alone matches if exactly one
+    locality of the gazetteer has it.
+    """
+    return (
+        f"COALESCE("
+        f"(SELECT id FROM city WHERE name_key = {name_key_sql(value)} AND province = {province_sql(value)}), "
+        f"(SELECT MIN(id) FROM city WHERE name_key = {name_key_sql(value)} HAVING COUNT(*) = 1))"
+    )
+
+
+class CityDAO(db.Model):  # type: ignore[name-defined]
+    __tablename__ = "city"
+    __table_args__ = (db.UniqueConstraint("name_key", "province", name="uq_city_name_key_province"),)
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String(50), nullable=False)
+    # Lowercase name without spaces, the lookup key of race.city
+    name_key = db.Column(db.String(50), nullable=False)
+    province = db.Column(db.String(2), nullable=False)
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+
+
+GEO_DDL: tuple[str, ...] = (
+    # Points are stored as degenerate boxes (min = max)
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {GEO_INDEX_TABLE} USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS city_rtree_after_insert AFTER INSERT ON city BEGIN
+        INSERT INTO {GEO_INDEX_TABLE} VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS city_rtree_after_update AFTER UPDATE OF latitude, longitude ON city BEGIN
+        UPDATE {GEO_INDEX_TABLE} SET min_lat = new.latitude, max_lat = new.latitude,
+            min_lon = new.longitude, max_lon = new.longitude WHERE id = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS city_rtree_after_delete AFTER DELETE ON city BEGIN
+        DELETE FROM {GEO_INDEX_TABLE} WHERE id = old.id;
+        UPDATE race SET city_id = NULL WHERE city_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS race_city_after_insert AFTER INSERT ON race WHEN new.city_id IS NULL BEGIN
+        UPDATE race SET city_id = {city_id_sql("new.city")} WHERE id = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS race_city_after_update AFTER UPDATE OF city ON race BEGIN
+        UPDATE race SET city_id = {city_id_sql("new.city")} WHERE id = new.id;
+    END
+    """,
+)
+
+
+def create_geo_index(connection: Connection) -> None:
+    """Create the R*Tree and the city triggers if missing, indexing existing cities on creation."""
+    exists: bool = (
+        connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": GEO_INDEX_TABLE}
+        ).first()
+        is not None
+    )
+    for statement in GEO_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        connection.execute(
+            text(f"INSERT INTO {GEO_INDEX_TABLE} SELECT id, latitude, latitude, longitude, longitude FROM city")
+        )
+        link_races_to_cities(connection)
+
+
+def load_gazetteer(connection: Connection, path: Path) -> int:
+    """
+    Insert or update the localities of a gazetteer CSV (header: name,province,latitude,longitude).
+
+    Races not linked to a city yet are linked afterwards. Returns the number of gazetteer rows.
+    """
+    with path.open(encoding="utf-8", newline="") as gazetteer:
+        rows: list[dict[str, str]] = [row for row in csv.DictReader(gazetteer) if row.get("name")]
+    statement = text(
+        "INSERT INTO city (name, name_key, province, latitude, longitude) "
+        f"VALUES (:name, {name_key_sql(':name')}, upper(:province), :latitude, :longitude) "
+        "ON CONFLICT (name_key, province) DO UPDATE SET "
+        "name = excluded.name, latitude = excluded.latitude, longitude = excluded.longitude"
+    )
+    if rows:
+        connection.execute(
+            statement,
+            [
+                {
+                    "name": row["name"].strip(),
+                    "province": row["province"].strip(),
+                    "latitude": float(row["latitude"]),
+                    "longitude": float(row["longitude"]),
+                }
+                for row in rows
+            ],
+        )
+    link_races_to_cities(connection)
+    return len(rows)
+
+
+def link_races_to_cities(connection: Connection) -> int:
+    """Resolve race.city_id for the races without one (backfill); return how many were linked."""
+    unlinked = text("SELECT COUNT(*) FROM race WHERE city_id IS NULL")
+    before: int = connection.execute(unlinked).scalar_one()
+    connection.execute(text(f"UPDATE race SET city_id = {city_id_sql('race.city')} WHERE city_id IS NULL"))
+    return before - connection.execute(unlinked).scalar_one()
+
+
+def find_city(connection: Connection, name: str) -> Row | None:
+    """Return the (id, name, province, latitude, longitude) of the locality a free-text city resolves to."""
+    return connection.execute(
+        text(f"SELECT id, name, province, latitude, longitude FROM city WHERE id = {city_id_sql(':city')}"),
+        {"city": name},
+    ).first()
+
+
+@event.listens_for(CityDAO.__table__, "after_drop")
+def _drop_geo_index(target, connection: Connection, **kw) -> None:
+    """Drop the R*Tree (a virtual table db.drop_all() does not know about) together with the city table."""
+    connection.execute(text(f"DROP TABLE IF EXISTS {GEO_INDEX_TABLE}"))
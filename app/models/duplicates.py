@@ -0,0 +1,112 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Trigram index over race names, used to find the races named like a given one.
+race_name_grams is an external-content FTS5 table with the trigram tokenizer: its index
+holds, for every lowercase three-character sequence, the races whose name contains it.
+race_name_grams_vocab exposes that index as rows, so the races sharing most trigrams
+with a name are counted with one GROUP BY over a few posting lists instead of comparing
+the name with every race. Triggers keep it in sync, whichever code path writes.
+"""
+from datetime import datetime
+
+from sqlalchemy import Connection, DateTime, Row, bindparam, event, text
+
+from app.models.races import RaceDAO
+
+NAME_INDEX_TABLE = "race_name_grams"
+NAME_VOCAB_TABLE = "race_name_grams_vocab"
+
+NAME_INDEX_DDL: tuple[str, ...] = (
+    # detail='none': only which races contain a trigram matters, not where
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {NAME_INDEX_TABLE} USING fts5(
+        name, content='race', content_rowid='id', tokenize='trigram', detail='none'
+    )
+    """,
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {NAME_VOCAB_TABLE} USING fts5vocab({NAME_INDEX_TABLE}, 'instance')",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS race_name_grams_after_insert AFTER INSERT ON race BEGIN
+        INSERT INTO {NAME_INDEX_TABLE}(rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS race_name_grams_after_delete AFTER DELETE ON race BEGIN
+        INSERT INTO {NAME_INDEX_TABLE}({NAME_INDEX_TABLE}, rowid, name) VALUES ('delete', old.id, old.name);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS race_name_grams_after_update AFTER UPDATE OF name ON race BEGIN
+        INSERT INTO {NAME_INDEX_TABLE}({NAME_INDEX_TABLE}, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO {NAME_INDEX_TABLE}(rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+)
+
+SIMILAR_NAMES_SQL = text(
+    f"""
+    SELECT grams.id, grams.shared FROM (
+        SELECT doc AS id, COUNT(DISTINCT term) AS shared FROM {NAME_VOCAB_TABLE}
+        WHERE term IN :grams GROUP BY doc HAVING COUNT(DISTINCT term) >= :min_shared
+    ) AS grams
+    JOIN race ON race.id = grams.id
+    WHERE race.deleted_at IS NULL AND race.time >= :time_from AND race.time < :time_to
+    ORDER BY grams.shared DESC, race.id
+    LIMIT :limit
+    """
+).bindparams(
+    bindparam("grams", expanding=True),
+    bindparam("time_from", type_=DateTime()),
+    bindparam("time_to", type_=DateTime()),
+)
+
+
+def create_name_index(connection: Connection) -> None:
+    """Create the trigram index, its vocabulary table and triggers if missing, indexing existing races on creation."""
+    exists: bool = (
+        connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": NAME_INDEX_TABLE}
+        ).first()
+        is not None
+    )
+    for statement in NAME_INDEX_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        rebuild_name_index(connection)
+
+
+def rebuild_name_index(connection: Connection) -> None:
+    """Rebuild the whole trigram index from the race table."""
+    connection.execute(text(f"INSERT INTO {NAME_INDEX_TABLE}({NAME_INDEX_TABLE}) VALUES ('rebuild')"))
+
+
+def find_similar_names(
+    connection: Connection,
+    grams: list[str],
+    min_shared: int,
+    time_from: datetime,
+    time_to: datetime,
+    limit: int,
+) -> list[Row]:
+    """
+    Return the (id, shared) of the live races in [time_from, time_to) whose name has at least min_shared of grams.
+
+    grams must be lowercase trigrams, as stored by the trigram tokenizer; most shared first.
+    """
+    if not grams:
+        return []
+    return list(
+        connection.execute(
+            SIMILAR_NAMES_SQL,
+            {"grams": grams, "min_shared": min_shared, "time_from": time_from, "time_to": time_to, "limit": limit},
+        )
+    )
+
+
+@event.listens_for(RaceDAO.__table__, "after_drop")
+def _drop_name_index(target, connection: Connection, **kw) -> None:
+    """Drop the index together with the race table so it never points to stale rowids."""
+    connection.execute(text(f"DROP TABLE IF EXISTS {NAME_VOCAB_TABLE}"))
+    connection.execute(text(f"DROP TABLE IF EXISTS {NAME_INDEX_TABLE}"))
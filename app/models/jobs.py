@@ -0,0 +1,50 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Persistent queue of background jobs.
+A job row is the whole state of a job: what to run (kind, params), where it is
+(status, progress, heartbeat) and how it ended (result or error). Runners of any
+process claim queued jobs with a single UPDATE ... RETURNING, so a job runs once even
+with several workers, and a job whose runner stops sending heartbeats is found by the
+others and queued again.
+"""
+from app import db
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_FINISHED: tuple[str, ...] = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+
+class JobDAO(db.Model):  # type: ignore[name-defined]
+    __tablename__ = "job"
+    __table_args__ = (
+        # Oldest queued job first; running jobs checked for stale heartbeats
+        db.Index("ix_job_status_id", "status", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)
+    status = db.Column(db.String(10), nullable=False, default=JOB_QUEUED)
+    params = db.Column(db.JSON, nullable=False, default=dict)
+    # Units done out of progress_total (rows, bytes, ...); total is NULL while unknown
+    progress_done = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    progress_total = db.Column(db.Integer)
+    message = db.Column(db.String(200))
+    result = db.Column(db.JSON)
+    # State saved with the job's last committed work, handed to the next run if its worker dies
+    checkpoint = db.Column(db.JSON)
+    error = db.Column(db.String(500))
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    max_attempts = db.Column(db.Integer, nullable=False)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False, server_default="0")
+    # "<hostname>:<pid>" of the process running the job
+    worker = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, nullable=False)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
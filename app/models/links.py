@@ -0,0 +1,65 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Results of the race website link checker.
+link_check holds one row per distinct URL: the outcome of the last probe, the validators
+(ETag, Last-Modified) for the next conditional request, and when it was checked. Rows
+are re-probed only once their TTL has passed. Pages show broken links, so triggers bump
+the data version of the race table when a link becomes broken or is fixed.
+"""
+from sqlalchemy import Connection, text
+
+from app import db
+from app.models.version import BUMP_VERSION_SQL
+
+LINK_OK = "ok"
+LINK_BROKEN = "broken"
+
+
+class LinkCheckDAO(db.Model):  # type: ignore[name-defined]
+    __tablename__ = "link_check"
+    __table_args__ = (
+        # Broken links shown in the race list
+        db.Index("ix_link_check_status", "status"),
+    )
+
+    url = db.Column(db.String(100), primary_key=True)
+    status = db.Column(db.String(10), nullable=False)
+    # HTTP status of the last probe; NULL if the server could not be reached
+    status_code = db.Column(db.Integer)
+    error = db.Column(db.String(200))
+    etag = db.Column(db.String(200))
+    last_modified = db.Column(db.String(50))
+    checked_at = db.Column(db.DateTime, nullable=False)
+    # Consecutive failed probes
+    failures = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+
+LINK_TRIGGER_DDL: tuple[str, ...] = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS link_check_after_insert AFTER INSERT ON link_check
+    WHEN new.status = '{LINK_BROKEN}' BEGIN
+        {BUMP_VERSION_SQL}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS link_check_after_update AFTER UPDATE OF status ON link_check
+    WHEN old.status IS NOT new.status BEGIN
+        {BUMP_VERSION_SQL}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS link_check_after_delete AFTER DELETE ON link_check
+    WHEN old.status = '{LINK_BROKEN}' BEGIN
+        {BUMP_VERSION_SQL}
+    END
+    """,
+)
+
+
+def create_link_triggers(connection: Connection) -> None:
+    """Create the link_check triggers if missing."""
+    for statement in LINK_TRIGGER_DDL:
+        connection.execute(text(statement))
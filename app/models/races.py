@@ -9,6 +9,18 @@ from app import db
 
 class RaceDAO(db.Model):  # type: ignore[name-defined]
     __tablename__ = "race"
+    # Indexes backing the listing filters and keyset pagination on (sort key, id);
+    # id is the rowid so it is implicitly the last column of every index
+    __table_args__ = (
+        db.Index("ix_race_time", "time"),
+        db.Index("ix_race_distance", "distance"),
+        db.Index("ix_race_city_time", "city", "time"),
+        db.Index("ix_race_city_distance", "city", "distance"),
+        # Change feed: races written after a given revision
+        db.Index("ix_race_revision", "revision"),
+        # Proximity search: races of the cities found by the R*Tree
+        db.Index("ix_race_city_id_time", "city_id", "time"),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(50), nullable=False)
@@ -17,3 +29,12 @@ class RaceDAO(db.Model):  # type: ignore[name-defined]
     city = db.Column(db.String(20), nullable=False)
     distance = db.Column(db.Integer, nullable=False)
     website = db.Column(db.String(100))
+
+    # Change tracking: revision and updated_at are stamped by the triggers in app.models.version,
+    # deleted_at marks a tombstone kept for the change feed until it is compacted
+    updated_at = db.Column(db.DateTime)
+    deleted_at = db.Column(db.DateTime)
+    revision = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    # Locality of the gazetteer matching city, resolved by the triggers in app.models.cities (NULL if unknown)
+    city_id = db.Column(db.Integer, db.ForeignKey("city.id", ondelete="SET NULL"))
@@ -0,0 +1,57 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Schema management.
+db.create_all() only creates missing tables, so objects added to existing tables
+(columns, indexes, ...) and the SQLite-specific objects (FTS5 indexes, data version,
+summary table, R*Tree, triggers) are created here as well, idempotently.
+"""
+from sqlalchemy import Engine, inspect, text
+from sqlalchemy.schema import CreateColumn
+
+from app import db
+from app.models.cities import create_geo_index
+from app.models.duplicates import create_name_index
+from app.models.links import create_link_triggers
+from app.models.search import create_search_index
+from app.models.stats import create_stats_table
+from app.models.version import create_version_table
+
+
+def create_schema(engine: Engine | None = None) -> None:
+    """Create missing tables and the indexes of existing tables. Requires an app context."""
+    engine = engine or db.engine
+    db.create_all()
+    add_missing_columns(engine)
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    with engine.begin() as connection:
+        create_search_index(connection)
+        create_version_table(connection)
+        create_stats_table(connection)
+        create_geo_index(connection)
+        create_name_index(connection)
+        create_link_triggers(connection)
+
+
+def add_missing_columns(engine: Engine) -> list[str]:
+    """
+    Add the model columns missing from existing tables and return their "table.column" names.
+
+    SQLite can only add columns that are nullable or have a constant default, which is
+    what every column added after a table's first release must be.
+    """
+    added: list[str] = []
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            existing: set[str] = {column["name"] for column in inspect(connection).get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                definition: str = str(CreateColumn(column).compile(dialect=engine.dialect))
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {definition}"))
+                added.append(f"{table.name}.{column.name}")
+    return added
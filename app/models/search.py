@@ -0,0 +1,68 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+SQLite FTS5 full-text index over race names and cities.
+race_fts is an external-content table: it stores only the index and reads the text
+from the race table. Triggers keep it in sync with every insert, update and delete,
+whichever code path performs them.
+"""
+from sqlalchemy import Connection, event, text
+
+from app.models.races import RaceDAO
+
+SEARCH_TABLE = "race_fts"
+
+SEARCH_DDL: tuple[str, ...] = (
+    # unicode61 splits "Ostia(RM)" into "ostia" and "rm"; prefix indexes make "mara*" cheap
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        name, city,
+        content='race', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS race_fts_after_insert AFTER INSERT ON race BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, name, city) VALUES (new.id, new.name, new.city);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS race_fts_after_delete AFTER DELETE ON race BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, city) VALUES ('delete', old.id, old.name, old.city);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS race_fts_after_update AFTER UPDATE OF name, city ON race BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, city) VALUES ('delete', old.id, old.name, old.city);
+        INSERT INTO {SEARCH_TABLE}(rowid, name, city) VALUES (new.id, new.name, new.city);
+    END
+    """,
+)
+
+
+def create_search_index(connection: Connection) -> None:
+    """Create the FTS5 table and its triggers if missing, indexing existing races on creation."""
+    exists: bool = (
+        connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": SEARCH_TABLE}
+        ).first()
+        is not None
+    )
+    for statement in SEARCH_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        rebuild_search_index(connection)
+
+
+def rebuild_search_index(connection: Connection) -> None:
+    """Rebuild the whole FTS5 index from the race table."""
+    connection.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+
+
+@event.listens_for(RaceDAO.__table__, "after_drop")
+def _drop_search_index(target, connection: Connection, **kw) -> None:
+    """Drop the index together with the race table so it never points to stale rowids."""
+    connection.execute(text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
@@ -0,0 +1,125 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Summary table of the live races per month, per city and per distance range.
+race_stats holds one counter per (dimension, bucket). Triggers move a race between
+buckets on every insert, update, soft delete and delete, whichever code path performs
+them, so dashboards read a few hundred counters instead of scanning the race table.
+"""
+from sqlalchemy import Connection, Row, event, text
+
+from app.models.races import RaceDAO
+
+STATS_TABLE = "race_stats"
+
+# Lower bound (meters) and label of each distance range, in ascending order
+DISTANCE_BUCKETS: tuple[tuple[int, str], ...] = (
+    (0, "< 5 km"),
+    (5000, "5-10 km"),
+    (10000, "10-21 km"),
+    (21097, "Mezza maratona"),
+    (42195, "Maratona e oltre"),
+)
+
+# Dimension -> SQL bucket of a race row ({row} is "new", "old" or "race")
+DIMENSIONS: dict[str, str] = {
+    "month": "strftime('%Y-%m', {row}.time)",
+    "city": "{row}.city",
+    "distance": "CASE "
+    + " ".join(f"WHEN {{row}}.distance >= {bound} THEN {bound}" for bound, _ in reversed(DISTANCE_BUCKETS[1:]))
+    + " ELSE 0 END",
+}
+
+
+def _add_sql(row: str) -> str:
+    """Statements counting a race row in its buckets."""
+    return "\n".join(
+        f"INSERT INTO {STATS_TABLE} (dimension, bucket, races) VALUES ('{dimension}', {bucket.format(row=row)}, 1) "
+        "ON CONFLICT (dimension, bucket) DO UPDATE SET races = races + 1;"
+        for dimension, bucket in DIMENSIONS.items()
+    )
+
+
+def _remove_sql(row: str) -> str:
+    """Statements uncounting a race row from its buckets, dropping the buckets left empty."""
+    statements: list[str] = []
+    for dimension, bucket in DIMENSIONS.items():
+        where: str = f"WHERE dimension = '{dimension}' AND bucket = {bucket.format(row=row)}"
+        statements.append(f"UPDATE {STATS_TABLE} SET races = races - 1 {where};")
+        statements.append(f"DELETE FROM {STATS_TABLE} {where} AND races <= 0;")
+    return "\n".join(statements)
+
+
+STATS_DDL: tuple[str, ...] = (
+    f"""
+    CREATE TABLE IF NOT EXISTS {STATS_TABLE} (
+        dimension TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        races INTEGER NOT NULL,
+        PRIMARY KEY (dimension, bucket)
+    ) WITHOUT ROWID
+    """,
+    # Tombstones (deleted_at set) are not counted: soft deletes and compaction keep the counters right
+    f"""
+    CREATE TRIGGER IF NOT EXISTS race_stats_after_insert AFTER INSERT ON race WHEN new.deleted_at IS NULL BEGIN
+        {_add_sql("new")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS race_stats_after_delete AFTER DELETE ON race WHEN old.deleted_at IS NULL BEGIN
+        {_remove_sql("old")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS race_stats_after_update_old AFTER UPDATE OF time, city, distance, deleted_at ON race
+    WHEN old.deleted_at IS NULL BEGIN
+        {_remove_sql("old")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS race_stats_after_update_new AFTER UPDATE OF time, city, distance, deleted_at ON race
+    WHEN new.deleted_at IS NULL BEGIN
+        {_add_sql("new")}
+    END
+    """,
+)
+
+
+def create_stats_table(connection: Connection) -> None:
+    """Create the summary table and its triggers if missing, counting existing races on creation."""
+    exists: bool = (
+        connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": STATS_TABLE}
+        ).first()
+        is not None
+    )
+    for statement in STATS_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        rebuild_stats(connection)
+
+
+def rebuild_stats(connection: Connection) -> None:
+    """Recount every bucket from the race table (one GROUP BY per dimension)."""
+    connection.execute(text(f"DELETE FROM {STATS_TABLE}"))
+    for dimension, bucket in DIMENSIONS.items():
+        connection.execute(
+            text(
+                f"INSERT INTO {STATS_TABLE} (dimension, bucket, races) "
+                f"SELECT '{dimension}', {bucket.format(row='race')}, COUNT(*) FROM race "
+                "WHERE race.deleted_at IS NULL GROUP BY 2"
+            )
+        )
+
+
+def read_stats(connection: Connection) -> list[Row]:
+    """Return every (dimension, bucket, races) counter."""
+    return list(connection.execute(text(f"SELECT dimension, bucket, races FROM {STATS_TABLE}")))
+
+
+@event.listens_for(RaceDAO.__table__, "after_drop")
+def _drop_stats_table(target, connection: Connection, **kw) -> None:
+    """Drop the summary table together with the race table, so a recreated table starts from empty counters."""
+    connection.execute(text(f"DROP TABLE IF EXISTS {STATS_TABLE}"))
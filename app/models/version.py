@@ -0,0 +1,132 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Data version and change tracking of the race table.
+race_version holds a single row with a counter and the time of the last change.
+Triggers bump both on every insert, update and delete of a race, whichever code
+path performs them, and stamp the written race with the new counter value
+(revision) and the time of the write (updated_at). Revisions are assigned while
+SQLite holds the write lock, so they grow in commit order and "revision > N"
+selects exactly the races changed since a client saw version N.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import Connection, event, text
+
+from app.models.races import RaceDAO
+
+VERSION_TABLE = "race_version"
+
+# Seconds since the Unix epoch with sub-second precision (unixepoch('subsec') needs SQLite 3.42)
+_NOW_SQL = "(julianday('now') - 2440587.5) * 86400.0"
+# Current UTC time in the text format SQLAlchemy uses for DateTime columns
+_NOW_DATETIME_SQL = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+# Also run by the triggers of tables whose changes alter what is rendered from the races (e.g. link_check)
+BUMP_VERSION_SQL = f"UPDATE {VERSION_TABLE} SET version = version + 1, last_modified = {_NOW_SQL} WHERE id = 1;"
+_STAMP_RACE_SQL = (
+    f"UPDATE race SET revision = (SELECT version FROM {VERSION_TABLE} WHERE id = 1), "
+    f"updated_at = {_NOW_DATETIME_SQL} WHERE id = new.id;"
+)
+
+# Columns whose changes are published; stamping revision/updated_at must not fire the trigger again
+TRACKED_COLUMNS: tuple[str, ...] = ("name", "time", "city", "distance", "website", "deleted_at")
+
+# Triggers of earlier releases, which only bumped the version
+LEGACY_TRIGGERS: tuple[str, ...] = (
+    "race_version_after_insert",
+    "race_version_after_update",
+    "race_version_after_delete",
+)
+
+VERSION_DDL: tuple[str, ...] = (
+    f"""
+    CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL,
+        last_modified REAL NOT NULL,
+        compacted_revision INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    f"INSERT OR IGNORE INTO {VERSION_TABLE} (id, version, last_modified) VALUES (1, 1, {_NOW_SQL})",
+)
+
+TRIGGER_DDL: tuple[str, ...] = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS race_changes_after_insert AFTER INSERT ON race BEGIN
+        {BUMP_VERSION_SQL}
+        {_STAMP_RACE_SQL}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS race_changes_after_update AFTER UPDATE OF {", ".join(TRACKED_COLUMNS)} ON race BEGIN
+        {BUMP_VERSION_SQL}
+        {_STAMP_RACE_SQL}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS race_changes_after_delete AFTER DELETE ON race BEGIN
+        {BUMP_VERSION_SQL}
+    END
+    """,
+)
+
+VERSION_SQL = text(f"SELECT version, last_modified FROM {VERSION_TABLE} WHERE id = 1")
+
+
+def create_version_table(connection: Connection) -> None:
+    """
+    Create the version table, its row and the race triggers if missing.
+
+    Upgrades databases of earlier releases: races written before change tracking get
+    their id as revision (and the upgrade time as updated_at), then the counter is
+    moved past them so new revisions never collide.
+    """
+    for statement in VERSION_DDL:
+        connection.execute(text(statement))
+    columns: set[str] = {row.name for row in connection.execute(text(f"PRAGMA table_info({VERSION_TABLE})"))}
+    if "compacted_revision" not in columns:
+        connection.execute(
+            text(f"ALTER TABLE {VERSION_TABLE} ADD COLUMN compacted_revision INTEGER NOT NULL DEFAULT 0")
+        )
+    for trigger in LEGACY_TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+
+    # Backfill before creating the triggers, which would otherwise stamp every row one by one
+    connection.execute(
+        text(f"UPDATE race SET revision = id, updated_at = {_NOW_DATETIME_SQL} WHERE revision = 0 OR revision IS NULL")
+    )
+    connection.execute(
+        text(
+            f"UPDATE {VERSION_TABLE} SET version = MAX(version, (SELECT IFNULL(MAX(revision), 0) FROM race)) "
+            "WHERE id = 1"
+        )
+    )
+    for statement in TRIGGER_DDL:
+        connection.execute(text(statement))
+
+
+def read_data_version(connection: Connection) -> tuple[int, datetime]:
+    """Return the (version, last modified time in UTC) of the race table."""
+    row = connection.execute(VERSION_SQL).one()
+    return row.version, datetime.fromtimestamp(row.last_modified, tz=timezone.utc)
+
+
+def read_compacted_revision(connection: Connection) -> int:
+    """Return the highest revision of the tombstones purged so far (0 if none)."""
+    return connection.execute(text(f"SELECT compacted_revision FROM {VERSION_TABLE} WHERE id = 1")).scalar_one()
+
+
+def record_compaction(connection: Connection, revision: int) -> None:
+    """Remember that tombstones up to revision have been purged."""
+    connection.execute(
+        text(f"UPDATE {VERSION_TABLE} SET compacted_revision = MAX(compacted_revision, :revision) WHERE id = 1"),
+        {"revision": revision},
+    )
+
+
+@event.listens_for(RaceDAO.__table__, "after_drop")
+def _drop_version_table(target, connection: Connection, **kw) -> None:
+    """Drop the version table together with the race table, so a recreated table starts from a fresh row."""
+    connection.execute(text(f"DROP TABLE IF EXISTS {VERSION_TABLE}"))
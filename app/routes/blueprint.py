@@ -2,22 +2,126 @@
 # Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
 # Licensed under the MIT License. See LICENSE.md for details.
 # -----------------------------------------------------------------------------
+from collections.abc import Callable
+from functools import cache
+from typing import Any
+
 from flask import Blueprint
 
+from app.controllers.api import RaceApiController
+from app.controllers.metrics import MetricsController
 from app.controllers.races import RaceController
+from app.core.metrics import end_request_metrics, record_request_metrics, start_request_metrics
 
 races_blueprint: Blueprint = Blueprint(name="races_blueprint", import_name=__name__)
-controller: RaceController = RaceController()
 
-# GET routes
-races_blueprint.add_url_rule(rule="/", view_func=controller.get_races, methods=["GET"])
-races_blueprint.add_url_rule(rule="/races", view_func=controller.get_races, methods=["GET"])
+
+# Controllers (and the services they own) are built on the first request, not at import
+@cache
+def get_controller() -> RaceController:
+    return RaceController()
+
+
+@cache
+def get_api_controller() -> RaceApiController:
+    return RaceApiController()
+
+
+@cache
+def get_metrics_controller() -> MetricsController:
+    return MetricsController()
+
+
+def lazy_view(get_instance: Callable[[], Any], method_name: str) -> Callable[..., Any]:
+    """Return a view calling get_instance().method_name, named after the method so endpoints keep their names."""
+
+    def view(**kwargs: Any) -> Any:
+        return getattr(get_instance(), method_name)(**kwargs)
+
+    view.__name__ = method_name
+    return view
+
+
+# Request latency and in-flight metrics for every route below (no-ops when metrics are disabled)
+races_blueprint.before_request(start_request_metrics)
+races_blueprint.after_request(record_request_metrics)
+races_blueprint.teardown_request(end_request_metrics)
+
+# GET routes (both rules share the "get_races" endpoint, so they need the same view function)
+get_races_view: Callable[..., Any] = lazy_view(get_controller, "get_races")
+races_blueprint.add_url_rule(rule="/", view_func=get_races_view, methods=["GET"])
+races_blueprint.add_url_rule(rule="/races", view_func=get_races_view, methods=["GET"])
+
+# Whole calendar as races.json / races.ics (published snapshots when enabled)
+races_blueprint.add_url_rule(
+    rule="/races.<any(json, ics):export_format>", view_func=lazy_view(get_controller, "get_calendar"), methods=["GET"]
+)
+
+# Statistics dashboard
+races_blueprint.add_url_rule(rule="/stats", view_func=lazy_view(get_controller, "get_stats"), methods=["GET"])
 
 # Create / Update / Delete
-races_blueprint.add_url_rule(rule="/create-race", view_func=controller.create_race, methods=["GET", "POST"])
+races_blueprint.add_url_rule(
+    rule="/create-race", view_func=lazy_view(get_controller, "create_race"), methods=["GET", "POST"]
+)
 races_blueprint.add_url_rule(
     rule="/update-race/<int:race_id>",
-    view_func=controller.update_race,
+    view_func=lazy_view(get_controller, "update_race"),
     methods=["GET", "POST"],
 )
-races_blueprint.add_url_rule(rule="/delete-race/<int:race_id>", view_func=controller.delete_race, methods=["GET"])
+races_blueprint.add_url_rule(
+    rule="/delete-race/<int:race_id>", view_func=lazy_view(get_controller, "delete_race"), methods=["GET"]
+)
+
+# JSON API
+races_blueprint.add_url_rule(
+    rule="/api/races/search", view_func=lazy_view(get_api_controller, "search_races"), methods=["GET"]
+)
+races_blueprint.add_url_rule(
+    rule="/api/races/stats", view_func=lazy_view(get_api_controller, "get_race_stats"), methods=["GET"]
+)
+races_blueprint.add_url_rule(
+    rule="/api/races/nearby", view_func=lazy_view(get_api_controller, "get_races_nearby"), methods=["GET"]
+)
+races_blueprint.add_url_rule(
+    rule="/api/races/duplicates", view_func=lazy_view(get_api_controller, "find_duplicates"), methods=["POST"]
+)
+races_blueprint.add_url_rule(
+    rule="/api/links", view_func=lazy_view(get_api_controller, "get_link_checks"), methods=["GET"]
+)
+races_blueprint.add_url_rule(
+    rule="/api/races/import", view_func=lazy_view(get_api_controller, "import_races"), methods=["POST"]
+)
+races_blueprint.add_url_rule(
+    rule="/api/races/batch", view_func=lazy_view(get_api_controller, "batch_races"), methods=["POST"]
+)
+races_blueprint.add_url_rule(
+    rule="/api/races/export", view_func=lazy_view(get_api_controller, "export_races"), methods=["GET"]
+)
+races_blueprint.add_url_rule(
+    rule="/api/races/changes", view_func=lazy_view(get_api_controller, "get_changes"), methods=["GET"]
+)
+races_blueprint.add_url_rule(
+    rule="/api/races/changes/stream", view_func=lazy_view(get_api_controller, "stream_changes"), methods=["GET"]
+)
+
+# Background jobs
+races_blueprint.add_url_rule(rule="/api/jobs", view_func=lazy_view(get_api_controller, "submit_job"), methods=["POST"])
+races_blueprint.add_url_rule(rule="/api/jobs", view_func=lazy_view(get_api_controller, "list_jobs"), methods=["GET"])
+races_blueprint.add_url_rule(
+    rule="/api/jobs/<int:job_id>", view_func=lazy_view(get_api_controller, "get_job"), methods=["GET"]
+)
+races_blueprint.add_url_rule(
+    rule="/api/jobs/<int:job_id>/cancel", view_func=lazy_view(get_api_controller, "cancel_job"), methods=["POST"]
+)
+races_blueprint.add_url_rule(
+    rule="/api/jobs/<int:job_id>/retry", view_func=lazy_view(get_api_controller, "retry_job"), methods=["POST"]
+)
+races_blueprint.add_url_rule(
+    rule="/api/jobs/<int:job_id>/file", view_func=lazy_view(get_api_controller, "get_job_file"), methods=["GET"]
+)
+
+# Monitoring
+races_blueprint.add_url_rule(
+    rule="/metrics", view_func=lazy_view(get_metrics_controller, "get_metrics"), methods=["GET"]
+)
@@ -0,0 +1,273 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Pre-fork multi-process WSGI server for production.
+The master process binds the listening socket and forks the workers; each worker
+builds its own Flask app and database engine after the fork and serves requests on
+a fixed-size thread pool. SIGTERM/SIGINT stop gracefully, SIGHUP replaces the
+workers one generation at a time (reloading config.yml), crashed workers are respawned.
+
+Usage:
+    python -m app.server
+    python -m app.server --workers 4 --threads 16 --port 8000
+"""
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from types import FrameType
+from typing import Any
+
+from flask.app import Flask
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from app.core import get_settings, settings
+from app.core.log import LoggerManager, setup_logging
+
+# How often the master checks for dead workers (seconds); signals wake it up earlier
+MASTER_TICK = 0.5
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    Werkzeug WSGI server handling connections on a fixed-size thread pool.
+
+    Unlike werkzeug's ThreadedWSGIServer, which starts a thread per connection, at most
+    threads connections are served at once: while every thread is busy the server stops
+    accepting, so further clients wait in the listen backlog instead of an unbounded queue
+    in the worker. Idle keep-alive connections are closed after keepalive seconds.
+    """
+
+    multithread = True
+
+    def __init__(self, app: Flask, listen_socket: socket.socket, threads: int, keepalive: float) -> None:
+        handler: type[WSGIRequestHandler] = type(
+            "KeepAliveRequestHandler", (WSGIRequestHandler,), {"protocol_version": "HTTP/1.1", "timeout": keepalive}
+        )
+        host, port = listen_socket.getsockname()[:2]
+        super().__init__(host, port, app, handler=handler, fd=listen_socket.fileno())
+        self.pool: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="http")
+        self.free_threads: threading.BoundedSemaphore = threading.BoundedSemaphore(threads)
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        # Block the accept loop until a pool thread is free
+        self.free_threads.acquire()
+        try:
+            self.pool.submit(self._process_request_in_pool, request, client_address)
+        except BaseException:
+            self.free_threads.release()
+            raise
+
+    def _process_request_in_pool(self, request: Any, client_address: Any) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.free_threads.release()
+
+
+class PreforkServer:
+    """
+    Master process of the production server.
+
+    Usage:
+        PreforkServer(app_factory=create_app, host="0.0.0.0", port=5001, workers=4).run()
+    """
+
+    def __init__(
+        self,
+        app_factory: Callable[[], Flask],
+        host: str,
+        port: int,
+        workers: int = 2,
+        threads: int = 8,
+        keepalive: float = 5.0,
+        backlog: int = 2048,
+        graceful_timeout: float = 30.0,
+    ) -> None:
+        self.app_factory: Callable[[], Flask] = app_factory
+        self.host: str = host
+        self.port: int = port
+        self.workers: int = workers
+        self.threads: int = threads
+        self.keepalive: float = keepalive
+        self.backlog: int = backlog
+        self.graceful_timeout: float = graceful_timeout
+        self.worker_pids: set[int] = set()
+        self.listen_socket: socket.socket | None = None
+        self._stopping: bool = False
+        self._reload_requested: bool = False
+        self.logger = LoggerManager.get_logger(self.__class__.__name__)
+
+    def run(self) -> None:
+        """Bind the socket, start the workers and supervise them until stopped."""
+        self.listen_socket = socket.create_server((self.host, self.port), backlog=self.backlog)
+        self.listen_socket.set_inheritable(True)
+        self.port = self.listen_socket.getsockname()[1]
+        self.logger.info(
+            f"Listening on http://{self.host}:{self.port} with {self.workers} workers x {self.threads} threads "
+            f"(pid {os.getpid()})"
+        )
+        if not hasattr(os, "fork"):
+            self.logger.warning("os.fork is not available: serving from a single process")
+            self._serve(self.listen_socket)
+            return
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+        for _ in range(self.workers):
+            self._spawn_worker()
+
+        try:
+            while not self._stopping:
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self._restart_workers()
+                self._reap_workers(respawn=True)
+                time.sleep(MASTER_TICK)
+        finally:
+            self._stop_workers(set(self.worker_pids))
+            self.listen_socket.close()
+            self.logger.info("Server stopped")
+
+    def _handle_stop(self, signum: int, frame: FrameType | None) -> None:
+        self._stopping = True
+
+    def _handle_reload(self, signum: int, frame: FrameType | None) -> None:
+        self._reload_requested = True
+
+    def _spawn_worker(self) -> int:
+        """Fork a worker process and return its pid."""
+        assert self.listen_socket is not None  # nosec B101
+        pid: int = os.fork()
+        if pid == 0:
+            exit_code: int = 0
+            try:
+                self._run_worker(self.listen_socket)
+            except BaseException as e:
+                self.logger.exception(f"Worker {os.getpid()} crashed: {e}")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self.worker_pids.add(pid)
+        self.logger.info(f"Started worker {pid}")
+        return pid
+
+    def _run_worker(self, listen_socket: socket.socket) -> None:
+        """Worker entry point: restore signal handlers, then serve until SIGTERM."""
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C reaches the master, which stops the workers
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        self._serve(listen_socket)
+
+    def _serve(self, listen_socket: socket.socket) -> None:
+        """Build the app (and its engine) in this process and serve until SIGTERM."""
+        app: Flask = self.app_factory()
+        app.debug = False  # never run the debugger or propagate exceptions in production
+        server: PooledWSGIServer = PooledWSGIServer(app, listen_socket, threads=self.threads, keepalive=self.keepalive)
+
+        def stop(signum: int, frame: FrameType | None) -> None:
+            # shutdown() blocks until serve_forever returns, so it must run on another thread
+            threading.Thread(target=server.shutdown, name="shutdown", daemon=True).start()
+
+        signal.signal(signal.SIGTERM, stop)
+        server.serve_forever(poll_interval=MASTER_TICK)
+        server.pool.shutdown(wait=True)
+        server.server_close()
+
+    def _reap_workers(self, respawn: bool) -> None:
+        """Collect exited workers, respawning them unless the server is stopping."""
+        for pid in list(self.worker_pids):
+            try:
+                waited_pid, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                waited_pid, status = pid, 0
+            if waited_pid == 0:
+                continue
+            self.worker_pids.discard(pid)
+            if respawn and not self._stopping:
+                self.logger.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}: respawning")
+                self._spawn_worker()
+
+    def _restart_workers(self) -> None:
+        """Graceful restart: start a new generation of workers, then stop the old one."""
+        self.logger.info("Reloading configuration and restarting workers")
+        get_settings.cache_clear()
+        old_pids: set[int] = set(self.worker_pids)
+        self.worker_pids.clear()
+        for _ in range(self.workers):
+            self._spawn_worker()
+        self._stop_workers(old_pids)
+
+    def _stop_workers(self, pids: set[int]) -> None:
+        """Send SIGTERM, wait up to graceful_timeout for the workers to exit, then SIGKILL them."""
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline: float = time.monotonic() + self.graceful_timeout
+        remaining: set[int] = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                try:
+                    if os.waitpid(pid, os.WNOHANG)[0] != 0:
+                        remaining.discard(pid)
+                except ChildProcessError:
+                    remaining.discard(pid)
+            time.sleep(0.05)
+        for pid in remaining:
+            self.logger.warning(f"Worker {pid} did not stop within {self.graceful_timeout}s: killing it")
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=None, help="Bind address (default: app.host)")
+    parser.add_argument("--port", type=int, default=None, help="Port, 0 for any free port (default: app.port)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: app.workers)")
+    parser.add_argument("--threads", type=int, default=None, help="Threads per worker (default: app.threads)")
+    args = parser.parse_args()
+
+    setup_logging(
+        level=settings.log.level,
+        console=settings.log.console,
+        mode=settings.log.mode,
+        serialize=settings.log.serialize,
+        caller_info=settings.log.caller_info,
+    )
+    workers: int = args.workers or settings.app.workers
+    if workers > 1:
+        logger = LoggerManager.get_logger("PreforkServer")
+        if settings.metrics.enabled and not settings.metrics.multiprocess_dir:
+            logger.warning("metrics.multiprocess_dir is not set: /metrics only reports the worker serving the scrape")
+        if settings.cache.enabled and settings.cache.backend == "memory":
+            logger.info("cache.backend is 'memory': every worker loads and caches its own copy of the races")
+
+    # Importing races is side-effect free: apps and engines are only created in the workers
+    from races import create_app
+
+    PreforkServer(
+        app_factory=create_app,
+        host=args.host or settings.app.host,
+        port=settings.app.port if args.port is None else args.port,
+        workers=workers,
+        threads=args.threads or settings.app.threads,
+        keepalive=settings.app.keepalive,
+        backlog=settings.app.backlog,
+        graceful_timeout=settings.app.graceful_timeout,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
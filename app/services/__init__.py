@@ -2,9 +2,54 @@
 # Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
 # Licensed under the MIT License. See LICENSE.md for details.
 # -----------------------------------------------------------------------------
-from .races import RaceService, RaceNotFoundError
+from .cache import CacheBackend, MemoryCacheBackend, RaceCache, get_race_cache
+from .calendar import CalendarService
+from .changes import ChangeFeed, ChangesExpiredError
+from .duplicates import DuplicateDetector
+from .exports import RaceExporter
+from .imports import RaceImporter
+from .jobs import (
+    JobCancelledError,
+    JobContext,
+    JobNotFoundError,
+    JobRunner,
+    JobService,
+    JobStateError,
+    configure_jobs,
+    get_job_runner,
+)
+from .links import LinkChecker
+from .queries import InvalidCursorError, RaceQueryBuilder
+from .races import DEFAULT_PAGE_SIZE, DuplicateRaceError, RaceNotFoundError, RaceService
+from .snapshots import SnapshotPublisher, configure_snapshots, get_snapshot_publisher
 
 __all__ = [
+    "CacheBackend",
+    "CalendarService",
+    "ChangeFeed",
+    "ChangesExpiredError",
+    "DEFAULT_PAGE_SIZE",
+    "DuplicateDetector",
+    "DuplicateRaceError",
+    "InvalidCursorError",
+    "JobCancelledError",
+    "JobContext",
+    "JobNotFoundError",
+    "JobRunner",
+    "JobService",
+    "JobStateError",
+    "LinkChecker",
+    "MemoryCacheBackend",
+    "RaceCache",
+    "RaceExporter",
+    "RaceImporter",
+    "RaceQueryBuilder",
     "RaceService",
     "RaceNotFoundError",
+    "SnapshotPublisher",
+    "configure_jobs",
+    "configure_snapshots",
+    "get_job_runner",
+    "get_race_cache",
+    "get_snapshot_publisher",
 ]
@@ -0,0 +1,243 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Versioned read-through cache for RaceService.
+Every key embeds the current data version; writes bump the version, so all entries
+computed from older data become unreachable at once instead of expiring on a timer.
+Keys also embed the database data version given by the caller, which the triggers bump
+on writes of any process (other workers, CLI commands, the job runner).
+"""
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Protocol, TypeVar
+
+from app.core import settings
+from app.core.config import CacheConfig
+from app.core.log import LoggerManager
+from app.core.metrics import CACHE_HITS, CACHE_MISSES, CACHE_VERSION, registry
+
+T = TypeVar("T")
+
+# Sentinel returned by backends for absent or expired keys (None is a legitimate value)
+MISSING: Any = object()
+
+
+class CacheBackend(Protocol):
+    """
+    Storage used by RaceCache.
+
+    A shared backend (e.g. Redis or memcached) implements this protocol and is selected
+    with cache.backend: "package.module:ClassName" in config.yml; it is built with the
+    CacheConfig instance as only argument. Sharing the entries lets a worker reuse what
+    the others loaded; writes of other processes are seen anyway, through the database
+    data version in the keys.
+    """
+
+    def get(self, key: str) -> Any:
+        """Return the value stored under key, or MISSING."""
+        ...
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key."""
+        ...
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        ...
+
+    def get_version(self) -> int:
+        """Return the current data version."""
+        ...
+
+    def bump_version(self) -> int:
+        """Increment and return the data version."""
+        ...
+
+
+class MemoryCacheBackend:
+    """Thread-safe in-process LRU with a per-entry time-to-live."""
+
+    def __init__(self, config: CacheConfig) -> None:
+        self.max_entries: int = config.max_entries
+        self.ttl_seconds: float = config.ttl_seconds
+        self.evictions: int = 0
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._version: int = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry: tuple[float, Any] | None = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_version(self) -> int:
+        return self._version
+
+    def bump_version(self) -> int:
+        with self._lock:
+            self._version += 1
+            # Entries of older versions can never be hit again: free them right away
+            self._entries.clear()
+            return self._version
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Snapshot of the cache counters."""
+
+    hits: int
+    misses: int
+    version: int
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fraction of lookups served from the cache."""
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class RaceCache:
+    """
+    Read-through cache keyed on (data version, database data version, namespace, key).
+
+    Cached values are shared between callers and must be treated as read-only.
+
+    Usage:
+        races = cache.get_or_load("all_races", "", loader=self._load_all_races, version=data_version)
+        ...
+        cache.invalidate()  # after every committed write
+    """
+
+    def __init__(self, backend: CacheBackend, enabled: bool = True) -> None:
+        self.backend: CacheBackend = backend
+        self.enabled: bool = enabled
+        self.hits: int = 0
+        self.misses: int = 0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, namespace: str, key: str, loader: Callable[[], T], version: int | None = None) -> T:
+        """
+        Return the cached value for (namespace, key), calling loader on a miss.
+
+        version is the database data version read before calling this method: entries
+        loaded at an older version are never returned, even if the write that bumped it
+        was made by another process and did not invalidate this cache.
+        """
+        if not self.enabled:
+            return loader()
+
+        full_key: str = self._full_key(namespace, key, version)
+        value: Any = self.backend.get(full_key)
+        if value is not MISSING:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        value = loader()
+        self.backend.set(full_key, value)
+        return value
+
+    def get(self, namespace: str, key: str) -> Any:
+        """Return the cached value for (namespace, key), or MISSING (always MISSING when disabled)."""
+        if not self.enabled:
+            return MISSING
+        value: Any = self.backend.get(self._full_key(namespace, key))
+        with self._lock:
+            if value is MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        """
+        Store a value computed by the caller, e.g. once a streamed response has been fully generated.
+
+        Unlike with get_or_load(), a write during the computation does not make the value
+        unreachable: put the data version it was computed from in the key.
+        """
+        if self.enabled:
+            self.backend.set(self._full_key(namespace, key), value)
+
+    def _full_key(self, namespace: str, key: str, version: int | None = None) -> str:
+        return f"{self.backend.get_version()}:{'' if version is None else version}:{namespace}:{key}"
+
+    def invalidate(self) -> int:
+        """Bump the data version, invalidating every cached entry. Returns the new version."""
+        return self.backend.bump_version()
+
+    def stats(self) -> CacheStats:
+        """Return the hit/miss counters and the current data version."""
+        with self._lock:
+            return CacheStats(hits=self.hits, misses=self.misses, version=self.backend.get_version())
+
+
+def _build_backend(config: CacheConfig) -> CacheBackend:
+    """Instantiate the backend named in the configuration."""
+    if config.backend == "memory":
+        return MemoryCacheBackend(config)
+    module_name, _, class_name = config.backend.partition(":")
+    backend_class: type[CacheBackend] = getattr(importlib.import_module(module_name), class_name)
+    return backend_class(config)  # type: ignore[call-arg]
+
+
+_race_cache: RaceCache | None = None
+_race_cache_lock = threading.Lock()
+
+
+def get_race_cache() -> RaceCache:
+    """Return the process-wide RaceCache, building it from settings on first use."""
+    global _race_cache
+    if _race_cache is None:
+        with _race_cache_lock:
+            if _race_cache is None:
+                config: CacheConfig = settings.cache
+                _race_cache = RaceCache(backend=_build_backend(config), enabled=config.enabled)
+                LoggerManager.get_logger("RaceCache").info(
+                    f"Race cache enabled={config.enabled} backend={config.backend} "
+                    f"max_entries={config.max_entries} ttl={config.ttl_seconds}s"
+                )
+    return _race_cache
+
+
+def _collect_cache_metrics() -> None:
+    """Copy the process-wide RaceCache counters into the metrics registry."""
+    if _race_cache is None:
+        return
+    stats: CacheStats = _race_cache.stats()
+    CACHE_HITS.set_total(stats.hits)
+    CACHE_MISSES.set_total(stats.misses)
+    CACHE_VERSION.set(stats.version)
+
+
+registry.add_collector(_collect_cache_metrics)
@@ -0,0 +1,77 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Calendar feeds of the races (iCalendar for calendar apps, JSON) for any filter combination.
+Calendar apps poll their subscription URLs, many clients with the same filters. A feed is
+streamed while it is generated and stored in the race cache under the data version it was
+generated from, so every poll until the next write gets the stored copy, and requests
+arriving while a feed is being generated wait for it instead of generating it again.
+"""
+import json
+import threading
+from collections.abc import Iterator
+from typing import Any
+
+from app.core.log import LoggerManager
+from app.dtos import DataVersion, RaceFilter
+from app.services.cache import MISSING, RaceCache, get_race_cache
+from app.services.exports import ExportFormat, RaceExporter
+
+CACHE_NAMESPACE = "calendar"
+# Longest a request waits for another request generating the same feed (seconds)
+GENERATION_WAIT_SECONDS = 5.0
+
+
+class CalendarService:
+    """
+    Race feeds cached per (data version, format, filters).
+
+    Usage:
+        feed = CalendarService().get_feed("ics", filters=filters, version=service.get_data_version())
+        # str when cached, otherwise an iterator streaming the feed as it is generated
+    """
+
+    def __init__(self, cache: RaceCache | None = None, exporter: RaceExporter | None = None) -> None:
+        self.cache: RaceCache = cache or get_race_cache()
+        self.exporter: RaceExporter = exporter or RaceExporter()
+        # Cache key -> event set when the request generating that feed is done
+        self._generating: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.logger = LoggerManager.get_logger(self.__class__.__name__)
+
+    def get_feed(self, export_format: ExportFormat, filters: RaceFilter, version: DataVersion) -> str | Iterator[str]:
+        """Return the cached feed, or an iterator generating (and then caching) it chunk by chunk."""
+        key: str = f"{version.version}:{export_format}:{json.dumps(filters.to_query_args(), sort_keys=True)}"
+        feed: Any = self.cache.get(CACHE_NAMESPACE, key)
+        if feed is not MISSING:
+            return feed
+        with self._lock:
+            pending: threading.Event | None = self._generating.get(key)
+        if pending is not None:
+            pending.wait(timeout=GENERATION_WAIT_SECONDS)
+            feed = self.cache.get(CACHE_NAMESPACE, key)
+            if feed is not MISSING:
+                return feed
+        return self._generate(key, export_format, filters)
+
+    def _generate(self, key: str, export_format: ExportFormat, filters: RaceFilter) -> Iterator[str]:
+        """Yield the feed from the exporter and cache it once complete (not if the client went away)."""
+        # Registered on the first chunk: a response that is never iterated must not leave waiters behind
+        with self._lock:
+            owner: bool = key not in self._generating
+            if owner:
+                self._generating[key] = threading.Event()
+        chunks: list[str] = []
+        try:
+            for chunk in self.exporter.iter_export(export_format=export_format, filters=filters):
+                chunks.append(chunk)
+                yield chunk
+            feed: str = "".join(chunks)
+            self.cache.set(CACHE_NAMESPACE, key, feed)
+            self.logger.debug(f"Cached {export_format} feed {key} ({len(feed)} characters)")
+        finally:
+            if owner:
+                with self._lock:
+                    self._generating.pop(key).set()
@@ -0,0 +1,267 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Incremental change feed over the race table.
+Every write stamps the race with a revision (see app.models.version). Clients keep the
+cursor of the last page they received and ask for the races written after it, tombstones
+of deleted races included, so sync traffic grows with the number of changes, not with the
+table. Change streams (Server-Sent Events) push the same pages as they happen.
+
+Cursors are opaque to clients: "r<revision>" while syncing, "i<revision>.<start>" between
+the pages of an initial sync, which skips tombstones and carries the data version read
+when the sync started: the sync ends on a cursor at that version, so the changes made
+while it ran (deletes of races already sent included) are replayed afterwards.
+"""
+import json
+import threading
+import time
+from collections.abc import Callable, Iterator
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.core import settings
+from app.core.config import ChangesConfig
+from app.core.log import LoggerManager
+from app.core.metrics import DB_ERRORS, WRITES
+from app.dtos import ChangePage, RaceChange, RaceRow
+from app.models.races import RaceDAO
+from app.models.version import read_compacted_revision, read_data_version, record_compaction
+from app.services.queries import RACE_COLUMNS, InvalidCursorError
+
+# Milliseconds an EventSource waits before reconnecting after the server ends a stream
+STREAM_RETRY_MS = 3000
+# Seconds a client is asked to wait (Retry-After) when every change stream slot is taken
+STREAM_BUSY_RETRY_SECONDS = 30
+
+# Bumped by publish_changes(); streams wait on the condition instead of sleeping a full poll interval
+_changes = threading.Condition()
+_generation: int = 0
+# Called by publish_changes() after waking up the streams (e.g. the snapshot publisher)
+_listeners: list[Callable[[], None]] = []
+# Change streams open in this process; each one holds a request thread for up to stream_max_seconds
+_streams_lock = threading.Lock()
+_open_streams: int = 0
+
+
+def encode_change_cursor(revision: int, sync_start: int | None = None) -> str:
+    """Return the cursor of a position in the feed; sync_start is only given between initial sync pages."""
+    return f"r{revision}" if sync_start is None else f"i{revision}.{sync_start}"
+
+
+def decode_change_cursor(cursor: str | None) -> tuple[int, int | None]:
+    """
+    Return the (revision, initial sync start) of a cursor, the latter None outside initial syncs.
+
+    None starts an initial sync (its start is read by ChangeFeed.get_changes). Initial sync
+    cursors of earlier releases carry no start and replay every change. Raises InvalidCursorError.
+    """
+    if not cursor:
+        return 0, 0
+    revision, _, start = cursor[1:].partition(".")
+    if cursor[0] not in "ir" or not revision.isdigit() or (start and (cursor[0] == "r" or not start.isdigit())):
+        raise InvalidCursorError(f"Invalid change cursor '{cursor}'")
+    if cursor[0] == "r":
+        return int(revision), None
+    return int(revision), int(start or 0)
+
+
+class ChangesExpiredError(Exception):
+    """The requested cursor is older than the tombstones purged by compaction: the client must resync."""
+
+    pass
+
+
+def add_change_listener(listener: Callable[[], None]) -> None:
+    """Call listener after every publish_changes() of this process; it must return quickly."""
+    _listeners.append(listener)
+
+
+def remove_change_listener(listener: Callable[[], None]) -> None:
+    """Stop calling a listener added with add_change_listener()."""
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def publish_changes() -> None:
+    """Wake up the change streams and listeners of this process. Call after every committed write."""
+    global _generation
+    with _changes:
+        _generation += 1
+        _changes.notify_all()
+    for listener in list(_listeners):
+        listener()
+
+
+def wait_for_changes(generation: int, timeout: float) -> int:
+    """Wait up to timeout seconds for a publish_changes() after generation; return the current generation."""
+    with _changes:
+        if _generation == generation:
+            _changes.wait(timeout=timeout)
+        return _generation
+
+
+class ChangeFeed:
+    """
+    Races changed since a revision, as pages, as a Server-Sent Events stream, and tombstone compaction.
+
+    Usage:
+        page = ChangeFeed().get_changes(cursor=client_cursor)
+        for event in ChangeFeed().iter_events(cursor=client_cursor):
+            ...
+    """
+
+    def __init__(self, config: ChangesConfig | None = None) -> None:
+        self.db = db
+        self.config: ChangesConfig = config or settings.changes
+        self.logger = LoggerManager.get_logger(self.__class__.__name__)
+
+    def get_changes(self, cursor: str | None = None, limit: int | None = None) -> ChangePage:
+        """
+        Return the races written after the cursor, oldest change first.
+
+        Without a cursor, an initial sync starts: its pages only hold live races and its
+        last page returns a sync cursor at the data version read when the sync started, so
+        races deleted while it ran are replayed as tombstones. Raises InvalidCursorError for
+        a malformed cursor and ChangesExpiredError if tombstones after a sync cursor were
+        already compacted.
+        """
+        since, sync_start = decode_change_cursor(cursor)
+        initial: bool = sync_start is not None
+        limit = max(1, min(limit or self.config.page_size, self.config.max_page_size))
+        try:
+            connection = self.db.session.connection()
+            if not cursor:
+                sync_start = read_data_version(connection)[0]
+            compacted_revision: int = read_compacted_revision(connection)
+            if not initial and since < compacted_revision:
+                raise ChangesExpiredError(f"Changes after cursor '{cursor}' have been compacted")
+            statement = (
+                select(*RACE_COLUMNS, RaceDAO.revision, RaceDAO.updated_at, RaceDAO.deleted_at)
+                .where(RaceDAO.revision > since)
+                .order_by(RaceDAO.revision)
+                .limit(limit + 1)
+            )
+            if initial:
+                statement = statement.where(RaceDAO.deleted_at.is_(None))
+            rows = self.db.session.execute(statement).all()
+        except SQLAlchemyError as e:
+            DB_ERRORS.inc(operation="changes")
+            self.logger.error(f"SQLAlchemy error reading changes after cursor '{cursor}': {e}")
+            raise
+
+        changes: list[RaceChange] = [
+            RaceChange(
+                id=row.id,
+                revision=row.revision,
+                updated_at=row.updated_at,
+                deleted_at=row.deleted_at,
+                race=RaceRow._make(row[: len(RACE_COLUMNS)]) if row.deleted_at is None else None,
+            )
+            for row in rows[:limit]
+        ]
+        has_more: bool = len(rows) > limit
+        last_revision: int = changes[-1].revision if changes else since
+        if sync_start is not None and not has_more:
+            # The client holds every race live when the sync started; writes made since then are replayed
+            # from there (tombstones purged before the start never concerned it)
+            return ChangePage(cursor=encode_change_cursor(sync_start), changes=changes)
+        return ChangePage(
+            cursor=encode_change_cursor(last_revision, sync_start=sync_start), has_more=has_more, changes=changes
+        )
+
+    def acquire_stream_slot(self) -> bool:
+        """
+        Reserve one of the max_streams change streams of this process; False if all are open.
+
+        Every successful call must be paired with release_stream_slot() once the stream ends.
+        """
+        global _open_streams
+        with _streams_lock:
+            if _open_streams >= self.config.max_streams:
+                return False
+            _open_streams += 1
+            return True
+
+    def release_stream_slot(self) -> None:
+        """Free a change stream slot reserved with acquire_stream_slot()."""
+        global _open_streams
+        with _streams_lock:
+            _open_streams = max(0, _open_streams - 1)
+
+    def iter_events(self, cursor: str | None = None) -> Iterator[str]:
+        """
+        Yield Server-Sent Events: one "changes" event per page written after the cursor.
+
+        The data version is checked every stream_poll_seconds (writes of other workers)
+        and immediately after a write of this process. Each event id is the cursor to
+        resume from, which browsers send back as Last-Event-ID when they reconnect. The
+        stream ends after stream_max_seconds, and with a "reset" event if the cursor expired.
+        """
+        config: ChangesConfig = self.config
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
+        started: float = time.monotonic()
+        last_sent: float = started
+        generation: int = _generation
+        seen_version: int | None = None
+        while True:
+            try:
+                version, _ = read_data_version(self.db.session.connection())
+                while version != seen_version:
+                    page: ChangePage = self.get_changes(cursor=cursor)
+                    if page.changes or page.cursor != cursor:
+                        yield f"id: {page.cursor}\nevent: changes\ndata: {json.dumps(page.to_dict())}\n\n"
+                        last_sent = time.monotonic()
+                        cursor = page.cursor
+                    if not page.has_more:
+                        seen_version = version
+            except ChangesExpiredError as e:
+                yield f"event: reset\ndata: {json.dumps({'error': str(e)})}\n\n"
+                return
+            finally:
+                # Do not hold a pooled connection while waiting
+                self.db.session.close()
+
+            now: float = time.monotonic()
+            if now - started >= config.stream_max_seconds:
+                return
+            if now - last_sent >= config.stream_heartbeat_seconds:
+                yield ": keep-alive\n\n"
+                last_sent = now
+            timeout: float = min(config.stream_poll_seconds, config.stream_max_seconds - (now - started))
+            generation = wait_for_changes(generation=generation, timeout=timeout)
+
+    def compact_tombstones(self, older_than: timedelta | None = None) -> int:
+        """
+        Purge races deleted more than older_than ago (default: tombstone_retention_days) and return how many.
+
+        Clients whose cursor is older than the purged tombstones get ChangesExpiredError
+        and must start an initial sync again.
+        """
+        if older_than is None:
+            older_than = timedelta(days=self.config.tombstone_retention_days)
+        cutoff: datetime = datetime.now(timezone.utc) - older_than
+        expired = RaceDAO.deleted_at.is_not(None) & (RaceDAO.deleted_at < cutoff)
+        try:
+            purged_revision: int | None = self.db.session.execute(
+                select(func.max(RaceDAO.revision)).where(expired)
+            ).scalar_one()
+            if purged_revision is None:
+                return 0
+            purged: int = self.db.session.execute(delete(RaceDAO).where(expired)).rowcount  # type: ignore[attr-defined]
+            record_compaction(self.db.session.connection(), revision=purged_revision)
+            self.db.session.commit()
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            DB_ERRORS.inc(operation="compact")
+            self.logger.error(f"SQLAlchemy error compacting tombstones: {e}")
+            raise
+        WRITES.inc(purged, operation="compact")
+        self.logger.info(
+            f"Purged {purged} tombstones deleted before {cutoff:%Y-%m-%d %H:%M} (up to revision {purged_revision})"
+        )
+        return purged
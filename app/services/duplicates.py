@@ -0,0 +1,254 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Duplicate race detection.
+The same race is often listed twice, under different names, cities or start times. A
+race is only compared with a handful of candidates found through blocking keys, never
+with the whole table:
+
+- the races of the same day (ix_race_time), compared on the normalized website and city;
+- the races of the nearby days sharing most name trigrams (race_name_grams index).
+
+Candidates must have a similar distance: the courses of one event (10 km, 21 km) share
+name, day and website but are different races.
+"""
+import math
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.core import settings
+from app.core.config import DuplicatesConfig
+from app.core.log import LoggerManager
+from app.core.metrics import DB_ERRORS
+from app.dtos import DuplicateMatch, DuplicatePair, DuplicateReport, RaceRecord, RaceRow
+from app.models.duplicates import find_similar_names
+from app.models.races import RaceDAO
+from app.services.queries import RACE_COLUMNS
+
+# Races read per query (and between progress reports) by find_all_duplicates() with on_progress
+SCAN_PAGE_SIZE = 1000
+
+
+def name_grams(name: str) -> set[str]:
+    """Return the lowercase trigrams of a name, whitespace collapsed, as indexed by the trigram tokenizer."""
+    normalized: str = " ".join(name.lower().split())
+    if len(normalized) < 3:
+        return {normalized} if normalized else set()
+    return {normalized[i : i + 3] for i in range(len(normalized) - 2)}
+
+
+def name_similarity(grams: set[str], other: set[str]) -> float:
+    """Return the Jaccard similarity of two trigram sets."""
+    union: int = len(grams | other)
+    return len(grams & other) / union if union else 0.0
+
+
+def city_key(city: str) -> str:
+    """Normalize a city for comparison: "Roma (RM)", "Roma(RM)" and "roma" give "roma"."""
+    return "".join(city.split("(", 1)[0].lower().split())
+
+
+def website_key(website: str | None) -> str:
+    """Normalize a website for comparison: scheme, "www." and trailing slashes are ignored."""
+    key: str = (website or "").strip().lower().split("://", 1)[-1]
+    return key.removeprefix("www.").rstrip("/")
+
+
+class DuplicateDetector:
+    """
+    Find the races that look like the same race as another one.
+
+    Usage:
+        matches = DuplicateDetector().find_duplicates(race)  # before inserting race
+        report = DuplicateDetector().find_all_duplicates()   # over the whole table
+    """
+
+    def __init__(self, config: DuplicatesConfig | None = None) -> None:
+        self.db = db
+        self.config: DuplicatesConfig = config or settings.duplicates
+        self.logger = LoggerManager.get_logger(self.__class__.__name__)
+
+    def find_duplicates(self, race: RaceRecord) -> list[DuplicateMatch]:
+        """Return the live races that look like race (itself excluded), most similar name first."""
+        grams: set[str] = name_grams(race.name)
+        day: datetime = datetime.combine(race.time.date(), datetime.min.time())
+        window: timedelta = timedelta(days=self.config.date_window_days)
+        try:
+            similar_ids: list[int] = [
+                row.id
+                for row in find_similar_names(
+                    self.db.session.connection(),
+                    grams=sorted(grams),
+                    min_shared=self._min_shared_grams(grams),
+                    time_from=day - window,
+                    time_to=day + window + timedelta(days=1),
+                    limit=self.config.candidate_limit,
+                )
+            ]
+            same_day = (RaceDAO.time >= day) & (RaceDAO.time < day + timedelta(days=1))
+            statement = select(*RACE_COLUMNS).where(
+                RaceDAO.deleted_at.is_(None), or_(same_day, RaceDAO.id.in_(similar_ids))
+            )
+            candidates: list[RaceRow] = list(map(RaceRow._make, self.db.session.execute(statement)))
+        except SQLAlchemyError as e:
+            DB_ERRORS.inc(operation="duplicates")
+            self.logger.error(f"SQLAlchemy error looking for duplicates of '{race.name}': {e}")
+            raise
+
+        matches: list[DuplicateMatch] = []
+        for candidate in candidates:
+            if candidate.id == race.id:
+                continue
+            match: DuplicateMatch | None = self._compare(race, grams, candidate, name_grams(candidate.name))
+            if match is not None:
+                matches.append(match)
+        matches.sort(key=lambda match: (-match.similarity, match.race.id))
+        return matches
+
+    def find_all_duplicates(self, on_progress: Callable[[int, int], None] | None = None) -> DuplicateReport:
+        """
+        Return every pair of live races that look like the same race.
+
+        One ordered scan of the table: a sliding window of date_window_days keeps an
+        in-memory trigram index of the races it holds, and each race is compared with
+        the races of its window sharing enough trigrams, or its day and city or website.
+
+        With on_progress, the races are read in pages of SCAN_PAGE_SIZE, each in a read
+        transaction of its own, and on_progress(races scanned, live races) is called after
+        each page: it may write (e.g. job progress) or raise to stop the scan.
+        """
+        started: float = time.perf_counter()
+        report: DuplicateReport = DuplicateReport()
+        window: timedelta = timedelta(days=self.config.date_window_days)
+        try:
+            rows: Iterable[RaceRow] = self._iter_live_races(on_progress)
+            # Races of the last date_window_days, their trigrams, and the window's trigram -> race ids index
+            recent: deque[tuple[RaceRow, set[str]]] = deque()
+            gram_index: defaultdict[str, set[int]] = defaultdict(set)
+            by_id: dict[int, tuple[RaceRow, set[str]]] = {}
+            for race in rows:
+                report.races += 1
+                while recent and race.time.date() - recent[0][0].time.date() > window:
+                    old, old_grams = recent.popleft()
+                    del by_id[old.id]
+                    for gram in old_grams:
+                        gram_index[gram].discard(old.id)
+                        if not gram_index[gram]:
+                            del gram_index[gram]
+
+                grams: set[str] = name_grams(race.name)
+                for candidate_id in self._window_candidates(race, grams, gram_index, by_id):
+                    candidate, candidate_grams = by_id[candidate_id]
+                    report.comparisons += 1
+                    match: DuplicateMatch | None = self._compare(race, grams, candidate, candidate_grams)
+                    if match is not None:
+                        first, second = sorted((race, candidate), key=lambda row: row.id)
+                        report.pairs.append(
+                            DuplicatePair(
+                                race=first, duplicate=second, similarity=match.similarity, reasons=match.reasons
+                            )
+                        )
+
+                recent.append((race, grams))
+                by_id[race.id] = (race, grams)
+                for gram in grams:
+                    gram_index[gram].add(race.id)
+        except SQLAlchemyError as e:
+            DB_ERRORS.inc(operation="duplicates")
+            self.logger.error(f"SQLAlchemy error looking for duplicates: {e}")
+            raise
+
+        report.pairs.sort(key=lambda pair: (pair.race.id, pair.duplicate.id))
+        report.elapsed_seconds = time.perf_counter() - started
+        self.logger.info(
+            f"Found {len(report.pairs)} duplicate pairs among {report.races} races "
+            f"with {report.comparisons} comparisons in {report.elapsed_seconds * 1000:.1f} ms"
+        )
+        return report
+
+    def _iter_live_races(self, on_progress: Callable[[int, int], None] | None) -> Iterator[RaceRow]:
+        """Yield the live races by time and id: one streamed query, or pages followed by on_progress()."""
+        statement = select(*RACE_COLUMNS).where(RaceDAO.deleted_at.is_(None)).order_by(RaceDAO.time, RaceDAO.id)
+        if on_progress is None:
+            yield from map(RaceRow._make, self.db.session.execute(statement))
+            return
+
+        live: int = self.db.session.execute(
+            select(func.count()).select_from(RaceDAO).where(RaceDAO.deleted_at.is_(None))
+        ).scalar_one()
+        scanned: int = 0
+        page: list[RaceRow] = []
+        while True:
+            paged = statement.limit(SCAN_PAGE_SIZE)
+            if page:
+                paged = paged.where(tuple_(RaceDAO.time, RaceDAO.id) > (page[-1].time, page[-1].id))
+            page = list(map(RaceRow._make, self.db.session.execute(paged)))
+            # End the read transaction: in the rollback journal it would block the writes of on_progress
+            self.db.session.commit()
+            yield from page
+            scanned += len(page)
+            on_progress(scanned, max(live, scanned))
+            if len(page) < SCAN_PAGE_SIZE:
+                return
+
+    def _window_candidates(
+        self,
+        race: RaceRow,
+        grams: set[str],
+        gram_index: dict[str, set[int]],
+        by_id: dict[int, tuple[RaceRow, set[str]]],
+    ) -> set[int]:
+        """Return the ids of the window's races sharing enough trigrams with race, or its day and city or website."""
+        shared: defaultdict[int, int] = defaultdict(int)
+        for gram in grams:
+            for candidate_id in gram_index.get(gram, ()):
+                shared[candidate_id] += 1
+        min_shared: int = self._min_shared_grams(grams)
+        candidates: set[int] = {candidate_id for candidate_id, count in shared.items() if count >= min_shared}
+        # Same-day block: the window is ordered by time, so the races of the day are at its end
+        city: str = city_key(race.city)
+        website: str = website_key(race.website)
+        for candidate_id, (candidate, _) in reversed(by_id.items()):
+            if candidate.time.date() != race.time.date():
+                break
+            if city_key(candidate.city) == city or (website and website_key(candidate.website) == website):
+                candidates.add(candidate_id)
+        return candidates
+
+    def _min_shared_grams(self, grams: set[str]) -> int:
+        """
+        Return the trigrams a name must share with grams to possibly reach the name similarity.
+
+        A Jaccard similarity of t needs |A & B| >= t * |A u B| >= t * |A|, so no candidate is lost.
+        """
+        return max(1, math.ceil(self.config.name_similarity * len(grams)))
+
+    def _compare(
+        self, race: RaceRecord, grams: set[str], candidate: RaceRow, candidate_grams: set[str]
+    ) -> DuplicateMatch | None:
+        """Return the match if candidate looks like the same race as race, else None."""
+        config: DuplicatesConfig = self.config
+        if abs(race.distance - candidate.distance) > config.distance_tolerance * max(race.distance, candidate.distance):
+            return None
+        similarity: float = name_similarity(grams, candidate_grams)
+        days_apart: int = abs((race.time.date() - candidate.time.date()).days)
+        reasons: list[str] = []
+        if days_apart == 0:
+            website: str = website_key(race.website)
+            if website and website == website_key(candidate.website):
+                reasons.append("website")
+            if city_key(race.city) == city_key(candidate.city) and similarity >= config.city_name_similarity:
+                reasons.append("city")
+        if days_apart <= config.date_window_days and similarity >= config.name_similarity:
+            reasons.append("name")
+        if not reasons:
+            return None
+        return DuplicateMatch(race=candidate, similarity=similarity, reasons=tuple(reasons))
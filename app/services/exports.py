@@ -0,0 +1,205 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Streaming exporter for the race table.
+Rows are fetched as plain column tuples through a server-side cursor (yield_per)
+and serialized chunk by chunk, so peak memory stays flat whatever the table size.
+Paged exporters (export jobs) read each chunk with a keyset query of its own instead.
+"""
+import csv
+import io
+import json
+import math
+from collections.abc import Iterator, Sequence
+from datetime import datetime
+from typing import Any, Literal
+
+from sqlalchemy import Row, func, select
+
+from app import db
+from app.dtos import RaceFilter
+from app.models.races import RaceDAO
+from app.models.version import read_data_version
+from app.services.queries import RaceQueryBuilder
+
+ExportFormat = Literal["csv", "ndjson", "json", "ics"]
+
+# Same column layout as gare_podistiche.csv, so exports can be re-imported
+EXPORT_COLUMNS: tuple[str, ...] = ("id", "name", "time", "city", "distance", "website")
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+MIMETYPES: dict[str, str] = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+    "ics": "text/calendar",
+}
+
+# Race times are local times of the races, published as floating times in this zone
+CALENDAR_TIMEZONE = "Europe/Rome"
+CALENDAR_NAME = "Gare Podistiche di Roma e Provincia"
+ICS_TIME_FORMAT = "%Y%m%dT%H%M%S"
+# Events last an easy pace over the distance, rounded up to a quarter of an hour
+ICS_MINUTES_PER_KM = 7
+ICS_MIN_DURATION_MINUTES = 60
+# RFC 5545 content lines are folded at 75 octets
+ICS_LINE_OCTETS = 75
+
+
+def _ics_text(value: str) -> str:
+    """Escape a TEXT property value (RFC 5545, section 3.3.11)."""
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _ics_line(line: str) -> str:
+    """Return a content line folded at 75 octets (continuation lines start with a space), CRLF terminated."""
+    encoded: bytes = line.encode("utf-8")
+    if len(encoded) <= ICS_LINE_OCTETS:
+        return line + "\r\n"
+    parts: list[str] = []
+    start: int = 0
+    limit: int = ICS_LINE_OCTETS
+    while start < len(encoded):
+        end: int = min(start + limit, len(encoded))
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:  # never split a UTF-8 sequence
+            end -= 1
+        parts.append(encoded[start:end].decode("utf-8"))
+        start = end
+        limit = ICS_LINE_OCTETS - 1  # the leading space counts
+    return "\r\n ".join(parts) + "\r\n"
+
+
+class RaceExporter:
+    """
+    Export races as CSV, newline-delimited JSON, a JSON array or an iCalendar feed.
+
+    Usage:
+        for chunk in RaceExporter().iter_export(export_format="ndjson"):
+            output.write(chunk)
+    """
+
+    def __init__(self, chunk_size: int = EXPORT_CHUNK_SIZE, paged: bool = False) -> None:
+        self.db = db
+        self.chunk_size: int = chunk_size
+        self.paged: bool = paged
+        # Rows yielded by iter_rows() so far
+        self.exported_rows: int = 0
+
+    def count(self, filters: RaceFilter | None = None) -> int:
+        """Return the number of races an export with these filters holds."""
+        statement = RaceQueryBuilder(filters, statement=select(RaceDAO.id)).build()
+        return self.db.session.execute(select(func.count()).select_from(statement.subquery())).scalar_one()
+
+    def iter_rows(self, filters: RaceFilter | None = None) -> Iterator[Sequence[Row[Any]]]:
+        """
+        Yield chunks of (id, name, time, city, distance, website) tuples in id order.
+
+        A paged exporter ends its read transaction before yielding each chunk, so no read
+        lock is held while the consumer writes (e.g. job progress in the rollback journal);
+        races written meanwhile may or may not be exported.
+        """
+        columns = [getattr(RaceDAO, name) for name in EXPORT_COLUMNS]
+        statement = RaceQueryBuilder(filters, statement=select(*columns)).build().order_by(RaceDAO.id)
+        if not self.paged:
+            result = self.db.session.execute(statement.execution_options(yield_per=self.chunk_size))
+            for rows in result.partitions():
+                self.exported_rows += len(rows)
+                yield rows
+            return
+
+        after: int = 0
+        while True:
+            page: Sequence[Row[Any]] = self.db.session.execute(
+                statement.where(RaceDAO.id > after).limit(self.chunk_size)
+            ).all()
+            self.db.session.commit()
+            if not page:
+                return
+            after = page[-1].id
+            self.exported_rows += len(page)
+            yield page
+
+    def iter_export(self, export_format: ExportFormat = "csv", filters: RaceFilter | None = None) -> Iterator[str]:
+        """Yield the export as text chunks of at most chunk_size rows each."""
+        if export_format == "csv":
+            return self._iter_csv(filters)
+        if export_format == "json":
+            return self._iter_json(filters)
+        if export_format == "ics":
+            return self._iter_ics(filters)
+        return self._iter_ndjson(filters)
+
+    def _iter_csv(self, filters: RaceFilter | None) -> Iterator[str]:
+        """Yield the CSV header and then one CSV chunk per partition."""
+        yield ",".join(EXPORT_COLUMNS) + "\r\n"
+        for rows in self.iter_rows(filters):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerows((r.id, r.name, r.time.strftime(EXPORT_TIME_FORMAT), *r[3:]) for r in rows)
+            yield buffer.getvalue()
+
+    def _iter_ndjson(self, filters: RaceFilter | None) -> Iterator[str]:
+        """Yield one NDJSON chunk per partition."""
+        for rows in self.iter_rows(filters):
+            yield "".join(
+                json.dumps({**r._asdict(), "time": r.time.isoformat()}, ensure_ascii=False) + "\n" for r in rows
+            )
+
+    def _iter_json(self, filters: RaceFilter | None) -> Iterator[str]:
+        """Yield a JSON array of races, one chunk per partition."""
+        separator: str = "[\n"
+        for rows in self.iter_rows(filters):
+            for r in rows:
+                yield separator + json.dumps({**r._asdict(), "time": r.time.isoformat()}, ensure_ascii=False)
+                separator = ",\n"
+        yield "[]\n" if separator == "[\n" else "\n]\n"
+
+    def _iter_ics(self, filters: RaceFilter | None) -> Iterator[str]:
+        """
+        Yield an iCalendar (RFC 5545) feed with one VEVENT per race, one chunk per partition.
+
+        DTSTAMP is the last modification of the race table, so exports of unchanged data
+        are byte for byte identical.
+        """
+        _, last_modified = read_data_version(self.db.session.connection())
+        stamp: str = last_modified.strftime(ICS_TIME_FORMAT) + "Z"
+        yield "".join(
+            _ics_line(line)
+            for line in (
+                "BEGIN:VCALENDAR",
+                "VERSION:2.0",
+                "PRODID:-//Code4Projects//Races//IT",
+                "CALSCALE:GREGORIAN",
+                "METHOD:PUBLISH",
+                f"X-WR-CALNAME:{_ics_text(CALENDAR_NAME)}",
+                f"X-WR-TIMEZONE:{CALENDAR_TIMEZONE}",
+            )
+        )
+        for rows in self.iter_rows(filters):
+            yield "".join(self._ics_event(r, stamp) for r in rows)
+        yield _ics_line("END:VCALENDAR")
+
+    @staticmethod
+    def _ics_event(race: Row[Any], stamp: str) -> str:
+        """Return the VEVENT of a race row."""
+        start: datetime = race.time
+        minutes: int = max(ICS_MIN_DURATION_MINUTES, math.ceil(race.distance / 1000 * ICS_MINUTES_PER_KM / 15) * 15)
+        lines: list[str] = [
+            "BEGIN:VEVENT",
+            f"UID:race-{race.id}@races",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{start.strftime(ICS_TIME_FORMAT)}",
+            f"DURATION:PT{minutes // 60}H{minutes % 60}M",
+            f"SUMMARY:{_ics_text(race.name)}",
+            f"LOCATION:{_ics_text(race.city)}",
+            f"DESCRIPTION:{_ics_text(f'{race.distance / 1000:g} km')}",
+        ]
+        if race.website and race.website.startswith(("http://", "https://")):
+            lines.append(f"URL:{race.website}")
+        lines.append("END:VEVENT")
+        return "".join(map(_ics_line, lines))
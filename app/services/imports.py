@@ -0,0 +1,165 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Streaming bulk importer for gare_podistiche.csv-style files.
+Rows are read one at a time, validated against the Race DTO and inserted with
+executemany in fixed-size batches, so memory stays constant whatever the file size.
+"""
+import csv
+import time
+from collections.abc import Callable, Iterator
+from typing import Any, TextIO
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.core import settings
+from app.core.log import LoggerManager
+from app.core.metrics import DB_ERRORS, WRITES
+from app.dtos import ImportReport, Race, RejectedRow
+from app.models.races import RaceDAO
+from app.services.cache import RaceCache, get_race_cache
+from app.services.changes import publish_changes
+
+# Column layout of gare_podistiche.csv, which has no header row
+CSV_FIELDNAMES: tuple[str, ...] = ("id", "name", "time", "city", "distance", "website")
+
+
+class RaceImporter:
+    """
+    Import races from CSV streams in batches.
+
+    Usage:
+        with open("gare_podistiche.csv", newline="") as csv_file:
+            report = RaceImporter(batch_size=1000).import_csv(csv_file)
+    """
+
+    def __init__(
+        self,
+        batch_size: int | None = None,
+        max_reported_rejections: int | None = None,
+        cache: RaceCache | None = None,
+    ) -> None:
+        self.db = db
+        self.cache: RaceCache = cache or get_race_cache()
+        self.batch_size: int = batch_size or settings.imports.batch_size
+        self.max_reported_rejections: int = (
+            max_reported_rejections if max_reported_rejections is not None else settings.imports.max_reported_rejections
+        )
+        self.logger = LoggerManager.get_logger(self.__class__.__name__)
+
+    def import_csv(
+        self,
+        stream: TextIO,
+        resume: ImportReport | None = None,
+        on_batch: Callable[[ImportReport], None] | None = None,
+    ) -> ImportReport:
+        """
+        Validate and insert every row of a CSV stream.
+
+        Invalid rows are counted and reported with their line number; valid rows are
+        inserted one batch per transaction. Raises SQLAlchemyError if a batch fails,
+        in which case earlier batches stay committed.
+
+        Args:
+            stream: CSV text stream
+            resume: report of an interrupted import of the same stream as of its last committed
+                batch: its total_rows rows are skipped and its counts carried on
+            on_batch: called with the report after each batch is inserted, in the batch's
+                transaction (e.g. to checkpoint a job atomically); raising rolls the batch back
+        """
+        report: ImportReport = resume or ImportReport()
+        skipped_rows: int = report.total_rows
+        started: float = time.perf_counter()
+        batch: list[dict[str, Any]] = []
+
+        for line, row in self._read_rows(stream):
+            if skipped_rows:
+                skipped_rows -= 1
+                continue
+            report.total_rows += 1
+            try:
+                batch.append(self._validate_row(row))
+            except (ValidationError, ValueError) as e:
+                self._reject(report, line=line, error=e)
+                continue
+            if len(batch) >= self.batch_size:
+                self._insert_batch(batch, report, on_batch)
+                batch = []
+
+        if batch:
+            self._insert_batch(batch, report, on_batch)
+
+        report.elapsed_seconds = time.perf_counter() - started
+        self.logger.info(
+            f"Imported {report.inserted_rows}/{report.total_rows} races in {report.batches} batches "
+            f"({report.rows_per_second:.0f} rows/s, {report.rejected_rows} rejected)"
+        )
+        return report
+
+    def _read_rows(self, stream: TextIO) -> Iterator[tuple[int, dict[str, str]]]:
+        """Yield (line number, row) pairs, honouring an optional header row."""
+        reader = csv.reader(stream)
+        fieldnames: tuple[str, ...] = CSV_FIELDNAMES
+        for values in reader:
+            if not values:
+                continue
+            if reader.line_num == 1 and {"name", "time"} <= {v.strip().lower() for v in values}:
+                fieldnames = tuple(v.strip().lower() for v in values)
+                continue
+            yield reader.line_num, dict(zip(fieldnames, values))
+
+    def _validate_row(self, row: dict[str, str]) -> dict[str, Any]:
+        """Validate a raw CSV row against the Race DTO and return the column values to insert."""
+        race: Race = Race.model_validate(
+            obj={
+                "name": row.get("name", "").strip(),
+                "time": row.get("time", "").strip(),
+                "city": row.get("city", "").strip(),
+                "distance": row.get("distance", "").strip(),
+                "website": row.get("website", "").strip(),
+            }
+        )
+        if race.distance <= 0:
+            raise ValueError("Distance must be greater than 0")
+        return race.model_dump(exclude={"id"})
+
+    def _reject(self, report: ImportReport, line: int, error: Exception) -> None:
+        """Record a rejected row, keeping at most max_reported_rejections details."""
+        report.rejected_rows += 1
+        if len(report.rejections) < self.max_reported_rejections:
+            message: str = (
+                "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in error.errors())
+                if isinstance(error, ValidationError)
+                else str(error)
+            )
+            report.rejections.append(RejectedRow(line=line, error=message))
+
+    def _insert_batch(
+        self, batch: list[dict[str, Any]], report: ImportReport, on_batch: Callable[[ImportReport], None] | None
+    ) -> None:
+        """Insert a batch with a single executemany and commit it."""
+        number: int = report.batches + 1
+        try:
+            self.db.session.execute(insert(RaceDAO), batch)
+            report.inserted_rows += len(batch)
+            report.batches += 1
+            if on_batch is not None:
+                on_batch(report)
+            self.db.session.commit()
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            DB_ERRORS.inc(operation="import")
+            self.logger.error(f"SQLAlchemy error importing batch {number}: {e}")
+            raise
+        except Exception:
+            # on_batch refused the batch
+            self.db.session.rollback()
+            raise
+        self.cache.invalidate()
+        publish_changes()
+        WRITES.inc(len(batch), operation="import")
@@ -0,0 +1,720 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Background jobs.
+Heavy operations (bulk import, full export, index rebuilds, snapshot publication, link
+checks, duplicate reports) run as jobs instead of inside a request: the request queues a
+job row and returns at once, and clients poll /api/jobs/<id> for its progress.
+
+Every process may run a JobRunner: a dispatcher thread claims queued jobs and runs them
+on a bounded thread pool, sends heartbeats for them, and queues again the jobs of runners
+whose heartbeats stopped, e.g. because their process crashed (up to max_attempts runs).
+Cancellation is cooperative: a running job stops at its next progress report.
+"""
+import io
+import os
+import shutil
+import socket
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import IO, Any, cast
+
+from flask import current_app
+from flask.app import Flask
+from sqlalchemy import case, delete, func, literal, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.core import settings
+from app.core.config import JobsConfig
+from app.core.log import LoggerManager
+from app.core.metrics import DB_ERRORS
+from app.dtos import ImportReport, Job, LinkCheckReport, RaceFilter
+from app.models import rebuild_name_index, rebuild_search_index, rebuild_stats
+from app.models.jobs import JOB_CANCELLED, JOB_FAILED, JOB_FINISHED, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JobDAO
+from app.services.cache import get_race_cache
+from app.services.changes import ChangeFeed
+from app.services.duplicates import DuplicateDetector
+from app.services.exports import MIMETYPES, ExportFormat, RaceExporter
+from app.services.imports import RaceImporter
+from app.services.links import LinkChecker
+from app.services.snapshots import SnapshotPublisher, get_snapshot_publisher
+
+EXTENSION_NAME = "job_runner"
+JOB_COLUMNS = (
+    JobDAO.id,
+    JobDAO.kind,
+    JobDAO.status,
+    JobDAO.created_at,
+    JobDAO.params,
+    JobDAO.progress_done,
+    JobDAO.progress_total,
+    JobDAO.message,
+    JobDAO.result,
+    JobDAO.checkpoint,
+    JobDAO.error,
+    JobDAO.attempts,
+    JobDAO.max_attempts,
+    JobDAO.cancel_requested,
+    JobDAO.started_at,
+    JobDAO.heartbeat_at,
+    JobDAO.finished_at,
+)
+
+
+def utcnow() -> datetime:
+    """Return the current UTC time as stored in the job table."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobNotFoundError(Exception):
+    """No job has the requested id."""
+
+    pass
+
+
+class JobStateError(Exception):
+    """The job's status does not allow the operation (e.g. cancelling a finished job)."""
+
+    pass
+
+
+class JobCancelledError(Exception):
+    """Raised by JobContext when cancellation of the running job was requested."""
+
+    pass
+
+
+class JobContext:
+    """What a running job sees: its parameters, its files, and progress reporting."""
+
+    def __init__(self, job: Job, directory: Path, config: JobsConfig) -> None:
+        self.job: Job = job
+        self.params: dict[str, Any] = job.params
+        # State saved by checkpoint() during an earlier run of the job, if any
+        self.resume_state: dict[str, Any] | None = job.checkpoint
+        self.directory: Path = directory
+        self.config: JobsConfig = config
+        self._last_progress: float | None = None
+
+    @property
+    def input_path(self) -> Path:
+        """File uploaded with the job."""
+        return self.directory / f"job-{self.job.id}.input"
+
+    def output_path(self, suffix: str) -> Path:
+        """File produced by the job, served by /api/jobs/<id>/file."""
+        return self.directory / f"job-{self.job.id}.{suffix}"
+
+    def progress(self, done: int, total: int | None = None, message: str | None = None, force: bool = False) -> None:
+        """
+        Record the progress in a transaction of its own, at most every progress_interval_seconds unless force.
+
+        Raises JobCancelledError if cancellation was requested: let it propagate.
+        """
+        now: float = time.monotonic()
+        if not force and self._last_progress is not None:
+            if now - self._last_progress < self.config.progress_interval_seconds:
+                return
+        self._last_progress = now
+        with db.engine.begin() as connection:
+            cancel_requested: bool | None = connection.execute(self._progress_statement(done, total, message)).scalar()
+        if cancel_requested:
+            raise JobCancelledError(f"Job {self.job.id} was cancelled")
+
+    def checkpoint(
+        self, state: dict[str, Any], done: int, total: int | None = None, message: str | None = None
+    ) -> None:
+        """
+        Record the progress and the state to resume from in the caller's db.session transaction.
+
+        Committed together with the work it describes, the state is handed to the next run
+        (resume_state) if this one dies. Raises JobCancelledError if cancellation was requested.
+        """
+        statement = self._progress_statement(done, total, message).values(checkpoint=state)
+        if db.session.execute(statement, execution_options={"synchronize_session": False}).scalar():
+            raise JobCancelledError(f"Job {self.job.id} was cancelled")
+
+    def _progress_statement(self, done: int, total: int | None, message: str | None) -> Any:
+        """Return the UPDATE recording the progress and returning cancel_requested."""
+        values: dict[str, Any] = {"progress_done": done, "heartbeat_at": utcnow()}
+        if total is not None:
+            values["progress_total"] = total
+        if message is not None:
+            values["message"] = message[:200]
+        return update(JobDAO).where(JobDAO.id == self.job.id).values(**values).returning(JobDAO.cancel_requested)
+
+
+@dataclass(frozen=True)
+class JobKind:
+    """How to run one kind of job."""
+
+    # Returns the JSON-serializable result of the job
+    run: Callable[[JobContext], dict[str, Any]]
+    # The job needs an uploaded file (JobContext.input_path)
+    needs_input: bool = False
+    # Raises ValueError if the parameters are invalid, before the job is queued
+    validate: Callable[[dict[str, Any]], None] | None = None
+
+
+class JobService:
+    """
+    Queue, inspect, cancel and retry jobs.
+
+    Usage:
+        job = JobService().submit("rebuild-stats")
+        job = JobService().get_job(job.id)
+    """
+
+    def __init__(self, runner: "JobRunner | None" = None) -> None:
+        self.db = db
+        self.runner: JobRunner | None = runner or get_job_runner(current_app)
+        self.config: JobsConfig = self.runner.config if self.runner is not None else settings.jobs
+        self.directory: Path = Path(current_app.root_path) / self.config.directory
+        self.logger = LoggerManager.get_logger(self.__class__.__name__)
+
+    def submit(self, kind: str, params: dict[str, Any] | None = None, input_file: IO[bytes] | None = None) -> Job:
+        """
+        Queue a job and wake the runner of this process.
+
+        Raises ValueError if the kind is unknown, the parameters are invalid or the input
+        file is missing (or given to a kind that takes none).
+        """
+        params = params or {}
+        job_kind: JobKind | None = JOB_KINDS.get(kind)
+        if job_kind is None:
+            raise ValueError(f"Unknown job kind '{kind}', use one of {sorted(JOB_KINDS)}")
+        if job_kind.needs_input != (input_file is not None):
+            raise ValueError(f"Job kind '{kind}' {'needs' if job_kind.needs_input else 'takes no'} input file")
+        if job_kind.validate is not None:
+            job_kind.validate(params)
+
+        job: JobDAO = JobDAO(kind=kind, params=params, max_attempts=self.config.max_attempts, created_at=utcnow())
+        input_path: Path | None = None
+        try:
+            self.db.session.add(job)
+            self.db.session.flush()
+            if input_file is not None:
+                # Written before the commit, so a runner never claims a job whose input is missing
+                self.directory.mkdir(parents=True, exist_ok=True)
+                input_path = self.directory / f"job-{job.id}.input"
+                with input_path.open("wb") as target:
+                    shutil.copyfileobj(input_file, target)
+            self.db.session.commit()
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            if input_path is not None:
+                input_path.unlink(missing_ok=True)
+            DB_ERRORS.inc(operation="jobs")
+            self.logger.error(f"SQLAlchemy error queueing a '{kind}' job: {e}")
+            raise
+        self.logger.info(f"Queued job {job.id} ({kind})")
+        if self.runner is not None:
+            self.runner.wake()
+        return self.get_job(job.id)
+
+    def get_job(self, job_id: int) -> Job:
+        """Return a job. Raises JobNotFoundError."""
+        row = self.db.session.execute(select(*JOB_COLUMNS).where(JobDAO.id == job_id)).first()
+        if row is None:
+            raise JobNotFoundError(f"Job with ID {job_id} not found")
+        return Job(**row._asdict())
+
+    def list_jobs(self, status: str | None = None, limit: int = 50) -> list[Job]:
+        """Return the most recent jobs, optionally only those with a status."""
+        statement = select(*JOB_COLUMNS).order_by(JobDAO.id.desc()).limit(limit)
+        if status is not None:
+            statement = statement.where(JobDAO.status == status)
+        return [Job(**row._asdict()) for row in self.db.session.execute(statement)]
+
+    def cancel_job(self, job_id: int) -> Job:
+        """
+        Cancel a queued job, or ask a running one to stop at its next progress report.
+
+        Raises JobNotFoundError, or JobStateError if the job already finished.
+        """
+        queued = JobDAO.status == JOB_QUEUED
+        statement = (
+            update(JobDAO)
+            .where(JobDAO.id == job_id, JobDAO.status.in_((JOB_QUEUED, JOB_RUNNING)))
+            .values(
+                status=case((queued, JOB_CANCELLED), else_=JobDAO.status),
+                finished_at=case((queued, utcnow()), else_=JobDAO.finished_at),
+                cancel_requested=True,
+            )
+            .returning(JobDAO.id)
+        )
+        return self._transition(job_id, statement, "cancel")
+
+    def retry_job(self, job_id: int) -> Job:
+        """
+        Queue a failed or cancelled job again, with a fresh attempt budget.
+
+        Its resume state is kept, so an import carries on after its last committed batch.
+        Raises JobNotFoundError, or JobStateError if the job is not failed or cancelled.
+        """
+        statement = (
+            update(JobDAO)
+            .where(JobDAO.id == job_id, JobDAO.status.in_((JOB_FAILED, JOB_CANCELLED)))
+            .values(
+                status=JOB_QUEUED,
+                attempts=0,
+                cancel_requested=False,
+                error=None,
+                result=None,
+                worker=None,
+                started_at=None,
+                finished_at=None,
+            )
+            .returning(JobDAO.id)
+        )
+        job: Job = self._transition(job_id, statement, "retry")
+        if self.runner is not None:
+            self.runner.wake()
+        return job
+
+    def get_output_path(self, job: Job) -> Path | None:
+        """Return the file produced by a job, or None if it produced none (or it was purged)."""
+        filename: str | None = (job.result or {}).get("file")
+        if not filename:
+            return None
+        path: Path = self.directory / filename
+        return path if path.is_file() else None
+
+    def _transition(self, job_id: int, statement: Any, operation: str) -> Job:
+        """Run a status-changing UPDATE ... RETURNING and return the job, raising if it matched nothing."""
+        try:
+            changed: bool = (
+                self.db.session.execute(statement, execution_options={"synchronize_session": False}).first()
+                is not None
+            )
+            self.db.session.commit()
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            DB_ERRORS.inc(operation="jobs")
+            self.logger.error(f"SQLAlchemy error trying to {operation} job {job_id}: {e}")
+            raise
+        job: Job = self.get_job(job_id)
+        if not changed:
+            raise JobStateError(f"Cannot {operation} job {job_id}: it is {job.status}")
+        self.logger.info(f"Job {job_id} ({job.kind}): {operation} requested, now {job.status}")
+        return job
+
+
+class JobRunner:
+    """
+    Run queued jobs on a thread pool, keep their heartbeats and recover the jobs of dead runners.
+
+    Usage:
+        runner = JobRunner(app, settings.jobs)
+        runner.start()  # on a background thread, as the web processes do
+        runner.run()    # on the calling thread until stop(), as "flask run-jobs" does
+    """
+
+    def __init__(self, app: Flask, config: JobsConfig) -> None:
+        self.app: Flask = app
+        self.config: JobsConfig = config
+        self.directory: Path = Path(app.root_path) / config.directory
+        self.worker: str = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running: set[int] = set()
+        self._stopped: bool = False
+        self._thread: threading.Thread | None = None
+        self.logger = LoggerManager.get_logger(self.__class__.__name__)
+
+    def start(self) -> None:
+        """Run the dispatcher on a background thread, unless it is already running."""
+        with self._lock:
+            self._stopped = False
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.run, name="job-dispatcher", daemon=True)
+                self._thread.start()
+
+    def ensure_started(self) -> None:
+        """Start the runner unless it is running or was stopped; cheap enough to call on every request."""
+        if not self._stopped and (self._thread is None or not self._thread.is_alive()):
+            self.start()
+
+    def wake(self) -> None:
+        """Look for queued jobs now instead of at the next poll."""
+        self.ensure_started()
+        self._wakeup.set()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop claiming jobs and wait for the running ones to finish."""
+        self._stopped = True
+        self._wakeup.set()
+        thread: threading.Thread | None = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def run(self) -> None:
+        """Dispatch jobs on the calling thread until stop(); running jobs are waited for on exit."""
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.logger.info(f"Job runner {self.worker} started with {self.config.max_workers} workers")
+        next_maintenance: float = 0.0
+        with ThreadPoolExecutor(max_workers=self.config.max_workers, thread_name_prefix="job") as pool:
+            while not self._stopped:
+                self._wakeup.clear()
+                try:
+                    with self.app.app_context():
+                        if time.monotonic() >= next_maintenance:
+                            next_maintenance = time.monotonic() + self.config.heartbeat_seconds
+                            self._send_heartbeats()
+                            self.recover_stale_jobs()
+                            self.purge_finished_jobs()
+                        while not self._stopped and len(self._running) < self.config.max_workers:
+                            job: Job | None = self.claim_job()
+                            if job is None:
+                                break
+                            with self._lock:
+                                self._running.add(job.id)
+                            pool.submit(self._execute, job)
+                except Exception as e:
+                    self.logger.error(f"Job dispatcher error: {e}")
+                self._wakeup.wait(timeout=min(self.config.poll_seconds, self.config.heartbeat_seconds))
+        self.logger.info(f"Job runner {self.worker} stopped")
+
+    def claim_job(self) -> Job | None:
+        """Mark the oldest queued job as running on this runner and return it; None if the queue is empty."""
+        now: datetime = utcnow()
+        oldest = select(JobDAO.id).where(JobDAO.status == JOB_QUEUED).order_by(JobDAO.id).limit(1).scalar_subquery()
+        # One statement: two runners never claim the same job
+        statement = (
+            update(JobDAO)
+            .where(JobDAO.id == oldest, JobDAO.status == JOB_QUEUED)
+            .values(
+                status=JOB_RUNNING, attempts=JobDAO.attempts + 1, worker=self.worker, started_at=now, heartbeat_at=now
+            )
+            .returning(*JOB_COLUMNS)
+        )
+        try:
+            with db.engine.begin() as connection:
+                row = connection.execute(statement).first()
+        except SQLAlchemyError as e:
+            DB_ERRORS.inc(operation="jobs")
+            self.logger.error(f"SQLAlchemy error claiming a job: {e}")
+            raise
+        return Job(**row._asdict()) if row is not None else None
+
+    def run_job(self, job: Job) -> Job:
+        """Run a claimed job on the calling thread and record how it ended. Requires an app context."""
+        job_kind: JobKind | None = JOB_KINDS.get(job.kind)
+        started: float = time.perf_counter()
+        result: dict[str, Any] | None = None
+        error: str | None = None
+        try:
+            if job_kind is None:
+                raise ValueError(f"Unknown job kind '{job.kind}'")
+            self.directory.mkdir(parents=True, exist_ok=True)
+            result = job_kind.run(JobContext(job, self.directory, self.config))
+            status: str = JOB_SUCCEEDED
+        except JobCancelledError:
+            db.session.rollback()
+            status = JOB_CANCELLED
+        except Exception as e:
+            db.session.rollback()
+            status, error = JOB_FAILED, (str(e) or e.__class__.__name__)[:500]
+            self.logger.error(f"Job {job.id} ({job.kind}) failed: {error}")
+        finished: Job = self._finish(job, status, result, error)
+        self.logger.info(
+            f"Job {job.id} ({job.kind}) {finished.status} after {time.perf_counter() - started:.1f} s "
+            f"(attempt {job.attempts}/{job.max_attempts})"
+        )
+        return finished
+
+    def recover_stale_jobs(self) -> int:
+        """
+        Queue again the running jobs whose runner stopped sending heartbeats; return how many were found.
+
+        Jobs out of attempts are failed, jobs whose cancellation was requested are cancelled.
+        """
+        now: datetime = utcnow()
+        exhausted = JobDAO.attempts >= JobDAO.max_attempts
+        statement = (
+            update(JobDAO)
+            .where(
+                JobDAO.status == JOB_RUNNING,
+                JobDAO.heartbeat_at < now - timedelta(seconds=self.config.stale_after_seconds),
+            )
+            .values(
+                status=case(
+                    (JobDAO.cancel_requested, JOB_CANCELLED), (exhausted, JOB_FAILED), else_=JOB_QUEUED
+                ),
+                error=literal("Runner ") + JobDAO.worker + literal(" stopped sending heartbeats"),
+                finished_at=case((JobDAO.cancel_requested | exhausted, now), else_=None),
+                worker=None,
+            )
+            .returning(JobDAO.id, JobDAO.kind, JobDAO.status)
+        )
+        try:
+            with db.engine.begin() as connection:
+                recovered = connection.execute(statement).all()
+        except SQLAlchemyError as e:
+            DB_ERRORS.inc(operation="jobs")
+            self.logger.error(f"SQLAlchemy error recovering stale jobs: {e}")
+            raise
+        for job_id, kind, status in recovered:
+            self.logger.warning(f"Job {job_id} ({kind}) lost its runner: now {status}")
+        return len(recovered)
+
+    def purge_finished_jobs(self) -> int:
+        """Delete the jobs finished more than retention_days ago, and their files; return how many."""
+        cutoff: datetime = utcnow() - timedelta(days=self.config.retention_days)
+        statement = (
+            delete(JobDAO)
+            .where(JobDAO.status.in_(JOB_FINISHED), JobDAO.finished_at < cutoff)
+            .returning(JobDAO.id)
+        )
+        try:
+            with db.engine.begin() as connection:
+                purged: list[int] = list(connection.execute(statement).scalars())
+        except SQLAlchemyError as e:
+            DB_ERRORS.inc(operation="jobs")
+            self.logger.error(f"SQLAlchemy error purging finished jobs: {e}")
+            raise
+        for job_id in purged:
+            for path in self.directory.glob(f"job-{job_id}.*"):
+                path.unlink(missing_ok=True)
+        if purged:
+            self.logger.info(f"Purged {len(purged)} finished jobs")
+        return len(purged)
+
+    def _execute(self, job: Job) -> None:
+        """Pool thread: run a job in an app context of its own, then let the dispatcher claim the next one."""
+        try:
+            with self.app.app_context():
+                self.run_job(job)
+        except Exception as e:
+            self.logger.error(f"Job {job.id} ({job.kind}) could not be completed: {e}")
+        finally:
+            with self._lock:
+                self._running.discard(job.id)
+            self._wakeup.set()
+
+    def _send_heartbeats(self) -> None:
+        """Mark the jobs running on this runner as alive."""
+        with self._lock:
+            running: list[int] = sorted(self._running)
+        if not running:
+            return
+        statement = (
+            update(JobDAO)
+            .where(JobDAO.id.in_(running), JobDAO.status == JOB_RUNNING, JobDAO.worker == self.worker)
+            .values(heartbeat_at=utcnow())
+        )
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(statement)
+        except SQLAlchemyError as e:
+            # Missed heartbeats only matter after stale_after_seconds: try again at the next tick
+            DB_ERRORS.inc(operation="jobs")
+            self.logger.warning(f"SQLAlchemy error sending job heartbeats: {e}")
+
+    def _finish(self, job: Job, status: str, result: dict[str, Any] | None, error: str | None) -> Job:
+        """Record the end of a job, unless another runner recovered it in the meantime."""
+        statement = (
+            update(JobDAO)
+            .where(JobDAO.id == job.id, JobDAO.status == JOB_RUNNING, JobDAO.worker == self.worker)
+            .values(
+                status=status,
+                result=result,
+                error=error,
+                finished_at=utcnow(),
+                heartbeat_at=utcnow(),
+                progress_done=case(
+                    (literal(status == JOB_SUCCEEDED), func.coalesce(JobDAO.progress_total, JobDAO.progress_done)),
+                    else_=JobDAO.progress_done,
+                ),
+            )
+            .returning(*JOB_COLUMNS)
+        )
+        try:
+            with db.engine.begin() as connection:
+                row = connection.execute(statement).first()
+                if row is None:
+                    self.logger.warning(f"Job {job.id} ({job.kind}) was recovered by another runner while running")
+                    row = connection.execute(select(*JOB_COLUMNS).where(JobDAO.id == job.id)).one()
+        except SQLAlchemyError as e:
+            DB_ERRORS.inc(operation="jobs")
+            self.logger.error(f"SQLAlchemy error recording the end of job {job.id}: {e}")
+            raise
+        return Job(**row._asdict())
+
+
+def get_job_runner(app: Flask) -> JobRunner | None:
+    """Return the job runner of the app, or None if its jobs run only in "flask run-jobs"."""
+    return app.extensions.get(EXTENSION_NAME)
+
+
+def _start_job_runner() -> None:
+    """before_request hook: start the runner of the app on the first request."""
+    runner: JobRunner | None = get_job_runner(current_app)
+    if runner is not None:
+        runner.ensure_started()
+
+
+def configure_jobs(app: Flask, config: JobsConfig) -> JobRunner | None:
+    """
+    Enable (or disable) the job runner of an app.
+
+    Nothing is started here, so CLI commands never run jobs: the runner starts on the
+    first request or job submission of the process.
+
+    Args:
+        app: Flask application
+        config: job settings (settings.jobs)
+
+    Usage:
+        configure_jobs(app, settings.jobs)
+    """
+    previous: JobRunner | None = app.extensions.pop(EXTENSION_NAME, None)
+    if previous is not None:
+        previous.stop()
+    if _start_job_runner not in app.before_request_funcs.get(None, []):
+        app.before_request(_start_job_runner)
+    if not config.run_in_app:
+        return None
+    runner: JobRunner = JobRunner(app, config)
+    app.extensions[EXTENSION_NAME] = runner
+    return runner
+
+
+def _import_races(context: JobContext) -> dict[str, Any]:
+    """Import the uploaded CSV file, resuming after the last committed batch of an earlier run."""
+    resume: ImportReport | None = (
+        ImportReport.from_dict(context.resume_state) if context.resume_state is not None else None
+    )
+    total: int = context.input_path.stat().st_size
+    with context.input_path.open("rb") as raw:
+        stream = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+
+        def on_batch(report: ImportReport) -> None:
+            context.checkpoint(
+                report.to_dict(), done=raw.tell(), total=total, message=f"{report.inserted_rows} races imported"
+            )
+
+        try:
+            report: ImportReport = RaceImporter(batch_size=context.params.get("batch_size")).import_csv(
+                stream, resume=resume, on_batch=on_batch
+            )
+        except UnicodeDecodeError as e:
+            raise ValueError(f"The CSV file must be UTF-8 encoded: {e}") from e
+    return report.to_dict()
+
+
+def _validate_export(params: dict[str, Any]) -> None:
+    """Check the export format and filters."""
+    export_format: str = params.get("format", "csv")
+    if export_format not in MIMETYPES:
+        raise ValueError(f"Unsupported format '{export_format}', use one of {sorted(MIMETYPES)}")
+    RaceFilter.model_validate(obj=params.get("filters") or {})
+
+
+def _export_races(context: JobContext) -> dict[str, Any]:
+    """Export the (optionally filtered) races into a file served by /api/jobs/<id>/file."""
+    export_format: str = context.params.get("format", "csv")
+    filters: RaceFilter = RaceFilter.model_validate(obj=context.params.get("filters") or {})
+    # Paged: no read transaction stays open between chunks, so progress can be written
+    exporter: RaceExporter = RaceExporter(paged=True)
+    total: int = exporter.count(filters)
+    path: Path = context.output_path(export_format)
+    partial: Path = path.with_name(path.name + ".part")
+    try:
+        with partial.open(mode="w", encoding="utf-8", newline="") as export_file:
+            for chunk in exporter.iter_export(export_format=cast(ExportFormat, export_format), filters=filters):
+                export_file.write(chunk)
+                context.progress(exporter.exported_rows, total=total, message=f"{exporter.exported_rows} races")
+        partial.replace(path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return {"file": path.name, "format": export_format, "races": exporter.exported_rows, "bytes": path.stat().st_size}
+
+
+def _rebuild(rebuild: Callable[[Any], None]) -> Callable[[JobContext], dict[str, Any]]:
+    """Return a job running one of the index rebuilds of app.models in a transaction."""
+
+    def run(context: JobContext) -> dict[str, Any]:
+        # One transaction: a cancellation is only honoured before it starts
+        context.progress(0, total=1, message=f"Running {rebuild.__name__.replace('_', ' ')}", force=True)
+        with db.engine.begin() as connection:
+            rebuild(connection)
+        get_race_cache().invalidate()
+        return {}
+
+    return run
+
+
+def _publish_snapshot(context: JobContext) -> dict[str, Any]:
+    """Render the snapshot files now."""
+    context.progress(0, total=1, message="Rendering the snapshot files", force=True)
+    publisher: SnapshotPublisher = get_snapshot_publisher(current_app) or SnapshotPublisher(
+        current_app, settings.snapshots
+    )
+    return {"version": publisher.publish().version}
+
+
+def _validate_positive(name: str) -> Callable[[dict[str, Any]], None]:
+    """Return a validator of an optional positive number parameter."""
+
+    def validate(params: dict[str, Any]) -> None:
+        value: Any = params.get(name)
+        if value is not None and (not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0):
+            raise ValueError(f"{name} must be greater than 0")
+
+    return validate
+
+
+def _compact_races(context: JobContext) -> dict[str, Any]:
+    """Purge the tombstones older than the 'days' parameter (default: changes.tombstone_retention_days)."""
+    days: float | None = context.params.get("days")
+    # One DELETE: a cancellation is only honoured before it starts
+    context.progress(0, total=1, message="Purging tombstones", force=True)
+    return {"purged": ChangeFeed().compact_tombstones(older_than=timedelta(days=days) if days is not None else None)}
+
+
+def _check_links(context: JobContext) -> dict[str, Any]:
+    """Probe the expired race websites, reporting progress (and stopping if cancelled) after each batch."""
+    limit: int | None = context.params.get("limit")
+    checker: LinkChecker = LinkChecker()
+    expired: int = checker.count_expired_links()
+    db.session.commit()
+    total: int = min(expired, limit) if limit is not None else expired
+    context.progress(0, total=total, message=f"{total} links to check", force=True)
+
+    def on_batch(report: LinkCheckReport) -> None:
+        message: str = f"{report.checked} links checked, {report.broken} broken"
+        context.progress(report.checked, total=max(total, report.checked), message=message)
+
+    return checker.check_links(limit=limit, on_batch=on_batch).to_dict()
+
+
+def _find_duplicates(context: JobContext) -> dict[str, Any]:
+    """Report the pairs of races that look like the same race, with progress every page of races scanned."""
+
+    def on_progress(scanned: int, total: int) -> None:
+        context.progress(scanned, total=total, message=f"{scanned} races scanned")
+
+    return DuplicateDetector().find_all_duplicates(on_progress=on_progress).to_dict()
+
+
+JOB_KINDS: dict[str, JobKind] = {
+    "import-races": JobKind(run=_import_races, needs_input=True, validate=_validate_positive("batch_size")),
+    "export-races": JobKind(run=_export_races, validate=_validate_export),
+    "rebuild-search-index": JobKind(run=_rebuild(rebuild_search_index)),
+    "rebuild-stats": JobKind(run=_rebuild(rebuild_stats)),
+    "rebuild-name-index": JobKind(run=_rebuild(rebuild_name_index)),
+    "publish-snapshot": JobKind(run=_publish_snapshot),
+    "compact-races": JobKind(run=_compact_races, validate=_validate_positive("days")),
+    "check-links": JobKind(run=_check_links, validate=_validate_positive("limit")),
+    "find-duplicates": JobKind(run=_find_duplicates),
+}
@@ -0,0 +1,286 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Race website link checker.
+The race table is walked in batches of ids; the distinct websites of a batch whose last
+check is older than its TTL are probed by a bounded thread pool, and the outcomes are
+stored in link_check. Requests to the same host are spaced by per_host_interval_seconds,
+and links that worked are probed with If-None-Match / If-Modified-Since so an unchanged
+page costs a 304. Meant to run outside requests, e.g. "flask check-links" from cron.
+"""
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http.client import HTTPException
+from typing import Any
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+from sqlalchemy import Select, case, distinct, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.core import settings
+from app.core.config import LinksConfig
+from app.core.log import LoggerManager
+from app.core.metrics import DB_ERRORS, WRITES
+from app.dtos import LinkCheck, LinkCheckReport
+from app.models.links import LINK_BROKEN, LINK_OK, LinkCheckDAO
+from app.models.races import RaceDAO
+from app.services.cache import RaceCache, get_race_cache
+from app.services.changes import publish_changes
+
+# HEAD answers meaning "ask with GET instead"
+HEAD_NOT_SUPPORTED: frozenset[int] = frozenset({403, 405, 501})
+LINK_COLUMNS = (
+    LinkCheckDAO.url,
+    LinkCheckDAO.status,
+    LinkCheckDAO.checked_at,
+    LinkCheckDAO.status_code,
+    LinkCheckDAO.error,
+    LinkCheckDAO.etag,
+    LinkCheckDAO.last_modified,
+    LinkCheckDAO.failures,
+)
+
+
+class HostRateLimiter:
+    """Space the requests to each host by a minimum interval, across threads."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval: float = interval
+        self._next_slot: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str) -> None:
+        """Block until a request to host may be sent, reserving the slot."""
+        with self._lock:
+            now: float = time.monotonic()
+            slot: float = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class LinkChecker:
+    """
+    Probe the race websites whose last check has expired and store the outcome.
+
+    Usage:
+        report = LinkChecker().check_links()
+        checks = LinkChecker().get_checks(status="broken")
+    """
+
+    def __init__(self, config: LinksConfig | None = None, cache: RaceCache | None = None) -> None:
+        self.db = db
+        self.config: LinksConfig = config or settings.links
+        self.cache: RaceCache = cache or get_race_cache()
+        self.limiter: HostRateLimiter = HostRateLimiter(self.config.per_host_interval_seconds)
+        self.logger = LoggerManager.get_logger(self.__class__.__name__)
+
+    def check_links(
+        self, limit: int | None = None, on_batch: Callable[[LinkCheckReport], None] | None = None
+    ) -> LinkCheckReport:
+        """
+        Probe the expired links of the live races, batch by batch; stop after limit links if given.
+
+        on_batch is called with the report so far once each batch is stored; it may raise to
+        stop the run (e.g. a cancelled job), the batches stored so far are kept.
+        Raises SQLAlchemyError if reading the races or storing a batch fails (earlier batches stay stored).
+        """
+        started: float = time.perf_counter()
+        report: LinkCheckReport = LinkCheckReport()
+        after: int = 0
+        # With a short TTL a URL shared by races of different batches would be probed again
+        seen: set[str] = set()
+        try:
+            with ThreadPoolExecutor(max_workers=self.config.max_workers, thread_name_prefix="link-checker") as pool:
+                while limit is None or report.checked < limit:
+                    batch: list[tuple[int, str]] = self._expired_links(after=after)
+                    if not batch:
+                        break
+                    after = batch[-1][0]
+                    urls: list[str] = [url for url in dict.fromkeys(url for _, url in batch) if url not in seen]
+                    if limit is not None:
+                        urls = urls[: limit - report.checked]
+                    if not urls:
+                        continue
+                    seen.update(urls)
+                    previous: dict[str, LinkCheck] = self._read_checks(urls)
+                    # End the read transaction: probing takes seconds and must not hold a read lock
+                    self.db.session.commit()
+                    checks: list[LinkCheck] = list(pool.map(lambda url: self.probe(url, previous.get(url)), urls))
+                    self._store(checks, previous, report)
+                    if on_batch is not None:
+                        on_batch(report)
+        finally:
+            # Also when stopped early: the stored batches are visible to readers
+            if report.changed:
+                self.cache.invalidate()
+                publish_changes()
+        report.elapsed_seconds = time.perf_counter() - started
+        self.logger.info(
+            f"Checked {report.checked} links in {report.elapsed_seconds:.1f} s: {report.ok} ok "
+            f"({report.not_modified} not modified), {report.broken} broken, {report.changed} changed"
+        )
+        return report
+
+    def get_checks(self, status: str | None = None) -> list[LinkCheck]:
+        """Return the stored checks, optionally only those with a status, by URL."""
+        statement = select(*LINK_COLUMNS).order_by(LinkCheckDAO.url)
+        if status is not None:
+            statement = statement.where(LinkCheckDAO.status == status)
+        try:
+            return [LinkCheck(*row) for row in self.db.session.execute(statement)]
+        except SQLAlchemyError as e:
+            DB_ERRORS.inc(operation="links")
+            self.logger.error(f"SQLAlchemy error reading link checks: {e}")
+            raise
+
+    def probe(self, url: str, previous: LinkCheck | None = None) -> LinkCheck:
+        """
+        Request a URL (HEAD, then GET if the server refuses HEAD) and return the outcome.
+
+        A link that worked last time is requested conditionally: 304 keeps it working.
+        """
+        headers: dict[str, str] = {"User-Agent": self.config.user_agent}
+        if previous is not None and not previous.broken:
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+        check: LinkCheck = self._request(url, "HEAD", headers, previous)
+        if check.status_code in HEAD_NOT_SUPPORTED:
+            check = self._request(url, "GET", headers, previous)
+        return check
+
+    def _request(self, url: str, method: str, headers: dict[str, str], previous: LinkCheck | None) -> LinkCheck:
+        """Send one request, once the host's rate limit allows it, without reading the body."""
+        self.limiter.wait(urlsplit(url).hostname or "")
+        checked_at: datetime = datetime.now(timezone.utc)
+        failures: int = (previous.failures if previous is not None else 0) + 1
+        try:
+            # Only http(s) URLs are selected by _expired_links()
+            with urlopen(  # nosec B310
+                Request(url, method=method, headers=headers), timeout=self.config.timeout_seconds
+            ) as response:
+                return LinkCheck(
+                    url=url,
+                    status=LINK_OK,
+                    checked_at=checked_at,
+                    status_code=response.status,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
+        except HTTPError as e:
+            if e.code == 304 and previous is not None:
+                return LinkCheck(
+                    url=url,
+                    status=LINK_OK,
+                    checked_at=checked_at,
+                    status_code=304,
+                    etag=e.headers.get("ETag") or previous.etag,
+                    last_modified=e.headers.get("Last-Modified") or previous.last_modified,
+                )
+            return LinkCheck(url=url, status=LINK_BROKEN, checked_at=checked_at, status_code=e.code, failures=failures)
+        except (URLError, HTTPException, OSError, ValueError) as e:
+            reason: object = e.reason if isinstance(e, URLError) else e
+            return LinkCheck(
+                url=url, status=LINK_BROKEN, checked_at=checked_at, error=str(reason)[:200], failures=failures
+            )
+
+    def count_expired_links(self) -> int:
+        """Return the number of distinct links of the live races that are unchecked or expired."""
+        statement = self._expired_statement(select(func.count(distinct(RaceDAO.website))))
+        try:
+            return self.db.session.execute(statement).scalar_one()
+        except SQLAlchemyError as e:
+            DB_ERRORS.inc(operation="links")
+            self.logger.error(f"SQLAlchemy error counting the links to check: {e}")
+            raise
+
+    def _expired_links(self, after: int) -> list[tuple[int, str]]:
+        """Return the (race id, website) of the next batch of live races whose link is unchecked or expired."""
+        statement = (
+            self._expired_statement(select(RaceDAO.id, RaceDAO.website))
+            .where(RaceDAO.id > after)
+            .order_by(RaceDAO.id)
+            .limit(self.config.batch_size)
+        )
+        try:
+            return [(row.id, row.website) for row in self.db.session.execute(statement)]
+        except SQLAlchemyError as e:
+            DB_ERRORS.inc(operation="links")
+            self.logger.error(f"SQLAlchemy error reading the links to check: {e}")
+            raise
+
+    def _expired_statement(self, statement: Select[Any]) -> Select[Any]:
+        """Restrict a select to the live races whose http(s) link is unchecked or expired."""
+        now: datetime = datetime.now(timezone.utc)
+        expired_before = case(
+            (LinkCheckDAO.status == LINK_OK, now - timedelta(hours=self.config.ok_ttl_hours)),
+            else_=now - timedelta(hours=self.config.broken_ttl_hours),
+        )
+        return statement.outerjoin(LinkCheckDAO, LinkCheckDAO.url == RaceDAO.website).where(
+            RaceDAO.deleted_at.is_(None),
+            RaceDAO.website.like("http://%") | RaceDAO.website.like("https://%"),
+            LinkCheckDAO.url.is_(None) | (LinkCheckDAO.checked_at < expired_before),
+        )
+
+    def _read_checks(self, urls: list[str]) -> dict[str, LinkCheck]:
+        """Return the stored checks of some URLs."""
+        rows = self.db.session.execute(select(*LINK_COLUMNS).where(LinkCheckDAO.url.in_(urls)))
+        return {row.url: LinkCheck(*row) for row in rows}
+
+    def _store(self, checks: list[LinkCheck], previous: dict[str, LinkCheck], report: LinkCheckReport) -> None:
+        """Upsert the checks of a batch in one transaction and count them in the report."""
+        statement = insert(LinkCheckDAO)
+        statement = statement.on_conflict_do_update(
+            index_elements=[LinkCheckDAO.url],
+            set_={
+                column: statement.excluded[column]
+                for column in ("status", "status_code", "error", "etag", "last_modified", "checked_at", "failures")
+            },
+        )
+        try:
+            self.db.session.execute(
+                statement,
+                [
+                    {
+                        "url": check.url,
+                        "status": check.status,
+                        "status_code": check.status_code,
+                        "error": check.error,
+                        "etag": check.etag,
+                        "last_modified": check.last_modified,
+                        "checked_at": check.checked_at,
+                        "failures": check.failures,
+                    }
+                    for check in checks
+                ],
+            )
+            self.db.session.commit()
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            DB_ERRORS.inc(operation="links")
+            self.logger.error(f"SQLAlchemy error storing {len(checks)} link checks: {e}")
+            raise
+        WRITES.inc(len(checks), operation="links")
+
+        for check in checks:
+            report.checked += 1
+            if check.broken:
+                report.broken += 1
+                self.logger.warning(f"Broken link {check.url}: {check.reason}")
+            else:
+                report.ok += 1
+                report.not_modified += check.status_code == 304
+            old: LinkCheck | None = previous.get(check.url)
+            if (old.status if old is not None else LINK_OK) != check.status:
+                report.changed += 1
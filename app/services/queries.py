@@ -0,0 +1,225 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Query builder for the race listing.
+Translates RaceFilter into SQL WHERE/ORDER BY clauses and keyset cursors into range conditions.
+"""
+import base64
+import binascii
+import math
+import re
+from datetime import datetime, time, timedelta
+from typing import Any
+
+from sqlalchemy import DateTime, Select, TextClause, TextualSelect, bindparam, select, text, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.dtos import RaceFilter, RaceSort
+from app.models.cities import GEO_INDEX_TABLE, CityDAO
+from app.models.races import RaceDAO
+from app.models.search import SEARCH_TABLE
+
+# Columns selected by the fast read path, in RaceRow order
+RACE_COLUMNS: tuple[InstrumentedAttribute[Any], ...] = (
+    RaceDAO.id,
+    RaceDAO.name,
+    RaceDAO.time,
+    RaceDAO.city,
+    RaceDAO.distance,
+    RaceDAO.website,
+)
+
+# Column used as primary sort key for each sort option
+SORT_COLUMNS: dict[str, InstrumentedAttribute[Any]] = {
+    "time": RaceDAO.time,
+    "distance": RaceDAO.distance,
+}
+
+# Upper bound of the city range: the city itself plus any "(province)" or spaced qualifier,
+# so "Roma" matches "Roma" and "Roma(RM)" but not "Romagnano"
+CITY_UPPER_SUFFIX = "(\U0010ffff"
+
+
+# Full-text ranking: a hit in the name weighs more than a hit in the city
+SEARCH_SQL: TextClause = text(
+    f"""
+    SELECT race.id, race.name, race.time, race.city, race.distance, race.website
+    FROM {SEARCH_TABLE} JOIN race ON race.id = {SEARCH_TABLE}.rowid
+    WHERE {SEARCH_TABLE} MATCH :match AND race.deleted_at IS NULL
+    ORDER BY bm25({SEARCH_TABLE}, 10.0, 1.0), race.time
+    LIMIT :limit
+    """
+)
+SEARCH_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Proximity search: the R*Tree finds the localities inside the bounding box, ix_race_city_id_time their races
+NEARBY_SQL: TextClause = text(
+    f"""
+    SELECT race.id, race.name, race.time, race.city, race.distance, race.website, city.latitude, city.longitude
+    FROM {GEO_INDEX_TABLE}
+    JOIN city ON city.id = {GEO_INDEX_TABLE}.id
+    JOIN race ON race.city_id = city.id
+    WHERE {GEO_INDEX_TABLE}.min_lat >= :min_lat AND {GEO_INDEX_TABLE}.max_lat <= :max_lat
+    AND {GEO_INDEX_TABLE}.min_lon >= :min_lon AND {GEO_INDEX_TABLE}.max_lon <= :max_lon
+    AND race.deleted_at IS NULL AND (:date_from IS NULL OR race.time >= :date_from)
+    """
+).bindparams(bindparam("date_from", type_=DateTime()))
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LATITUDE = 111.32
+
+
+class InvalidCursorError(ValueError):
+    """Custom exception for pagination cursors that cannot be decoded."""
+
+    pass
+
+
+def _sort_key(sort: RaceSort) -> tuple[str, bool]:
+    """Split a sort option into its column name and a descending flag."""
+    return sort.lstrip("-"), sort.startswith("-")
+
+
+def encode_cursor(race: Any, sort: RaceSort = "time") -> str:
+    """Encode the (sort value, id) position of a race into an opaque URL-safe cursor."""
+    column, _ = _sort_key(sort)
+    value: Any = getattr(race, column)
+    value_string: str = value.isoformat() if isinstance(value, datetime) else str(value)
+    raw: str = f"{column}|{value_string}|{race.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: RaceSort = "time") -> tuple[Any, int]:
+    """Decode a cursor produced by encode_cursor for the same sort. Raises InvalidCursorError if malformed."""
+    column, _ = _sort_key(sort)
+    try:
+        padded: str = cursor + "=" * (-len(cursor) % 4)
+        raw: str = base64.urlsafe_b64decode(padded.encode()).decode()
+        cursor_column, value_string, id_string = raw.split("|")
+        if cursor_column != column:
+            raise ValueError(f"cursor sorts by '{cursor_column}', not '{column}'")
+        value: Any = datetime.fromisoformat(value_string) if column == "time" else int(value_string)
+        return value, int(id_string)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursorError(f"Invalid cursor '{cursor}'") from e
+
+
+def build_match_expression(query: str) -> str | None:
+    """
+    Turn free text into an FTS5 MATCH expression where every word is a quoted prefix.
+
+    "maratonina ost" becomes '"maratonina"* "ost"*' (all words must match); quoting
+    neutralizes FTS5 operators in user input. Returns None if the query has no words.
+    """
+    tokens: list[str] = SEARCH_TOKEN_PATTERN.findall(query.lower())
+    return " ".join(f'"{token}"*' for token in tokens) or None
+
+
+def search_statement(match: str, limit: int) -> TextualSelect:
+    """Return a statement selecting the RACE_COLUMNS of the best ranked races for an FTS5 MATCH expression."""
+    return SEARCH_SQL.bindparams(match=match, limit=limit).columns(*RACE_COLUMNS)
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> tuple[float, float, float, float]:
+    """Return the (min_lat, max_lat, min_lon, max_lon) box enclosing the circle of radius_km around a point."""
+    delta_lat: float = radius_km / KM_PER_DEGREE_LATITUDE
+    cos_lat: float = math.cos(math.radians(latitude))
+    # A degree of longitude shrinks towards the poles; near them the box spans every longitude
+    delta_lon: float = radius_km / (KM_PER_DEGREE_LATITUDE * cos_lat) if cos_lat > 0.01 else 180.0
+    return (
+        max(latitude - delta_lat, -90.0),
+        min(latitude + delta_lat, 90.0),
+        max(longitude - delta_lon, -180.0),
+        min(longitude + delta_lon, 180.0),
+    )
+
+
+def haversine_km(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    """Return the great-circle distance between two points in kilometers."""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    d_phi: float = phi2 - phi1
+    d_lambda: float = math.radians(longitude2 - longitude1)
+    a: float = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def nearby_statement(latitude: float, longitude: float, radius_km: float, date_from: datetime | None) -> TextualSelect:
+    """
+    Return a statement selecting the RACE_COLUMNS, latitude and longitude of the races in the bounding box.
+
+    Only the candidates of the box are returned: callers keep those within radius_km.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    return NEARBY_SQL.bindparams(
+        min_lat=min_lat, max_lat=max_lat, min_lon=min_lon, max_lon=max_lon, date_from=date_from
+    ).columns(*RACE_COLUMNS, CityDAO.latitude, CityDAO.longitude)
+
+
+class RaceQueryBuilder:
+    """
+    Build SELECT statements over the race table.
+
+    Every filter becomes a sargable condition on an indexed column
+    (ix_race_time, ix_race_city_time, ix_race_distance, ix_race_city_distance),
+    so filtering and sorting never happen in Python.
+
+    Usage:
+        statement = RaceQueryBuilder(filters).page(limit=50, after=cursor).build()
+    """
+
+    def __init__(self, filters: RaceFilter | None = None, statement: Select[Any] | None = None) -> None:
+        self.filters: RaceFilter = filters or RaceFilter()
+        self.statement: Select[Any] = statement if statement is not None else select(RaceDAO)
+        self._apply_filters()
+
+    def _apply_filters(self) -> None:
+        """Translate the filters into WHERE conditions (deleted races are never selected)."""
+        filters: RaceFilter = self.filters
+        self.statement = self.statement.where(RaceDAO.deleted_at.is_(None))
+        if filters.date_from is not None:
+            self.statement = self.statement.where(RaceDAO.time >= datetime.combine(filters.date_from, time.min))
+        if filters.date_to is not None:
+            # date_to is inclusive: keep everything before the following midnight
+            upper: datetime = datetime.combine(filters.date_to + timedelta(days=1), time.min)
+            self.statement = self.statement.where(RaceDAO.time < upper)
+        if filters.city is not None:
+            # City match as a narrow range so it can use the city indexes
+            self.statement = self.statement.where(
+                RaceDAO.city >= filters.city, RaceDAO.city < filters.city + CITY_UPPER_SUFFIX
+            )
+        if filters.distance_min is not None:
+            self.statement = self.statement.where(RaceDAO.distance >= filters.distance_min)
+        if filters.distance_max is not None:
+            self.statement = self.statement.where(RaceDAO.distance <= filters.distance_max)
+
+    def page(self, limit: int, after: str | None = None, before: str | None = None) -> "RaceQueryBuilder":
+        """
+        Restrict the statement to one keyset page of at most limit + 1 rows.
+
+        With before, rows are returned in reverse sort order; the caller restores the order.
+        Raises InvalidCursorError if a cursor cannot be decoded.
+        """
+        column_name, descending = _sort_key(self.filters.sort)
+        column: InstrumentedAttribute[Any] = SORT_COLUMNS[column_name]
+        position = tuple_(column, RaceDAO.id)
+
+        # Walking backwards flips both the comparison and the order
+        backwards: bool = before is not None
+        reverse: bool = descending != backwards
+        cursor: str | None = before if backwards else after
+        if cursor is not None:
+            bound: tuple[Any, int] = decode_cursor(cursor, sort=self.filters.sort)
+            self.statement = self.statement.where(position < bound if reverse else position > bound)
+
+        if reverse:
+            self.statement = self.statement.order_by(column.desc(), RaceDAO.id.desc())
+        else:
+            self.statement = self.statement.order_by(column, RaceDAO.id)
+        # Fetch one extra row to know whether another page exists in the walking direction
+        self.statement = self.statement.limit(limit + 1)
+        return self
+
+    def build(self) -> Select[Any]:
+        """Return the SELECT statement."""
+        return self.statement
@@ -2,14 +2,79 @@
 # Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
 # Licensed under the MIT License. See LICENSE.md for details.
 # -----------------------------------------------------------------------------
-from typing import Any
+import time
+from collections import Counter
+from collections.abc import Callable, Sequence
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import Any, TypeVar
 
+from sqlalchemy import Executable, Row, case, insert, literal, select, update
 from sqlalchemy.exc import SQLAlchemyError
 
 from app import db
+from app.core import settings
+from app.core.config import GeoConfig
 from app.core.log import LoggerManager
-from app.dtos import Race  # Pydantic v2 DTO
+from app.core.metrics import DB_ERRORS, ROWS_RETURNED, WRITES
+from app.dtos import (  # Pydantic v2 DTO
+    BatchItemResult,
+    BatchResult,
+    City,
+    DataVersion,
+    DuplicateMatch,
+    NearbyRace,
+    NearbyRaces,
+    Race,
+    RaceBatch,
+    RaceFilter,
+    RacePage,
+    RaceRecord,
+    RaceRow,
+    RaceStats,
+    StatsBucket,
+)
+from app.models import find_city, read_data_version, read_stats
+from app.models.links import LINK_BROKEN, LinkCheckDAO
 from app.models.races import RaceDAO
+from app.models.stats import DIMENSIONS, DISTANCE_BUCKETS
+from app.services.cache import RaceCache, get_race_cache
+from app.services.changes import publish_changes
+from app.services.duplicates import DuplicateDetector
+from app.services.queries import (
+    RACE_COLUMNS,
+    RaceQueryBuilder,
+    build_match_expression,
+    encode_cursor,
+    haversine_km,
+    nearby_statement,
+    search_statement,
+)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+DEFAULT_SEARCH_LIMIT = 20
+MAX_BATCH_SIZE = 1000
+# Races per bulk UPDATE statement: each race adds a dozen bound parameters
+UPDATE_CHUNK_SIZE = 200
+# Columns written by create and update, in RACE_COLUMNS order
+WRITE_COLUMNS: tuple[str, ...] = ("name", "time", "city", "distance", "website")
+MONTH_NAMES: tuple[str, ...] = (
+    "Gennaio",
+    "Febbraio",
+    "Marzo",
+    "Aprile",
+    "Maggio",
+    "Giugno",
+    "Luglio",
+    "Agosto",
+    "Settembre",
+    "Ottobre",
+    "Novembre",
+    "Dicembre",
+)
+
+T = TypeVar("T")
 
 
 class RaceNotFoundError(Exception):
@@ -18,67 +83,460 @@ class RaceNotFoundError(Exception):
     pass
 
 
+class DuplicateRaceError(Exception):
+    """A race was not created because it looks like existing races (matches, most similar first)."""
+
+    def __init__(self, message: str, matches: list[DuplicateMatch]) -> None:
+        super().__init__(message)
+        self.matches: list[DuplicateMatch] = matches
+
+
 class RaceService:
-    def __init__(self) -> None:
+    """
+    Race use cases on top of the database.
+
+    Reads return RaceRecord objects: with fast_reads (the default) they select plain
+    column tuples and build read-only RaceRow objects, skipping ORM entities and Pydantic
+    validation for rows that come from our own schema; otherwise they validate ORM
+    entities into Race DTOs. Writes always take validated Race DTOs.
+    """
+
+    def __init__(self, cache: RaceCache | None = None, fast_reads: bool | None = None) -> None:
         self.db = db
+        self.cache: RaceCache = cache or get_race_cache()
+        self.fast_reads: bool = settings.database.fast_reads if fast_reads is None else fast_reads
+        self.duplicates: DuplicateDetector = DuplicateDetector()
         self.logger = LoggerManager.get_logger(self.__class__.__name__)
 
-    def get_all_races(self) -> list[Race]:
-        """Retrieve all races from the database as Pydantic DTOs."""
-        races_dao: list[RaceDAO] = RaceDAO.query.all()
+    def _fetch_rows(self, statement: Executable) -> list[RaceRow]:
+        """Execute a statement selecting RACE_COLUMNS and build RaceRow objects from its rows."""
+        return list(map(RaceRow._make, self.db.session.execute(statement)))
+
+    def _read(self, operation: str, key: str, loader: Callable[[], T]) -> T:
+        """
+        Run a cached read, counting database errors under the operation (also the cache namespace).
+
+        The entry is keyed on the database data version read first, so a write of another
+        process is seen at once: the value returned is never older than that version.
+        """
+        try:
+            version: int | None = None
+            if self.cache.enabled:
+                version = read_data_version(self.db.session.connection())[0]
+            return self.cache.get_or_load(namespace=operation, key=key, loader=loader, version=version)
+        except SQLAlchemyError as e:
+            DB_ERRORS.inc(operation=operation)
+            self.logger.error(f"SQLAlchemy error reading {operation}: {e}")
+            raise
+
+    def get_data_version(self) -> DataVersion:
+        """
+        Return the version and last-modified time of the race table (never cached).
+
+        Database triggers bump it on every committed write, whichever process performs it,
+        so it is a cheap single-row lookup to validate anything rendered from the races.
+        """
+        try:
+            version, last_modified = read_data_version(self.db.session.connection())
+        except SQLAlchemyError as e:
+            DB_ERRORS.inc(operation="data_version")
+            self.logger.error(f"SQLAlchemy error reading the data version: {e}")
+            raise
+        return DataVersion(version=version, last_modified=last_modified)
+
+    def get_all_races(self) -> list[RaceRecord]:
+        """Retrieve all races from the database (cached)."""
+        races: list[RaceRecord] = self._read(
+            operation="all_races", key=str(self.fast_reads), loader=self._load_all_races
+        )
+        ROWS_RETURNED.inc(len(races), operation="all_races")
+        return races
+
+    def _load_all_races(self) -> list[RaceRecord]:
+        """Load all races from the database."""
+        if self.fast_reads:
+            return list(self._fetch_rows(select(*RACE_COLUMNS).where(RaceDAO.deleted_at.is_(None))))
+        races_dao: list[RaceDAO] = RaceDAO.query.filter(RaceDAO.deleted_at.is_(None)).all()
         return [Race.model_validate(obj=r) for r in races_dao]
 
-    def get_race_by_id(self, race_id: int) -> Race:
-        """Retrieve a single race by ID. Raises RaceNotFoundError if missing."""
-        race_dao: RaceDAO | None = self.db.session.get(entity=RaceDAO, ident=race_id)
-        if race_dao is None:
+    def get_races_page(
+        self,
+        filters: RaceFilter | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: str | None = None,
+        before: str | None = None,
+    ) -> RacePage:
+        """
+        Retrieve a page of filtered races using keyset pagination on (sort key, id).
+
+        Filtering, sorting and paging are pushed down to SQL by RaceQueryBuilder, so the
+        cost of a page does not depend on its position in the table or on the table size.
+        Pages are cached. Raises InvalidCursorError if a cursor cannot be decoded.
+        """
+        filters = filters or RaceFilter()
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        key: str = f"{self.fast_reads}|{filters.model_dump_json()}|{limit}|{after}|{before}"
+        page: RacePage = self._read(
+            operation="races_page",
+            key=key,
+            loader=lambda: self._load_races_page(filters=filters, limit=limit, after=after, before=before),
+        )
+        ROWS_RETURNED.inc(len(page.races), operation="races_page")
+        return page
+
+    def _load_races_page(self, filters: RaceFilter, limit: int, after: str | None, before: str | None) -> RacePage:
+        """Load a page of races from the database."""
+        builder: RaceQueryBuilder = RaceQueryBuilder(
+            filters, statement=select(*RACE_COLUMNS) if self.fast_reads else None
+        )
+        statement = builder.page(limit=limit, after=after, before=before).build()
+
+        races: list[RaceRecord]
+        if self.fast_reads:
+            races = list(self._fetch_rows(statement))
+        else:
+            races = [Race.model_validate(obj=r) for r in self.db.session.scalars(statement)]
+        has_more: bool = len(races) > limit
+        races = races[:limit]
+        if before is not None:
+            races.reverse()
+
+        if not races:
+            return RacePage(races=races, limit=limit)
+
+        if before is not None:
+            next_cursor: str | None = encode_cursor(races[-1], sort=filters.sort)
+            prev_cursor: str | None = encode_cursor(races[0], sort=filters.sort) if has_more else None
+        else:
+            next_cursor = encode_cursor(races[-1], sort=filters.sort) if has_more else None
+            prev_cursor = encode_cursor(races[0], sort=filters.sort) if after is not None else None
+        return RacePage(races=races, limit=limit, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+    def search_races(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> list[RaceRecord]:
+        """
+        Full-text search on race names and cities through the race_fts FTS5 index (cached).
+
+        Every word of the query is matched as a prefix ("marat ost" finds "Maratonina di Ostia")
+        and results are ranked by bm25, with name hits weighing more than city hits.
+        """
+        match: str | None = build_match_expression(query)
+        if match is None:
+            return []
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        races: list[RaceRecord] = self._read(
+            operation="search",
+            key=f"{self.fast_reads}|{match}|{limit}",
+            loader=lambda: self._load_search(match=match, limit=limit),
+        )
+        ROWS_RETURNED.inc(len(races), operation="search")
+        return races
+
+    def _load_search(self, match: str, limit: int) -> list[RaceRecord]:
+        """Run a full-text search against the database."""
+        rows: list[RaceRow] = self._fetch_rows(search_statement(match=match, limit=limit))
+        if self.fast_reads:
+            return list(rows)
+        return [Race.model_validate(obj=row._asdict()) for row in rows]
+
+    def get_race_by_id(self, race_id: int) -> RaceRecord:
+        """Retrieve a single race by ID (cached). Raises RaceNotFoundError if missing."""
+        race: RaceRecord | None = self._read(
+            operation="race", key=f"{self.fast_reads}|{race_id}", loader=lambda: self._load_race(race_id)
+        )
+        if race is None:
             raise RaceNotFoundError(f"Race with id {race_id} does not exist")
-        return Race.model_validate(obj=race_dao)
+        ROWS_RETURNED.inc(operation="race")
+        return race
+
+    def _load_race(self, race_id: int) -> RaceRecord | None:
+        """Load a single race from the database, or None if missing."""
+        if self.fast_reads:
+            rows: list[RaceRow] = self._fetch_rows(
+                select(*RACE_COLUMNS).where(RaceDAO.id == race_id, RaceDAO.deleted_at.is_(None))
+            )
+            return rows[0] if rows else None
+        race_dao: RaceDAO | None = self.db.session.get(entity=RaceDAO, ident=race_id)
+        return Race.model_validate(obj=race_dao) if race_dao is not None and race_dao.deleted_at is None else None
+
+    def get_stats(self) -> RaceStats:
+        """
+        Return the race counts per month, city and distance range (cached).
+
+        Reads the counters of the summary table kept up to date by database triggers, so
+        the cost grows with the number of buckets, not with the number of races.
+        """
+        return self._read(operation="stats", key="", loader=self._load_stats)
+
+    def _load_stats(self) -> RaceStats:
+        """Load the summary table counters and label them."""
+        buckets: dict[str, list[StatsBucket]] = {dimension: [] for dimension in DIMENSIONS}
+        for row in read_stats(self.db.session.connection()):
+            buckets[row.dimension].append(StatsBucket(key=row.bucket, label=row.bucket, races=row.races))
+
+        distance_labels: dict[int, str] = dict(DISTANCE_BUCKETS)
+        by_distance: list[StatsBucket] = [
+            replace(bucket, label=distance_labels.get(int(bucket.key), bucket.key))
+            for bucket in sorted(buckets["distance"], key=lambda bucket: int(bucket.key))
+        ]
+        by_month: list[StatsBucket] = [
+            replace(bucket, label=f"{MONTH_NAMES[int(bucket.key[5:7]) - 1]} {bucket.key[:4]}")
+            for bucket in sorted(buckets["month"], key=lambda bucket: bucket.key)
+        ]
+        return RaceStats(
+            total=sum(bucket.races for bucket in by_distance),
+            by_month=by_month,
+            by_city=sorted(buckets["city"], key=lambda bucket: (-bucket.races, bucket.key)),
+            by_distance=by_distance,
+        )
+
+    def find_city(self, name: str) -> City | None:
+        """Return the gazetteer locality of a city name ("Tivoli", "Tivoli (RM)"), or None if unknown (cached)."""
+        return self._read(operation="city", key=name, loader=lambda: self._load_city(name))
+
+    def _load_city(self, name: str) -> City | None:
+        """Resolve a city name against the gazetteer."""
+        row: Row | None = find_city(self.db.session.connection(), name)
+        return City(*row) if row is not None else None
+
+    def get_races_nearby(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float | None = None,
+        limit: int | None = None,
+        date_from: datetime | None = None,
+    ) -> NearbyRaces:
+        """
+        Return the races held within radius_km of a point, nearest first (cached).
+
+        The city_rtree R*Tree selects the localities inside the bounding box of the circle
+        and only their races are read; the exact distance is then computed for those
+        candidates alone. Races whose city is not in the gazetteer are never returned.
+        Raises ValueError for coordinates out of range.
+        """
+        if not (-90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0):
+            raise ValueError(f"Invalid coordinates ({latitude}, {longitude})")
+        config: GeoConfig = settings.geo
+        radius_km = min(radius_km or config.default_radius_km, config.max_radius_km)
+        limit = max(1, min(limit or config.page_size, config.max_page_size))
+        races: list[NearbyRace] = self._read(
+            operation="nearby",
+            key=f"{latitude:.5f}|{longitude:.5f}|{radius_km}|{limit}|{date_from}",
+            loader=lambda: self._load_nearby(latitude, longitude, radius_km, limit, date_from),
+        )
+        ROWS_RETURNED.inc(len(races), operation="nearby")
+        return NearbyRaces(latitude=latitude, longitude=longitude, radius_km=radius_km, races=races)
+
+    def _load_nearby(
+        self, latitude: float, longitude: float, radius_km: float, limit: int, date_from: datetime | None
+    ) -> list[NearbyRace]:
+        """Read the races of the bounding box and keep the nearest ones within the radius."""
+        races: list[NearbyRace] = []
+        for row in self.db.session.execute(nearby_statement(latitude, longitude, radius_km, date_from)):
+            distance_km: float = haversine_km(latitude, longitude, row.latitude, row.longitude)
+            if distance_km <= radius_km:
+                races.append(NearbyRace(race=RaceRow._make(row[: len(RACE_COLUMNS)]), distance_km=distance_km))
+        races.sort(key=lambda nearby: (nearby.distance_km, nearby.race.time, nearby.race.id))
+        return races[:limit]
 
     def delete_race_by_id(self, race_id: int) -> None:
-        """Delete a race by ID. Raises RaceNotFoundError if not found."""
+        """
+        Delete a race by ID. Raises RaceNotFoundError if not found.
+
+        The row is kept as a tombstone (deleted_at set) so the change feed can publish the
+        deletion; compact_tombstones() removes it for good once every client has synced.
+        """
         try:
             deleted_rows = (
-                self.db.session.query(RaceDAO).filter(RaceDAO.id == race_id).delete(synchronize_session=False)
+                self.db.session.query(RaceDAO)
+                .filter(RaceDAO.id == race_id, RaceDAO.deleted_at.is_(None))
+                .update({RaceDAO.deleted_at: datetime.now(timezone.utc)}, synchronize_session=False)
             )
             if deleted_rows == 0:
                 raise RaceNotFoundError(f"Race with id {race_id} does not exist")
             self.db.session.commit()
+            self.cache.invalidate()
+            publish_changes()
+            WRITES.inc(operation="delete")
             self.logger.info(f"Deleted race {race_id}")
         except SQLAlchemyError as e:
             self.db.session.rollback()
+            DB_ERRORS.inc(operation="delete")
             self.logger.error(f"SQLAlchemy error deleting race {race_id}: {e}")
             raise
 
-    def create_new_race(self, race: Race) -> Race:
-        """Create a new race and return it as a DTO."""
+    def get_broken_links(self) -> dict[str, str]:
+        """Return the race websites found broken by the link checker, with the cause ("HTTP 404") (cached)."""
+        return self._read(operation="broken_links", key="", loader=self._load_broken_links)
+
+    def _load_broken_links(self) -> dict[str, str]:
+        """Load the broken links from the link checker results."""
+        rows = self.db.session.execute(
+            select(LinkCheckDAO.url, LinkCheckDAO.status_code, LinkCheckDAO.error).where(
+                LinkCheckDAO.status == LINK_BROKEN
+            )
+        )
+        return {row.url: f"HTTP {row.status_code}" if row.status_code is not None else row.error or "" for row in rows}
+
+    def find_duplicates(self, race: Race) -> list[DuplicateMatch]:
+        """
+        Return the existing races that look like race, most similar first.
+
+        Only a handful of candidates is read: the races of the same day and the races of
+        the nearby days whose names share most trigrams (see DuplicateDetector).
+        """
+        return self.duplicates.find_duplicates(race)
+
+    def create_new_race(self, race: Race, check_duplicates: bool = False) -> Race:
+        """
+        Create a new race and return it as a DTO.
+
+        With check_duplicates, raises DuplicateRaceError instead if the race looks like existing races.
+        """
+        if check_duplicates:
+            matches: list[DuplicateMatch] = self.find_duplicates(race)
+            if matches:
+                raise DuplicateRaceError(
+                    f"Race '{race.name}' looks like existing race {matches[0].race.id}", matches=matches
+                )
         try:
             data: dict[str, Any] = race.model_dump(exclude={"id"})
             race_dao: RaceDAO = RaceDAO(**data)
             self.db.session.add(instance=race_dao)
             self.db.session.commit()
+            self.cache.invalidate()
+            publish_changes()
+            WRITES.inc(operation="create")
             self.logger.info(f"Created new race '{race.name}' with ID {race_dao.id}")
             return Race.model_validate(obj=race_dao)
         except SQLAlchemyError as e:
             self.db.session.rollback()
+            DB_ERRORS.inc(operation="create")
             self.logger.error(f"SQLAlchemy error creating race '{race.name}': {e}")
             raise
 
     def update_race(self, race_id: int, race: Race) -> Race:
-        """Update an existing race with data from a DTO."""
+        """Update an existing race with data from a DTO, with a single UPDATE ... RETURNING."""
+        statement = (
+            update(RaceDAO)
+            .where(RaceDAO.id == race_id, RaceDAO.deleted_at.is_(None))
+            .values(**race.model_dump(include=set(WRITE_COLUMNS)))
+            .returning(*RACE_COLUMNS)
+        )
         try:
-            race_dao: RaceDAO | None = self.db.session.get(entity=RaceDAO, ident=race_id)
-            if race_dao is None:
+            row: Row[Any] | None = self.db.session.execute(
+                statement, execution_options={"synchronize_session": False}
+            ).first()
+            if row is None:
+                self.db.session.rollback()
                 raise RaceNotFoundError(f"Race with id {race_id} does not exist")
-
-            data: dict[str, Any] = race.model_dump(exclude={"id"})
-
-            for field, value in data.items():
-                setattr(race_dao, field, value)
             self.db.session.commit()
+            self.cache.invalidate()
+            publish_changes()
+            WRITES.inc(operation="update")
             self.logger.info(f"Updated race {race_id}")
-            return Race.model_validate(obj=race_dao)
+            return Race.model_validate(obj=row._asdict())
         except SQLAlchemyError as e:
             self.db.session.rollback()
+            DB_ERRORS.inc(operation="update")
             self.logger.error(f"SQLAlchemy error updating race {race_id}: {e}")
             raise
+
+    def apply_batch(self, batch: RaceBatch) -> BatchResult:
+        """
+        Create, update and delete many races in one transaction and report the outcome of each item.
+
+        Creates are one multi-row INSERT, updates one UPDATE per UPDATE_CHUNK_SIZE races
+        (a CASE on id per column) and deletes one UPDATE setting deleted_at, all with
+        RETURNING: races that do not exist (or are deleted) are reported as not_found and
+        the rest is committed. Duplicates are not checked.
+        Raises ValueError if the batch is too large or names a race twice.
+        """
+        if batch.size > MAX_BATCH_SIZE:
+            raise ValueError(f"A batch holds at most {MAX_BATCH_SIZE} items, got {batch.size}")
+        if any(race.id is None for race in batch.update):
+            raise ValueError("Every race to update needs its id")
+        ids: Counter[int] = Counter([race.id for race in batch.update if race.id is not None] + batch.delete)
+        repeated: list[int] = sorted(race_id for race_id, count in ids.items() if count > 1)
+        if repeated:
+            raise ValueError(f"Races appearing more than once in the batch: {repeated}")
+
+        started: float = time.perf_counter()
+        result: BatchResult = BatchResult()
+        try:
+            created: list[RaceRow] = self._insert_races(batch.create)
+            updated: dict[int, RaceRow] = {}
+            for start in range(0, len(batch.update), UPDATE_CHUNK_SIZE):
+                updated.update(self._update_races(batch.update[start : start + UPDATE_CHUNK_SIZE]))
+            deleted: set[int] = self._delete_races(batch.delete)
+            self.db.session.commit()
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            DB_ERRORS.inc(operation="batch")
+            self.logger.error(f"SQLAlchemy error applying a batch of {batch.size} races: {e}")
+            raise
+
+        for index, row in enumerate(created):
+            result.items.append(BatchItemResult(operation="create", index=index, status="created", id=row.id, race=row))
+        for index, race in enumerate(batch.update):
+            race_id: int = race.id or 0
+            status: str = "updated" if race_id in updated else "not_found"
+            result.items.append(
+                BatchItemResult(operation="update", index=index, status=status, id=race_id, race=updated.get(race_id))
+            )
+        for index, race_id in enumerate(batch.delete):
+            status = "deleted" if race_id in deleted else "not_found"
+            result.items.append(BatchItemResult(operation="delete", index=index, status=status, id=race_id))
+        result.created, result.updated, result.deleted = len(created), len(updated), len(deleted)
+        result.not_found = batch.size - result.created - result.updated - result.deleted
+        result.elapsed_seconds = time.perf_counter() - started
+
+        if result.created or result.updated or result.deleted:
+            self.cache.invalidate()
+            publish_changes()
+            WRITES.inc(result.created, operation="create")
+            WRITES.inc(result.updated, operation="update")
+            WRITES.inc(result.deleted, operation="delete")
+        self.logger.info(
+            f"Applied a batch of {batch.size} races in {result.elapsed_seconds * 1000:.1f} ms: {result.created} "
+            f"created, {result.updated} updated, {result.deleted} deleted, {result.not_found} not found"
+        )
+        return result
+
+    def _insert_races(self, races: Sequence[Race]) -> list[RaceRow]:
+        """Insert races with one multi-row INSERT ... RETURNING, in order."""
+        if not races:
+            return []
+        statement = insert(RaceDAO).returning(*RACE_COLUMNS, sort_by_parameter_order=True)
+        rows = self.db.session.execute(statement, [race.model_dump(include=set(WRITE_COLUMNS)) for race in races])
+        return list(map(RaceRow._make, rows))
+
+    def _update_races(self, races: Sequence[Race]) -> dict[int, RaceRow]:
+        """Update live races with one UPDATE ... SET column = CASE id ... END ... RETURNING; return them by id."""
+        values: dict[str, Any] = {
+            column: case(
+                {race.id: literal(getattr(race, column), RaceDAO.__table__.c[column].type) for race in races},
+                value=RaceDAO.id,
+            )
+            for column in WRITE_COLUMNS
+        }
+        statement = (
+            update(RaceDAO)
+            .where(RaceDAO.id.in_([race.id for race in races]), RaceDAO.deleted_at.is_(None))
+            .values(**values)
+            .returning(*RACE_COLUMNS)
+        )
+        rows = self.db.session.execute(statement, execution_options={"synchronize_session": False})
+        return {row.id: row for row in map(RaceRow._make, rows)}
+
+    def _delete_races(self, race_ids: list[int]) -> set[int]:
+        """Turn live races into tombstones with one UPDATE ... RETURNING; return the ids deleted."""
+        if not race_ids:
+            return set()
+        statement = (
+            update(RaceDAO)
+            .where(RaceDAO.id.in_(race_ids), RaceDAO.deleted_at.is_(None))
+            .values(deleted_at=datetime.now(timezone.utc))
+            .returning(RaceDAO.id)
+        )
+        return set(self.db.session.execute(statement, execution_options={"synchronize_session": False}).scalars())
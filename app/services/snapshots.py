@@ -0,0 +1,178 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Pre-rendered snapshot of the race calendar.
+The first page of the race list (index.html), the full calendar as races.json and
+races.ics, and their gzip siblings are written to a directory, each atomically
+(temporary file, then rename). Writes of this process schedule a new publication on a
+background thread, debounced so a burst of edits is published once. The app serves the
+files directly while their VERSION is current (writes of other processes, e.g. CLI
+commands, do not republish them), and a web server can serve the same directory without
+calling the app.
+"""
+import gzip
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import cast
+
+from flask import Flask, render_template
+
+from app.core.assets import ENCODINGS, write_atomic
+from app.core.config import SnapshotsConfig
+from app.core.log import LoggerManager
+from app.dtos import DataVersion, RaceFilter, RacePage
+from app.services.changes import add_change_listener, remove_change_listener
+from app.services.exports import ExportFormat, RaceExporter
+from app.services.races import RaceService
+
+# Key of the publisher in app.extensions
+EXTENSION_NAME = "snapshots"
+INDEX_FILE = "index.html"
+# Published file -> export format
+CALENDAR_FILES: dict[str, str] = {"races.json": "json", "races.ics": "ics"}
+# Holds the data version of the last publication
+VERSION_FILE = "VERSION"
+
+
+class SnapshotPublisher:
+    """
+    Publish the race list and calendar files, now or debounced on a background thread.
+
+    Usage:
+        publisher = SnapshotPublisher(app, settings.snapshots)
+        publisher.publish()   # synchronously, e.g. from the CLI
+        publisher.schedule()  # after a write (publish_changes() does it once configured)
+    """
+
+    def __init__(self, app: Flask, config: SnapshotsConfig) -> None:
+        self.app: Flask = app
+        self.config: SnapshotsConfig = config
+        self.directory: Path = Path(app.root_path) / config.directory
+        self._condition = threading.Condition()
+        self._due: float | None = None
+        self._first_scheduled: float = 0.0
+        self._thread: threading.Thread | None = None
+        self.logger = LoggerManager.get_logger(self.__class__.__name__)
+
+    def path(self, filename: str) -> Path | None:
+        """Return the published file, or None if it has not been published yet."""
+        path: Path = self.directory / filename
+        return path if path.is_file() else None
+
+    def published_version(self) -> int | None:
+        """Return the data version the published files were rendered from, or None if not published yet."""
+        try:
+            return int((self.directory / VERSION_FILE).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def encodings(self, filename: str) -> list[str]:
+        """Return the encodings whose precompressed sibling of a published file exists."""
+        return [name for name, suffix in ENCODINGS.items() if (self.directory / (filename + suffix)).is_file()]
+
+    def publish(self) -> DataVersion:
+        """Render and write every snapshot file; return the data version they were rendered from."""
+        started: float = time.perf_counter()
+        # url_for() and the templates need a request: render the list as a plain GET / would
+        with self.app.test_request_context("/"):
+            service: RaceService = RaceService()
+            version: DataVersion = service.get_data_version()
+            filters: RaceFilter = RaceFilter()
+            page: RacePage = service.get_races_page(filters=filters)
+            html: str = render_template(
+                template_name_or_list="index.html",
+                races=page.races,
+                page=page,
+                filters=filters,
+                filter_args={},
+                broken_links=service.get_broken_links(),
+            )
+            self._write(INDEX_FILE, html.encode("utf-8"))
+
+            exporter: RaceExporter = RaceExporter()
+            for filename, export_format in CALENDAR_FILES.items():
+                chunks: Iterator[str] = exporter.iter_export(export_format=cast(ExportFormat, export_format))
+                self._write(filename, b"".join(chunk.encode("utf-8") for chunk in chunks))
+            write_atomic(self.directory / VERSION_FILE, f"{version.version}\n".encode())
+
+        self.logger.info(
+            f"Published snapshot of version {version.version} to {self.directory} "
+            f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        return version
+
+    def _write(self, filename: str, data: bytes) -> None:
+        """Write a snapshot file and its gzip sibling, the sibling first so it is never older than the file."""
+        write_atomic(self.directory / (filename + ENCODINGS["gzip"]), gzip.compress(data, compresslevel=9, mtime=0))
+        write_atomic(self.directory / filename, data)
+
+    def schedule(self) -> None:
+        """
+        Publish on the background thread once no write happened for debounce_seconds.
+
+        A steady stream of writes postpones the publication by at most max_delay_seconds.
+        """
+        with self._condition:
+            now: float = time.monotonic()
+            if self._due is None:
+                self._first_scheduled = now
+            self._due = min(now + self.config.debounce_seconds, self._first_scheduled + self.config.max_delay_seconds)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="snapshot-publisher", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self) -> None:
+        """Background thread: wait for the scheduled time, then publish."""
+        while True:
+            with self._condition:
+                while self._due is None:
+                    self._condition.wait()
+                delay: float = self._due - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(timeout=delay)
+                    continue
+                self._due = None
+            try:
+                self.publish()
+            except Exception as e:
+                # The previous snapshot stays in place; the next write schedules another attempt
+                self.logger.error(f"Snapshot publication failed: {e}")
+
+
+def get_snapshot_publisher(app: Flask) -> SnapshotPublisher | None:
+    """Return the publisher of the app, or None if snapshots are disabled."""
+    return app.extensions.get(EXTENSION_NAME)
+
+
+def configure_snapshots(app: Flask, config: SnapshotsConfig) -> SnapshotPublisher | None:
+    """
+    Enable (or disable) the snapshot publisher of an app.
+
+    Nothing is rendered here, so startup stays side-effect free: the files are published
+    by "flask publish-snapshot", by the first write, or on the first request that finds
+    them missing.
+
+    Args:
+        app: Flask application
+        config: snapshot settings (settings.snapshots)
+
+    Usage:
+        configure_snapshots(app, settings.snapshots)
+    """
+    previous: SnapshotPublisher | None = app.extensions.pop(EXTENSION_NAME, None)
+    if previous is not None:
+        remove_change_listener(previous.schedule)
+    if not config.enabled:
+        return None
+    publisher: SnapshotPublisher = SnapshotPublisher(app, config)
+    app.extensions[EXTENSION_NAME] = publisher
+    add_change_listener(publisher.schedule)
+    LoggerManager.get_logger("Snapshots").debug(
+        f"Snapshots: publishing to {publisher.directory} {config.debounce_seconds}s after writes"
+    )
+    return publisher
@@ -0,0 +1,87 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Helpers shared by the benchmarks: a Flask app bound to a throw-away SQLite file
+and a synthetic data generator.
+"""
+
+import csv
+import itertools
+import random
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from flask.app import Flask
+from sqlalchemy import insert
+
+from app import db
+from app.core import settings
+from app.core.assets import configure_assets
+from app.models import RaceDAO, create_schema
+
+ROOT_DIR: Path = Path(__file__).parent.parent
+SAMPLE_CSV: Path = ROOT_DIR / "gare_podistiche.csv"
+CITIES: tuple[str, ...] = ("Roma(RM)", "Ostia(RM)", "Tivoli(RM)", "Frascati(RM)", "Fiumicino(RM)", "Lariano(RM)")
+DISTANCES: tuple[int, ...] = (5000, 10000, 21097, 42195)
+
+
+def create_benchmark_app(db_path: Path) -> Flask:
+    """Create an app serving the race routes from the given SQLite file."""
+    from app.routes.blueprint import races_blueprint
+
+    app: Flask = Flask(
+        import_name=__name__,
+        template_folder=str(ROOT_DIR / "app/templates"),
+        static_folder=str(ROOT_DIR / "app/static"),
+    )
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.secret_key = "benchmark"  # nosec B105
+    db.init_app(app)
+    # base.html links the static files through asset_url()
+    configure_assets(app, settings.assets)
+    app.register_blueprint(blueprint=races_blueprint)
+    with app.app_context():
+        create_schema()
+    return app
+
+
+def synthetic_races(count: int, seed: int = 42) -> Iterator[dict[str, Any]]:
+    """Generate count reproducible races spread over three years."""
+    generator: random.Random = random.Random(seed)
+    base: datetime = datetime(2024, 1, 1, 8, 0)
+    for i in range(count):
+        yield {
+            "name": f"Gara Podistica {i}",
+            "time": base + timedelta(minutes=generator.randrange(3 * 365 * 24 * 4) * 15),
+            "city": generator.choice(CITIES),
+            "distance": generator.choice(DISTANCES),
+            "website": f"https://www.example.com/gare/{i}",
+        }
+
+
+def csv_races(count: int) -> Iterator[dict[str, Any]]:
+    """Derive count races from gare_podistiche.csv, shifting each repetition by one week."""
+    with SAMPLE_CSV.open(encoding="utf-8", newline="") as csv_file:
+        sample: list[list[str]] = [row for row in csv.reader(csv_file) if row]
+    for i, (_, name, time, city, distance, website) in enumerate(itertools.islice(itertools.cycle(sample), count)):
+        week: int = i // len(sample)
+        yield {
+            "name": f"{name} {week}" if week else name,
+            "time": datetime.fromisoformat(time) + timedelta(weeks=week),
+            "city": city,
+            "distance": int(distance),
+            "website": website,
+        }
+
+
+def seed_races(count: int, source: str = "synthetic", batch_size: int = 10000, seed: int = 42) -> None:
+    """Insert count races, synthetic or derived from gare_podistiche.csv, in batches. Requires an app context."""
+    races: Iterator[dict[str, Any]] = synthetic_races(count, seed=seed) if source == "synthetic" else csv_races(count)
+    while batch := list(itertools.islice(races, batch_size)):
+        db.session.execute(insert(RaceDAO), batch)
+        db.session.commit()
@@ -0,0 +1,132 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+HTTP throughput of the Flask development server vs the pre-fork production server.
+
+Each server is started as a subprocess on a free port, against the database in
+config.yml (requests are read-only GETs). Client processes with keep-alive
+connections then request the URLs in a loop for a fixed duration.
+
+Usage:
+    python -m benchmarks.http_throughput --duration 10 --clients 16
+    python -m benchmarks.http_throughput --servers prefork --workers 4 --threads 8
+"""
+import argparse
+import http.client
+import multiprocessing
+import socket
+import subprocess  # nosec B404
+import sys
+import time
+from itertools import cycle
+
+from benchmarks.common import ROOT_DIR
+
+URLS: tuple[str, ...] = ("/races", "/races?city=Roma", "/api/races/search?q=maratona")
+
+
+def free_port() -> int:
+    """Return a TCP port nobody is listening on."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def server_command(server: str, port: int, workers: int, threads: int) -> list[str]:
+    """Return the command line starting the given server."""
+    flask_run: list[str] = [sys.executable, "-m", "flask", "--app", "races", "run", "--port", str(port)]
+    commands: dict[str, list[str]] = {
+        # What run.sh used to start: reloader and debugger enabled
+        "flask-debug": [*flask_run, "--debug"],
+        "flask": [*flask_run, "--no-debug", "--no-reload"],
+        "prefork": [
+            *(sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(port)),
+            *("--workers", str(workers), "--threads", str(threads)),
+        ],
+    }
+    return commands[server]
+
+
+def wait_until_ready(port: int, timeout: float = 30.0) -> None:
+    """Poll the server until it answers or timeout seconds pass."""
+    deadline: float = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/races")
+            connection.getresponse().read()
+            connection.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start within {timeout}s")
+
+
+def client(port: int, duration: float, offset: int) -> list[float]:
+    """Request the URLs over one keep-alive connection for duration seconds; return latencies in seconds."""
+    latencies: list[float] = []
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    urls = cycle(URLS[offset % len(URLS) :] + URLS[: offset % len(URLS)])
+    deadline: float = time.perf_counter() + duration
+    while (started := time.perf_counter()) < deadline:
+        try:
+            connection.request("GET", next(urls))
+            response = connection.getresponse()
+            response.read()
+            if response.getheader("Connection", "").lower() == "close":
+                connection.close()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            continue
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+    return latencies
+
+
+def run_load(port: int, clients: int, duration: float) -> tuple[float, float, float]:
+    """Return (requests per second, p50 ms, p99 ms) for clients concurrent client processes."""
+    with multiprocessing.Pool(processes=clients) as pool:
+        results: list[list[float]] = pool.starmap(client, [(port, duration, i) for i in range(clients)])
+    latencies: list[float] = sorted(latency for result in results for latency in result)
+    if not latencies:
+        return 0.0, 0.0, 0.0
+    return (
+        len(latencies) / duration,
+        latencies[len(latencies) // 2] * 1000,
+        latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servers", nargs="+", default=["flask-debug", "flask", "prefork"], help="Servers to compare")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per server")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent client processes")
+    parser.add_argument("--workers", type=int, default=4, help="prefork worker processes")
+    parser.add_argument("--threads", type=int, default=8, help="prefork threads per worker")
+    args = parser.parse_args()
+
+    print(f"{'server':<14} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for server in args.servers:
+        port: int = free_port()
+        process = subprocess.Popen(  # nosec B603
+            server_command(server, port, args.workers, args.threads),
+            cwd=ROOT_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_ready(port)
+            # Warm up every worker's caches before measuring
+            run_load(port, args.clients, duration=1.0)
+            throughput, p50, p99 = run_load(port, args.clients, args.duration)
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+        print(f"{server:<14} {throughput:>9.0f} {p50:>8.1f} {p99:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
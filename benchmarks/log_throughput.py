@@ -0,0 +1,85 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Log calls per second of the development and production logging pipelines.
+
+Each scenario configures LoggerManager with a console sink (redirected to /dev/null),
+plus a file sink in a temporary directory for the "+file" scenarios, then logs
+application lines and werkzeug access lines. "caller" is the rate seen by the code
+that logs; "drained" includes the time the background writers need to empty their
+queues.
+
+Usage:
+    python -m benchmarks.log_throughput --lines 50000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from app.core.log import LoggerManager, setup_logging
+
+SCENARIOS: dict[str, dict[str, Any]] = {
+    "development": {"mode": "development"},
+    "production": {"mode": "production"},
+    "production+json": {"mode": "production", "serialize": True},
+    "production+sampled": {"mode": "production", "access_log_sampling": {"INFO": 0.1}},
+    "development+file": {"mode": "development", "file": True},
+    "production+file": {"mode": "production", "file": True},
+}
+
+
+def run_scenario(options: dict[str, Any], source: str, lines: int, directory: Path) -> tuple[float, float]:
+    """Return (caller, drained) log calls per second for one scenario and source."""
+    options = dict(options)
+    log_file: str | None = str(directory / f"{source}.log") if options.pop("file", False) else None
+    setup_logging(level="INFO", console=True, file=log_file, **options)
+    app_logger = LoggerManager.get_logger("Benchmark")
+    access_logger: logging.Logger = logging.getLogger("werkzeug")
+
+    started: float = time.perf_counter()
+    if source == "app":
+        for i in range(lines):
+            app_logger.info(f"Loaded page {i} with 50 races")
+    else:
+        for i in range(lines):
+            access_logger.info('127.0.0.1 - - "GET /races?page=%d HTTP/1.1" 200 -', i)
+    caller: float = time.perf_counter() - started
+    # Removing the sinks waits for their queues to be written
+    logger.remove()
+    drained: float = time.perf_counter() - started
+    return lines / caller, lines / drained
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=50000, help="Log calls per scenario")
+    args = parser.parse_args()
+
+    results: list[tuple[str, str, float, float]] = []
+    stdout = sys.stdout
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        try:
+            for name, options in SCENARIOS.items():
+                for source in ("app", "access"):
+                    caller, drained = run_scenario(options, source, args.lines, Path(directory))
+                    results.append((name, source, caller, drained))
+        finally:
+            sys.stdout = stdout
+
+    print(f"{'scenario':<20} {'source':<8} {'caller calls/s':>15} {'drained calls/s':>16}")
+    for name, source, caller, drained in results:
+        print(f"{name:<20} {source:<8} {caller:>15,.0f} {drained:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Validated vs fast read path of RaceService.
+
+Loads every race with the cache disabled, once building validated Race DTOs from
+ORM entities and once building RaceRow objects from column tuples, and reports
+the time per 10k rows.
+
+Usage:
+    python -m benchmarks.read_path --rows 10000 --repeat 5
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app import db
+from app.core.config import CacheConfig
+from app.services import MemoryCacheBackend, RaceCache, RaceService
+from benchmarks.common import create_benchmark_app, seed_races
+
+
+def time_load(service: RaceService, repeat: int) -> float:
+    """Return the median seconds taken to load the whole table."""
+    timings: list[float] = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started: float = time.perf_counter()
+        service.get_all_races()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="Races seeded before the run")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per read path (median is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_benchmark_app(Path(directory) / "bench.db")
+        with app.app_context():
+            seed_races(args.rows)
+            disabled_cache: RaceCache = RaceCache(backend=MemoryCacheBackend(CacheConfig()), enabled=False)
+            validated: float = time_load(RaceService(cache=disabled_cache, fast_reads=False), args.repeat)
+            fast: float = time_load(RaceService(cache=disabled_cache, fast_reads=True), args.repeat)
+
+    per_10k: float = 10000 / args.rows * 1000
+    print(f"{'read path':<12} {'ms / 10k rows':>14}")
+    print(f"{'validated':<12} {validated * per_10k:>14.1f}")
+    print(f"{'fast':<12} {fast * per_10k:>14.1f}")
+    print(f"speedup: {validated / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Mixed read/write throughput of the SQLite profiles.
+
+Reader threads page through the race table while writer threads insert races,
+once per profile, each on a fresh database file.
+
+Usage:
+    python -m benchmarks.sqlite_profile --rows 20000 --readers 8 --writers 2 --seconds 5
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import Engine, create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import SQLITE_PROFILES
+from app.core.database import configure_sqlite_engine
+from app.models.races import RaceDAO
+
+RACE_TABLE = RaceDAO.__table__
+BASE_TIME = datetime(2024, 1, 1, 9, 0)
+
+
+def seed(engine: Engine, rows: int) -> None:
+    """Create the race table and fill it with synthetic races."""
+    RACE_TABLE.create(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(RACE_TABLE),
+            [
+                {
+                    "name": f"Gara {i}",
+                    "time": BASE_TIME + timedelta(hours=i),
+                    "city": "Roma(RM)",
+                    "distance": 10000,
+                    "website": "https://www.example.com",
+                }
+                for i in range(rows)
+            ],
+        )
+
+
+def run_profile(profile: str, rows: int, readers: int, writers: int, seconds: float) -> dict[str, float]:
+    """Run the mixed workload against one profile and return its throughput."""
+    with tempfile.TemporaryDirectory() as directory:
+        engine: Engine = create_engine(
+            f"sqlite:///{Path(directory) / 'bench.db'}", pool_size=readers + writers, max_overflow=0
+        )
+        configure_sqlite_engine(engine, SQLITE_PROFILES[profile])
+        seed(engine, rows)
+
+        counts: dict[str, int] = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline: float = time.perf_counter() + seconds
+
+        def count(key: str) -> None:
+            with lock:
+                counts[key] += 1
+
+        def reader() -> None:
+            while time.perf_counter() < deadline:
+                start: datetime = BASE_TIME + timedelta(hours=random.randrange(rows))
+                try:
+                    with engine.connect() as connection:
+                        statement = select(RACE_TABLE).where(RACE_TABLE.c.time >= start).order_by(RACE_TABLE.c.time)
+                        connection.execute(statement.limit(50)).all()
+                    count("reads")
+                except OperationalError:
+                    count("errors")
+
+        def writer() -> None:
+            while time.perf_counter() < deadline:
+                try:
+                    with engine.begin() as connection:
+                        connection.execute(
+                            insert(RACE_TABLE),
+                            {"name": "Nuova", "time": BASE_TIME, "city": "Ostia(RM)", "distance": 5000, "website": "-"},
+                        )
+                    count("writes")
+                except OperationalError:
+                    count("errors")
+
+        threads: list[threading.Thread] = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    return {
+        "reads_per_second": counts["reads"] / seconds,
+        "writes_per_second": counts["writes"] / seconds,
+        "errors": counts["errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="Races seeded before the run")
+    parser.add_argument("--readers", type=int, default=8, help="Reader threads")
+    parser.add_argument("--writers", type=int, default=2, help="Writer threads")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each run")
+    args = parser.parse_args()
+
+    print(f"{'profile':<12} {'reads/s':>10} {'writes/s':>10} {'errors':>8}")
+    for profile in SQLITE_PROFILES:
+        result: dict[str, float] = run_profile(profile, args.rows, args.readers, args.writers, args.seconds)
+        print(
+            f"{profile:<12} {result['reads_per_second']:>10.0f} "
+            f"{result['writes_per_second']:>10.0f} {result['errors']:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Cold-start time of the application, measured in fresh interpreters.
+
+Each run starts a new Python process with -X importtime, imports races, builds the
+app with create_app() and serves one request through the test client. The import
+time comes from the -X importtime report; the median of the runs is printed along
+with the modules whose own import time (excluding their imports) is largest.
+
+Usage:
+    python -m benchmarks.startup --repeat 5 --top 10
+    python -m benchmarks.startup --output startup.json
+"""
+import argparse
+import json
+import statistics
+import subprocess  # nosec B404
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+from benchmarks.common import ROOT_DIR
+
+# Runs in the child interpreter: prints the factory and first request timings as JSON
+PROBE = """
+import json, time
+started = time.perf_counter()
+import races
+imported = time.perf_counter()
+app = races.create_app()
+created = time.perf_counter()
+app.test_client().get("/metrics")
+served = time.perf_counter()
+print(json.dumps({"create_app": created - imported, "first_request": served - created}))
+"""
+
+
+def parse_importtime(report: str) -> dict[str, tuple[int, int]]:
+    """Return {module: (self us, cumulative us)} from a -X importtime report."""
+    modules: dict[str, tuple[int, int]] = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line.removeprefix("import time:").split("|"))
+        modules[name] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_once() -> tuple[dict[str, float], dict[str, tuple[int, int]]]:
+    """Start a fresh interpreter and return its timings (seconds) and import report."""
+    result = subprocess.run(  # nosec B603
+        [sys.executable, "-X", "importtime", "-c", PROBE], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    modules: dict[str, tuple[int, int]] = parse_importtime(result.stderr)
+    timings: dict[str, float] = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["import"] = modules["races"][1] / 1_000_000
+    return timings, modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to start (median is reported)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    parser.add_argument("--output", type=Path, default=None, help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    runs: list[dict[str, float]] = []
+    self_times: dict[str, list[int]] = defaultdict(list)
+    for _ in range(args.repeat):
+        timings, modules = run_once()
+        runs.append(timings)
+        for name, (self_us, _) in modules.items():
+            self_times[name].append(self_us)
+
+    medians: dict[str, float] = {
+        phase: statistics.median(run[phase] for run in runs) for phase in ("import", "create_app", "first_request")
+    }
+    print(f"{'phase':<14} {'median ms':>10}")
+    for phase, seconds in medians.items():
+        print(f"{phase:<14} {seconds * 1000:>10.1f}")
+    print(f"{'total':<14} {sum(medians.values()) * 1000:>10.1f}")
+
+    slowest: list[tuple[str, float]] = sorted(
+        ((name, statistics.median(values)) for name, values in self_times.items()), key=lambda item: -item[1]
+    )[: args.top]
+    print(f"\n{'module':<48} {'self ms':>8}")
+    for name, median_us in slowest:
+        print(f"{name.strip():<48} {median_us / 1000:>8.1f}")
+
+    if args.output is not None:
+        document: dict[str, Any] = {
+            "repeat": args.repeat,
+            "median_seconds": medians,
+            "slowest_modules_ms": {name.strip(): median_us / 1000 for name, median_us in slowest},
+        }
+        args.output.write_text(json.dumps(document, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
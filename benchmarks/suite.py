@@ -0,0 +1,210 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2025 Salvatore D'Angelo, Code4Projects
+# Licensed under the MIT License. See LICENSE.md for details.
+# -----------------------------------------------------------------------------
+"""
+Reproducible benchmark suite for the service and HTTP hot paths.
+
+Seeds a throw-away SQLite database with synthetic races (or races derived from
+gare_podistiche.csv), then times RaceService methods, RaceController views through
+the Flask test client and the rendering of index.html. Results are written as JSON
+with percentiles and can be compared against a saved baseline.
+
+Usage:
+    python -m benchmarks.suite --size 100000 --output results.json
+    python -m benchmarks.suite --size 100000 --baseline results.json --threshold 0.15
+"""
+import argparse
+import json
+import math
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from flask import render_template
+from flask.app import Flask
+from flask.testing import FlaskClient
+
+from app import db
+from app.core.config import CacheConfig
+from app.dtos import RaceFilter, RacePage
+from app.services import MemoryCacheBackend, RaceCache, RaceService, get_race_cache
+from benchmarks.common import create_benchmark_app, seed_races
+
+# Sizes accepted by name on the command line
+SIZES: dict[str, int] = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+# get_all_races loads the whole table: skip it above this size
+FULL_TABLE_LIMIT = 100_000
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of an already sorted list."""
+    index: int = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def measure(operation: Callable[[], Any], repeat: int, warmup: int) -> dict[str, float]:
+    """Run operation warmup + repeat times and return timing statistics in milliseconds."""
+    for _ in range(warmup):
+        operation()
+    timings: list[float] = []
+    for _ in range(repeat):
+        started: float = time.perf_counter()
+        operation()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "iterations": repeat,
+        "mean_ms": sum(timings) / repeat,
+        "min_ms": timings[0],
+        "p50_ms": percentile(timings, 0.50),
+        "p90_ms": percentile(timings, 0.90),
+        "p99_ms": percentile(timings, 0.99),
+        "max_ms": timings[-1],
+    }
+
+
+def http_get(client: FlaskClient, url: str) -> Callable[[], Any]:
+    """Return an operation that GETs url and checks the response status."""
+
+    def operation() -> None:
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+
+    return operation
+
+
+def build_cases(app: Flask, size: int) -> dict[str, Callable[[], Any]]:
+    """Return the benchmark cases by name. Requires an app context."""
+    uncached: RaceCache = RaceCache(backend=MemoryCacheBackend(CacheConfig()), enabled=False)
+    service: RaceService = RaceService(cache=uncached)
+    validated: RaceService = RaceService(cache=uncached, fast_reads=False)
+    cached: RaceService = RaceService()
+
+    rome_10k: RaceFilter = RaceFilter(city="Roma", distance_min=10000, distance_max=10000, date_from=date(2025, 1, 1))
+    middle: RacePage = service.get_races_page(filters=RaceFilter(date_from=date(2025, 6, 1)), limit=1)
+    deep_cursor: str | None = middle.next_cursor
+    first_page: RacePage = service.get_races_page()
+    race_id: int = first_page.races[0].id or 1
+
+    cases: dict[str, Callable[[], Any]] = {
+        "service.get_races_page": lambda: service.get_races_page(),
+        "service.get_races_page.deep": lambda: service.get_races_page(after=deep_cursor),
+        "service.get_races_page.filtered": lambda: service.get_races_page(filters=rome_10k),
+        "service.get_races_page.validated": lambda: validated.get_races_page(),
+        "service.get_races_page.cached": lambda: cached.get_races_page(),
+        "service.get_race_by_id": lambda: service.get_race_by_id(race_id),
+        "service.search_races": lambda: service.search_races("gara roma"),
+    }
+    if size <= FULL_TABLE_LIMIT:
+        cases["service.get_all_races"] = service.get_all_races
+
+    client: FlaskClient = app.test_client()
+    cases["http.get_races"] = http_get(client, "/races")
+    cases["http.get_races.filtered"] = http_get(client, "/races?city=Roma&distance_min=10000&distance_max=10000")
+    cases["http.update_race.form"] = http_get(client, f"/update-race/{race_id}")
+    cases["http.search"] = http_get(client, "/api/races/search?q=gara")
+
+    def render_index() -> None:
+        with app.test_request_context("/races"):
+            render_template(
+                template_name_or_list="index.html",
+                races=first_page.races,
+                page=first_page,
+                filters=RaceFilter(),
+                filter_args={},
+            )
+
+    cases["template.index"] = render_index
+    return cases
+
+
+def run_suite(size: int, source: str, repeat: int, warmup: int) -> dict[str, Any]:
+    """Seed a fresh database, run every case and return the results document."""
+    with tempfile.TemporaryDirectory() as directory:
+        app: Flask = create_benchmark_app(Path(directory) / "bench.db")
+        with app.app_context():
+            seeding_started: float = time.perf_counter()
+            seed_races(size, source=source)
+            seeding_seconds: float = time.perf_counter() - seeding_started
+            get_race_cache().invalidate()
+
+            results: dict[str, dict[str, float]] = {}
+            for name, operation in build_cases(app, size).items():
+                results[name] = measure(operation, repeat=repeat, warmup=warmup)
+                print(f"{name:<36} p50 {results[name]['p50_ms']:>9.3f} ms   p99 {results[name]['p99_ms']:>9.3f} ms")
+            db.session.remove()
+            db.engine.dispose()
+
+    return {
+        "meta": {
+            "size": size,
+            "source": source,
+            "repeat": repeat,
+            "warmup": warmup,
+            "seeding_seconds": round(seeding_seconds, 3),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float, metric: str = "p50_ms") -> list[str]:
+    """Print current vs baseline for every common case and return the names of the regressions."""
+    regressions: list[str] = []
+    print(f"\n{'case':<36} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in current["results"].items():
+        reference: dict[str, float] | None = baseline["results"].get(name)
+        if reference is None:
+            print(f"{name:<36} {'-':>10} {result[metric]:>10.3f}      new")
+            continue
+        change: float = result[metric] / reference[metric] - 1 if reference[metric] else 0.0
+        flag: str = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<36} {reference[metric]:>10.3f} {result[metric]:>10.3f} {change:>+7.1%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+    if baseline["meta"].get("size") != current["meta"]["size"]:
+        print("warning: baseline was recorded with a different dataset size", file=sys.stderr)
+    return regressions
+
+
+def parse_size(value: str) -> int:
+    """Accept a named size (1k, 100k, 1m) or a plain number of races."""
+    return SIZES.get(value.lower()) or int(value)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=parse_size, default=SIZES["1k"], help="Races to seed: 1k, 100k, 1m or a number")
+    parser.add_argument("--source", choices=("synthetic", "csv"), default="synthetic", help="Seed data generator")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed iterations per case")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed iterations per case")
+    parser.add_argument("--output", type=Path, default=None, help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", type=Path, default=None, help="Compare against a previous results file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative p50 slowdown flagged as regression")
+    args = parser.parse_args()
+
+    current: dict[str, Any] = run_suite(size=args.size, source=args.source, repeat=args.repeat, warmup=args.warmup)
+    if args.output is not None:
+        args.output.write_text(json.dumps(current, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    if args.baseline is not None:
+        baseline: dict[str, Any] = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions: list[str] = compare(current, baseline, threshold=args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
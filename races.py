@@ -7,15 +7,24 @@ import secrets
 from flask.app import Flask
 
 from app import db
+from app.commands import register_commands
 from app.core import settings
+from app.core.assets import configure_assets
+from app.core.database import configure_sqlite_engine
+from app.core.instrumentation import configure_instrumentation
 from app.core.log import setup_logging
+from app.core.metrics import configure_metrics
 from app.routes.blueprint import races_blueprint
+from app.services.jobs import configure_jobs
+from app.services.snapshots import configure_snapshots
 
 
 def create_app() -> Flask:
     """
     Flask application factory.
 
+    Does no schema work: create or upgrade the database with "flask --app races init-db".
+
     Returns:
         Flask: Configured Flask app instance.
     """
@@ -27,6 +36,11 @@ def create_app() -> Flask:
         rotation=settings.log.rotation,
         retention=settings.log.retention,
         compression=settings.log.compression,
+        mode=settings.log.mode,
+        serialize=settings.log.serialize,
+        caller_info=settings.log.caller_info,
+        access_log_sampling=settings.log.access_log_sampling,
+        access_log_rate_limit=settings.log.access_log_rate_limit,
     )
 
     # Create the Flask app
@@ -41,22 +55,46 @@ def create_app() -> Flask:
     app.config["TESTING"] = False
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["SQLALCHEMY_DATABASE_URI"] = settings.get_database_uri()
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = settings.database.get_engine_options()
 
     # Set secret key from settings or generate one
     app.secret_key = settings.app.secret_key or secrets.token_hex(nbytes=16)
 
-    # Initialize the database with the app
+    # Initialize the database with the app, tune its SQLite connections and time its statements
     db.init_app(app)
+    with app.app_context():
+        configure_sqlite_engine(db.engine, settings.database.get_pragmas())
+        configure_instrumentation(app, db.engine, settings.instrumentation)
+
+    # Enable metrics and share them between workers when running several processes
+    configure_metrics(settings.metrics)
+
+    # Fingerprinted static files and compressed HTML responses
+    configure_assets(app, settings.assets)
+
+    # Pre-rendered race list and calendar files, republished after writes
+    configure_snapshots(app, settings.snapshots)
+
+    # Background jobs for the heavy operations, run on threads started by the first request
+    configure_jobs(app, settings.jobs)
 
     # Register all blueprints
     app.register_blueprint(blueprint=races_blueprint)
 
-    # Create tables
-    with app.app_context():
-        db.create_all()
+    # Register CLI commands
+    register_commands(app)
 
     return app
 
 
-# Global app instance for WSGI and CLI usage
-app = create_app()
+_app: Flask | None = None
+
+
+def __getattr__(name: str) -> Flask:
+    """Build the global app on first access to races.app (WSGI servers, flask CLI), not at import."""
+    global _app
+    if name != "app":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _app is None:
+        _app = create_app()
+    return _app
@@ -1,4 +1,6 @@
 #!/bin/bash
+# Usage: ./run.sh               Flask development server (debug setting from config.yml)
+#        ./run.sh --production  Pre-fork multi-worker server (app.workers / app.threads in config.yml)
 
 # Activate virtual environment if it exists
 if [ -d ".venv" ]; then
@@ -8,19 +10,26 @@ fi
 # Set Flask app
 export FLASK_APP=races
 
+# Create the missing tables and indexes (the app itself does no schema work on startup)
+flask init-db
+
+if [ "$1" == "--production" ]; then
+    shift
+    echo "Starting production server: python -m app.server $*"
+    exec python -m app.server "$@"
+fi
+
 # Run Flask with configuration from config.yml
-python -c "
+exec python -c "
 from app.core import settings
 import os
-import sys
 
 # Get configuration values
-host = settings.app.host
-port = settings.app.port
-debug = '--debug' if settings.app.debug else ''
+args = ['flask', 'run', f'--host={settings.app.host}', f'--port={settings.app.port}']
+if settings.app.debug:
+    args.append('--debug')
 
-# Run Flask
-cmd = f'flask run --host={host} --port={port} {debug}'
-print(f'Starting Flask app: {cmd}')
-os.system(cmd)
+# Run Flask (exec, so signals reach the server directly)
+print(f'Starting Flask app: {\" \".join(args)}')
+os.execvp('flask', args)
 "
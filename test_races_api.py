@@ -1,15 +1,66 @@
+import csv
+import gzip
+import http.client
+import io
+import json
+import logging
 import os
-from collections.abc import Generator
-from datetime import datetime
-from typing import Any
+import signal
+import socket
+import subprocess  # nosec B404
+import sys
+import threading
+import time
+from collections.abc import Callable, Generator
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, cast
 
 import pytest
 from flask.app import Flask
 from flask.ctx import AppContext
-from flask.testing import FlaskClient
+from flask.testing import FlaskClient, FlaskCliRunner
+from loguru import logger
+from sqlalchemy import Engine, create_engine, event, insert, update
 from werkzeug.test import TestResponse
 
+from app.core import settings
+from app.core.assets import build_assets, configure_assets
+from app.core.config import (
+    AssetsConfig,
+    CacheConfig,
+    ChangesConfig,
+    DatabaseConfig,
+    JobsConfig,
+    LinksConfig,
+    SnapshotsConfig,
+)
+from app.core.database import configure_sqlite_engine
+from app.core.log import AccessLogFilter, BackgroundLogSink, LoggerManager
+from app.core.metrics import REQUEST_LATENCY, Counter, Histogram, MetricsRegistry
+from app.dtos import LinkCheckReport, Race, RaceFilter, RacePage, RaceRecord, RaceRow
+from app.models import JobDAO, create_schema, read_stats, rebuild_stats
 from app.models.races import RaceDAO
+from app.services import (
+    ChangeFeed,
+    DuplicateDetector,
+    DuplicateRaceError,
+    JobCancelledError,
+    JobContext,
+    LinkChecker,
+    MemoryCacheBackend,
+    RaceCache,
+    RaceNotFoundError,
+    RaceService,
+    configure_jobs,
+    configure_snapshots,
+    duplicates,
+    get_race_cache,
+)
+from app.services.changes import STREAM_BUSY_RETRY_SECONDS
+from app.services.jobs import JOB_KINDS, JobKind
+from benchmarks.suite import run_suite
 from races import create_app, db
 
 os.environ["DATABASE_URL"] = "sqlite:///test.db"
@@ -21,13 +72,38 @@ def test_client() -> Generator[FlaskClient, Any, None]:
     testing_client: FlaskClient = flask_app.test_client()
     ctx: AppContext = flask_app.app_context()
     ctx.push()
-    db.create_all()
+    create_schema()
     yield testing_client
     db.session.remove()
     db.drop_all()
     ctx.pop()
 
 
+def add_races(*races_dao: RaceDAO) -> None:
+    """Insert races bypassing RaceService, invalidating its cache like a service write would."""
+    db.session.add_all(races_dao)
+    db.session.commit()
+    get_race_cache().invalidate()
+
+
+def delete_races(*races_dao: RaceDAO) -> None:
+    """Delete races bypassing RaceService, invalidating its cache like a service write would."""
+    for race in races_dao:
+        db.session.delete(race)
+    db.session.commit()
+    get_race_cache().invalidate()
+
+
+def wait_for_job(test_client: FlaskClient, location: str, timeout: float = 10.0) -> dict[str, Any]:
+    """Poll a job's status URL until it finishes and return it."""
+    deadline: float = time.monotonic() + timeout
+    job: dict[str, Any] = test_client.get(location).get_json()
+    while job["status"] in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.02)
+        job = test_client.get(location).get_json()
+    return job
+
+
 def test_create_race(test_client: FlaskClient) -> None:
     """Test creating a race via web form."""
     rome_marathon_race_data: dict[str, Any] = {
@@ -102,6 +178,1212 @@ def test_delete_race(test_client: FlaskClient) -> None:
     assert response.status_code == 302
     assert response.location == "/"
 
-    # Verify race was deleted
+    # Verify race was deleted: it is kept as a tombstone for the change feed, but no longer readable
     deleted_race: RaceDAO | None = db.session.get(entity=RaceDAO, ident=race_id)
-    assert deleted_race is None
+    assert deleted_race is not None and deleted_race.deleted_at is not None
+    with pytest.raises(RaceNotFoundError):
+        RaceService().get_race_by_id(race_id)
+    assert b"Maratona di Roma (update)" not in test_client.get("/races").data
+
+
+def test_get_races_keyset_pagination(test_client: FlaskClient) -> None:
+    """Test walking the race list forwards and backwards with keyset cursors."""
+    races_dao: list[RaceDAO] = [
+        RaceDAO(
+            name=f"Corsa {day:02d}",
+            time=datetime(year=1990, month=3, day=day, hour=9, minute=0),
+            city="Roma(RM)",
+            distance=10000,
+            website="https://www.example.com",
+        )
+        for day in range(1, 6)
+    ]
+    add_races(*races_dao)
+
+    service: RaceService = RaceService()
+    first_page: RacePage = service.get_races_page(limit=2)
+    assert [r.name for r in first_page.races] == ["Corsa 01", "Corsa 02"]
+    assert first_page.prev_cursor is None
+    assert first_page.next_cursor is not None
+
+    second_page: RacePage = service.get_races_page(limit=2, after=first_page.next_cursor)
+    assert [r.name for r in second_page.races] == ["Corsa 03", "Corsa 04"]
+    assert second_page.prev_cursor is not None
+
+    back_page: RacePage = service.get_races_page(limit=2, before=second_page.prev_cursor)
+    assert [r.name for r in back_page.races] == ["Corsa 01", "Corsa 02"]
+
+    third_page: RacePage = service.get_races_page(limit=2, after=second_page.next_cursor)
+    assert third_page.races[0].name == "Corsa 05"
+
+    response: TestResponse = test_client.get(f"/races?limit=2&after={first_page.next_cursor}")
+    assert response.status_code == 200
+    assert b"Corsa 03" in response.data
+    assert b"Corsa 01" not in response.data
+
+    response = test_client.get("/races?after=not-a-cursor")
+    assert response.status_code == 400
+
+    delete_races(*races_dao)
+
+
+def test_get_races_filters_and_sort(test_client: FlaskClient) -> None:
+    """Test filtering and sorting the race list by date range, city and distance."""
+    races_dao: list[RaceDAO] = [
+        RaceDAO(name="Diecimila Roma", time=datetime(1991, 5, 5, 9), city="Roma(RM)", distance=10000, website="-"),
+        RaceDAO(name="Mezza Roma", time=datetime(1991, 5, 12, 9), city="Roma(RM)", distance=21097, website="-"),
+        RaceDAO(name="Diecimila Ostia", time=datetime(1991, 5, 19, 9), city="Ostia(RM)", distance=10000, website="-"),
+        RaceDAO(name="Diecimila Giugno", time=datetime(1991, 6, 2, 9), city="Roma(RM)", distance=10000, website="-"),
+        RaceDAO(name="Diecimila Romagna", time=datetime(1991, 5, 6, 9), city="Romagna", distance=10000, website="-"),
+    ]
+    add_races(*races_dao)
+
+    service: RaceService = RaceService()
+    may_10k_in_rome: RaceFilter = RaceFilter(
+        date_from=date(1991, 5, 1), date_to=date(1991, 5, 31), city="Roma", distance_min=9000, distance_max=11000
+    )
+    page: RacePage = service.get_races_page(filters=may_10k_in_rome)
+    assert [r.name for r in page.races] == ["Diecimila Roma"]
+
+    by_distance: RacePage = service.get_races_page(
+        filters=RaceFilter(date_from=date(1991, 5, 1), date_to=date(1991, 6, 30), sort="-distance"), limit=2
+    )
+    assert by_distance.races[0].name == "Mezza Roma"
+    assert by_distance.next_cursor is not None
+    rest: RacePage = service.get_races_page(
+        filters=RaceFilter(date_from=date(1991, 5, 1), date_to=date(1991, 6, 30), sort="-distance"),
+        after=by_distance.next_cursor,
+    )
+    assert len(by_distance.races) + len(rest.races) == 5
+    assert all(r.distance == 10000 for r in rest.races)
+
+    response: TestResponse = test_client.get("/races?city=Ostia&date_from=1991-05-01&date_to=1991-05-31&distance_min=")
+    assert response.status_code == 200
+    assert b"Diecimila Ostia" in response.data
+    assert b"Diecimila Roma" not in response.data
+
+    response = test_client.get("/races?distance_min=20000&distance_max=100")
+    assert response.status_code == 400
+
+    delete_races(*races_dao)
+
+
+def test_import_races_upload(test_client: FlaskClient) -> None:
+    """Test bulk importing a CSV upload as a job, with rejected rows reported by line number."""
+    csv_content: str = (
+        '1,Corsa Importata Uno,"1992-04-05 09:00:00.000000",Roma(RM),10000,https://www.example.com/uno\n'
+        '2,Corsa Importata Due,"not-a-date",Roma(RM),10000,https://www.example.com/due\n'
+        '3,Corsa Importata Tre,"1992-04-12 09:30:00.000000",Ostia(RM),-5,https://www.example.com/tre\n'
+        '4,Corsa Importata Quattro,"1992-04-19 10:00:00.000000",Ostia(RM),21097,https://www.example.com/quattro\n'
+    )
+    response: TestResponse = test_client.post(
+        "/api/races/import?batch_size=1",
+        data={"file": (io.BytesIO(csv_content.encode()), "gare.csv")},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 202
+    job: dict[str, Any] = wait_for_job(test_client, response.headers["Location"])
+    assert job["status"] == "succeeded" and job["progress"] == 1.0
+    report: dict[str, Any] = job["result"]
+    assert report["total_rows"] == 4
+    assert report["inserted_rows"] == 2
+    assert report["batches"] == 2
+    assert [rejection["line"] for rejection in report["rejections"]] == [2, 3]
+
+    imported: list[RaceDAO] = RaceDAO.query.filter(RaceDAO.name.startswith("Corsa Importata")).all()
+    assert sorted(r.name for r in imported) == ["Corsa Importata Quattro", "Corsa Importata Uno"]
+
+    response = test_client.post("/api/races/import", data={}, content_type="multipart/form-data")
+    assert response.status_code == 400
+
+    delete_races(*imported)
+
+
+def test_import_races_command(test_client: FlaskClient, tmp_path: Path) -> None:
+    """Test the import-races CLI command with a header row."""
+    csv_path: Path = tmp_path / "gare.csv"
+    csv_path.write_text(
+        "name,time,city,distance,website\n"
+        "Corsa da Riga di Comando,1993-06-06 08:30:00,Roma(RM),5000,https://www.example.com\n",
+        encoding="utf-8",
+    )
+    runner: FlaskCliRunner = test_client.application.test_cli_runner()
+    result = runner.invoke(args=["import-races", str(csv_path), "--batch-size", "10"])
+    assert result.exit_code == 0
+    assert "Rows inserted: 1 in 1 batches" in result.output
+
+    imported: RaceDAO | None = RaceDAO.query.filter_by(name="Corsa da Riga di Comando").first()
+    assert imported is not None
+    assert imported.distance == 5000
+    delete_races(imported)
+
+
+def test_export_races(test_client: FlaskClient) -> None:
+    """Test streaming the race table as CSV and NDJSON."""
+    race_dao: RaceDAO = RaceDAO(
+        name="Corsa da Esportare", time=datetime(1994, 7, 3, 8, 0), city="Tivoli(RM)", distance=8000, website="-"
+    )
+    add_races(race_dao)
+
+    response: TestResponse = test_client.get("/api/races/export?format=csv&city=Tivoli&date_to=1994-12-31")
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "text/csv"
+    lines: list[str] = response.get_data(as_text=True).splitlines()
+    assert lines[0] == "id,name,time,city,distance,website"
+    assert lines[1] == f"{race_dao.id},Corsa da Esportare,1994-07-03 08:00:00.000000,Tivoli(RM),8000,-"
+
+    response = test_client.get("/api/races/export?format=ndjson&city=Tivoli&date_to=1994-12-31")
+    assert response.status_code == 200
+    records: list[dict[str, Any]] = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert records == [
+        {
+            "id": race_dao.id,
+            "name": "Corsa da Esportare",
+            "time": "1994-07-03T08:00:00",
+            "city": "Tivoli(RM)",
+            "distance": 8000,
+            "website": "-",
+        }
+    ]
+
+    response = test_client.get("/api/races/export?format=xml")
+    assert response.status_code == 400
+
+    # Without -o the export is written to stdout, which parses as CSV from its first line
+    result = test_client.application.test_cli_runner().invoke(args=["export-races"])
+    assert result.exit_code == 0, result.output
+    rows: list[list[str]] = list(csv.reader(io.StringIO(result.stdout)))
+    assert rows[0] == ["id", "name", "time", "city", "distance", "website"]
+    assert [str(race_dao.id), "Corsa da Esportare", "1994-07-03 08:00:00.000000", "Tivoli(RM)", "8000", "-"] in rows
+    # Startup logging of a real "flask" process must not end up in the export either
+    command: list[str] = [sys.executable, "-m", "flask", "--app", "races", "export-races"]
+    process = subprocess.run(command, capture_output=True, text=True, check=True)  # nosec B603
+    assert process.stdout.splitlines()[0] == "id,name,time,city,distance,website"
+
+    delete_races(race_dao)
+
+
+def test_race_service_cache(test_client: FlaskClient) -> None:
+    """Test that reads are cached and that service writes invalidate them."""
+    cache: RaceCache = RaceCache(backend=MemoryCacheBackend(CacheConfig(max_entries=8)))
+    service: RaceService = RaceService(cache=cache)
+    race: Race = service.create_new_race(
+        race=Race(name="Corsa in Cache", time=datetime(1995, 9, 9, 9), city="Fiumicino(RM)", distance=7000, website="-")
+    )
+    assert race.id is not None
+    version: int = cache.stats().version
+
+    assert service.get_race_by_id(race.id).name == "Corsa in Cache"
+    assert service.get_race_by_id(race.id).name == "Corsa in Cache"
+    assert (cache.stats().hits, cache.stats().misses) == (1, 1)
+
+    service.update_race(race_id=race.id, race=race.model_copy(update={"name": "Corsa Aggiornata"}))
+    assert cache.stats().version == version + 1
+    assert service.get_race_by_id(race.id).name == "Corsa Aggiornata"
+    assert cache.stats().misses == 2
+
+    service.delete_race_by_id(race.id)
+    with pytest.raises(RaceNotFoundError):
+        service.get_race_by_id(race.id)
+
+
+def test_search_races(test_client: FlaskClient) -> None:
+    """Test full-text search with prefix matching, ranking and index sync on writes."""
+    service: RaceService = RaceService()
+    maratonina: Race = service.create_new_race(
+        race=Race(
+            name="Maratonina di Borgoquieto",
+            time=datetime(1996, 3, 3),
+            city="Borgoquieto(RM)",
+            distance=21097,
+            website="-",
+        )
+    )
+    corsa: Race = service.create_new_race(
+        race=Race(
+            name="Corsa di Portolungo", time=datetime(1996, 3, 10), city="Borgoquieto(RM)", distance=10000, website="-"
+        )
+    )
+    assert maratonina.id is not None and corsa.id is not None
+
+    assert [r.name for r in service.search_races("maratonina borgoq")] == ["Maratonina di Borgoquieto"]
+    # A name hit ranks above a city-only hit
+    assert [r.name for r in service.search_races("borgoquieto")][:2] == [
+        "Maratonina di Borgoquieto",
+        "Corsa di Portolungo",
+    ]
+    assert [r.name for r in service.search_races("marat borgo")] == ["Maratonina di Borgoquieto"]
+
+    service.update_race(race_id=corsa.id, race=corsa.model_copy(update={"name": "Corsa di Farolungo"}))
+    assert service.search_races("portolungo") == []
+    assert [r.name for r in service.search_races("farolungo")] == ["Corsa di Farolungo"]
+
+    response: TestResponse = test_client.get("/api/races/search?q=Marato%20Borgo")
+    assert response.status_code == 200
+    assert [r["name"] for r in response.get_json()["results"]] == ["Maratonina di Borgoquieto"]
+    assert test_client.get("/api/races/search?q=").status_code == 400
+    # FTS5 operators in user input are treated as plain words
+    assert test_client.get('/api/races/search?q=" OR NEAR(').status_code == 200
+
+    service.delete_race_by_id(maratonina.id)
+    service.delete_race_by_id(corsa.id)
+    assert service.search_races("maratonina borgoq") == []
+
+
+def test_sqlite_production_profile(tmp_path: Path) -> None:
+    """Test that the production profile PRAGMAs are applied on every new connection."""
+    config: DatabaseConfig = DatabaseConfig(profile="production", busy_timeout=1234, pool_size=3)
+    assert config.get_engine_options() == {"pool_pre_ping": False, "pool_size": 3}
+
+    engine: Engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}", **config.get_engine_options())
+    configure_sqlite_engine(engine, config.get_pragmas())
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 1234
+    engine.dispose()
+
+
+def test_fast_read_path(test_client: FlaskClient) -> None:
+    """Test that fast reads return RaceRow objects equivalent to the validated Race DTOs."""
+    race_dao: RaceDAO = RaceDAO(
+        name="Corsa Veloce", time=datetime(1997, 2, 2, 10, 15), city="Anzio(RM)", distance=15000, website="-"
+    )
+    add_races(race_dao)
+
+    disabled_cache: RaceCache = RaceCache(backend=MemoryCacheBackend(CacheConfig()), enabled=False)
+    fast: RaceService = RaceService(cache=disabled_cache, fast_reads=True)
+    validated: RaceService = RaceService(cache=disabled_cache, fast_reads=False)
+    anzio: RaceFilter = RaceFilter(city="Anzio", date_to=date(1997, 12, 31))
+
+    fast_race: RaceRecord = fast.get_races_page(filters=anzio).races[0]
+    validated_race: RaceRecord = validated.get_races_page(filters=anzio).races[0]
+    assert isinstance(fast_race, RaceRow)
+    assert isinstance(validated_race, Race)
+    assert fast_race.model_dump() == validated_race.model_dump()
+    assert fast_race.model_dump(mode="json") == validated_race.model_dump(mode="json")
+    assert fast.get_race_by_id(race_dao.id) == fast_race
+
+    delete_races(race_dao)
+
+
+def test_request_instrumentation(test_client: FlaskClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the Server-Timing breakdown and the slow request/query log lines."""
+    response: TestResponse = test_client.get("/races?city=Instrumentopoli")
+    assert response.status_code == 200
+    timing: dict[str, str] = dict(part.strip().split(";", 1) for part in response.headers["Server-Timing"].split(","))
+    assert set(timing) == {"sql", "render", "app", "total"}
+    # The data version lookup, then the page itself and the broken links (both cached afterwards, under the
+    # data version read before each of them)
+    assert 'desc="5 queries"' in timing["sql"]
+    assert float(timing["render"].removeprefix("dur=")) > 0
+
+    messages: list[str] = []
+    sink_id: int = logger.add(lambda message: messages.append(message.record["message"]), level="WARNING")
+    monkeypatch.setattr(settings.instrumentation, "slow_query_ms", 0)
+    monkeypatch.setattr(settings.instrumentation, "slow_request_ms", 0)
+    try:
+        # A different filter, so the page is not served from the cache
+        test_client.get("/races?city=Instrumentopolis")
+    finally:
+        logger.remove(sink_id)
+    assert any(m.startswith("Slow query") and "Instrumentopolis" in m for m in messages)
+    assert any(m.startswith("Slow request GET /races?city=Instrumentopolis -> 200") for m in messages)
+
+
+def test_metrics_endpoint(test_client: FlaskClient) -> None:
+    """Test that /metrics exposes request latency, service and cache metrics in Prometheus format."""
+    labels: dict[str, str] = {"endpoint": "races_blueprint.get_races", "method": "GET", "status": "200"}
+    before: int = REQUEST_LATENCY.get_count(**labels)
+    assert test_client.get("/races?city=Metricopoli").status_code == 200
+    assert REQUEST_LATENCY.get_count(**labels) == before + 1
+
+    response: TestResponse = test_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text: str = response.get_data(as_text=True)
+    assert "# TYPE races_http_request_duration_seconds histogram" in text
+    assert (
+        'races_http_request_duration_seconds_count{endpoint="races_blueprint.get_races",method="GET",status="200"} '
+        f"{before + 1}"
+    ) in text
+    assert 'races_http_request_duration_seconds_bucket{endpoint="races_blueprint.get_races",method="GET",' in text
+    assert 'races_service_rows_returned_total{operation="races_page"}' in text
+    assert "races_cache_misses_total " in text
+    assert "races_db_query_duration_seconds_count " in text
+
+
+def test_metrics_multiprocess_merge(tmp_path: Path) -> None:
+    """Test that snapshots written by several workers are merged when rendering."""
+    registry: MetricsRegistry = MetricsRegistry()
+    requests: Counter = registry.register(Counter("demo_requests_total", "Requests", ("endpoint",)))
+    latency: Histogram = registry.register(Histogram("demo_latency_seconds", "Latency", buckets=(0.1, 1.0)))
+    registry.configure_multiprocess(tmp_path, flush_interval=60)
+
+    requests.inc(endpoint="races")
+    latency.observe(0.05)
+    # A snapshot left by another (possibly dead) worker: counters and histograms still count
+    (tmp_path / "999999.json").write_text(
+        json.dumps(
+            {
+                "demo_requests_total": [[["races"], 2.0], [["search"], 1.0]],
+                "demo_latency_seconds": [[[], [0.0, 1.0, 1.0, 2.5]]],
+            }
+        ),
+        encoding="utf-8",
+    )
+    text: str = registry.render()
+    assert 'demo_requests_total{endpoint="races"} 3' in text
+    assert 'demo_requests_total{endpoint="search"} 1' in text
+    assert 'demo_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'demo_latency_seconds_bucket{le="1"} 2' in text
+    assert 'demo_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "demo_latency_seconds_count 3" in text
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+
+
+def test_production_logging_components() -> None:
+    """Test access log sampling/rate limiting and the background JSON sink."""
+
+    def access_record(level: int) -> logging.LogRecord:
+        return logging.LogRecord("werkzeug", level, __file__, 1, '"GET /races HTTP/1.1" 200 -', None, None)
+
+    sampler: AccessLogFilter = AccessLogFilter(sampling={"INFO": 0.25})
+    assert sum(sampler.filter(access_record(logging.INFO)) for _ in range(8)) == 2
+    assert all(sampler.filter(access_record(logging.WARNING)) for _ in range(3))
+    assert sampler.dropped == 6
+
+    limiter: AccessLogFilter = AccessLogFilter(rate_limit=3)
+    kept: int = sum(limiter.filter(access_record(logging.INFO)) for _ in range(10))
+    assert 3 <= kept <= 6  # at most 3 per second, and the loop may straddle a second boundary
+
+    stream: io.StringIO = io.StringIO()
+    sink_id: int = logger.add(BackgroundLogSink(stream=stream, serialize=True), format="{message}", level="INFO")
+    try:
+        LoggerManager.get_logger("JsonSinkTest").bind(race_id=7).info("Race loaded")
+    finally:
+        logger.remove(sink_id)  # waits for the writer thread to drain its queue
+    document: dict[str, Any] = json.loads(stream.getvalue())
+    assert document["logger"] == "JsonSinkTest"
+    assert document["level"] == "INFO"
+    assert document["message"] == "Race loaded"
+    assert document["extra"] == {"race_id": 7}
+    assert document["function"] == "test_production_logging_components"
+
+
+def test_lazy_startup(test_client: FlaskClient) -> None:
+    """Test that importing the app module has no side effects and that init-db creates the schema."""
+    probe: str = (
+        "import races, app.core.config as config, app.routes.blueprint as routes; "
+        "print(races._app is None, config.get_settings.cache_info().currsize, "
+        "routes.get_controller.cache_info().currsize)"
+    )
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)  # nosec B603
+    assert result.stdout.split() == ["True", "0", "0"]
+
+    runner: FlaskCliRunner = test_client.application.test_cli_runner()
+    cli_result = runner.invoke(args=["init-db"])
+    assert cli_result.exit_code == 0, cli_result.output
+    assert "Database schema is up to date" in cli_result.output
+
+
+def test_prefork_server(test_client: FlaskClient) -> None:
+    """Test that the production server serves from several workers, reloads on SIGHUP and stops on SIGTERM."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port: int = probe.getsockname()[1]
+    command: list[str] = [sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(port)]
+    server = subprocess.Popen(  # nosec B603
+        [*command, "--workers", "2", "--threads", "2"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    def get_status() -> int:
+        deadline: float = time.monotonic() + 30
+        while True:
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                connection.request("GET", "/races")
+                status: int = connection.getresponse().status
+                connection.close()
+                return status
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+
+    try:
+        assert get_status() == 200
+        server.send_signal(signal.SIGHUP)
+        assert get_status() == 200
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=60) == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
+
+
+def test_static_assets(test_client: FlaskClient, tmp_path: Path) -> None:
+    """Test fingerprinted, precompressed static files and gzip of large HTML responses."""
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "site.css").write_text("body { margin: 0; }\n" * 200, encoding="utf-8")
+    manifest = build_assets(tmp_path)
+    path: str = manifest["css/site.css"]["path"]
+    assert path.startswith("dist/css/site.") and path.endswith(".css")
+    assert "gzip" in manifest["css/site.css"]["encodings"]
+    assert build_assets(tmp_path) == manifest
+
+    assets_app: Flask = Flask(import_name=__name__, static_folder=str(tmp_path), static_url_path="/static")
+    configure_assets(assets_app, AssetsConfig())
+    with assets_app.test_request_context():
+        asset_url: Callable[[str], str] = cast(Callable[[str], str], assets_app.jinja_env.globals["asset_url"])
+        assert asset_url("css/site.css") == f"/static/{path}"
+        assert asset_url("css/missing.css") == "/static/css/missing.css"
+
+    client: FlaskClient = assets_app.test_client()
+    plain: TestResponse = client.get(f"/static/{path}")
+    assert plain.status_code == 200
+    assert "immutable" in plain.headers["Cache-Control"]
+    assert "Content-Encoding" not in plain.headers
+    encoded: TestResponse = client.get(f"/static/{path}", headers={"Accept-Encoding": "gzip"})
+    assert encoded.headers["Content-Encoding"] == "gzip"
+    assert encoded.mimetype == "text/css"
+    assert gzip.decompress(encoded.data) == plain.data
+    assert "immutable" not in client.get("/static/css/site.css").headers.get("Cache-Control", "")
+
+    page: TestResponse = test_client.get("/races", headers={"Accept-Encoding": "gzip"})
+    assert page.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in page.headers["Vary"]
+    assert b"</html>" in gzip.decompress(page.data)
+    assert "Content-Encoding" not in test_client.get("/races").headers
+
+
+def test_benchmark_suite_smoke(test_client: FlaskClient) -> None:
+    """Test that every benchmark case runs against the benchmark app (templates included)."""
+    document: dict[str, Any] = run_suite(size=50, source="synthetic", repeat=1, warmup=0)
+    assert "http.get_races" in document["results"] and "template.index" in document["results"]
+
+
+def test_conditional_get(test_client: FlaskClient) -> None:
+    """Test ETag/Last-Modified validators and 304 answers on the list and update pages."""
+    test_client.get("/races")  # consume any pending flashed message
+    url: str = "/races?city=Etagville"
+    first: TestResponse = test_client.get(url)
+    etag: str = first.headers["ETag"]
+    assert first.status_code == 200
+    assert not etag.startswith("W/")
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    cached: TestResponse = test_client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+    assert 'desc="1 queries"' in cached.headers["Server-Timing"]
+    assert "render;dur=0.00" in cached.headers["Server-Timing"]
+    assert test_client.get(url, headers={"If-Modified-Since": first.headers["Last-Modified"]}).status_code == 304
+    assert test_client.get("/races?city=Other", headers={"If-None-Match": etag}).status_code == 200
+
+    gzipped: TestResponse = test_client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["ETag"] == etag[:-1] + '-gzip"'
+    headers: dict[str, str] = {"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["ETag"]}
+    assert test_client.get(url, headers=headers).status_code == 304
+
+    # Any write changes the version: the cached copy is stale, and the flashed message disables validators
+    race: RaceDAO = RaceDAO(name="Etag Race", time=datetime(1994, 6, 1, 9, 0), city="Etagville", distance=5000)
+    db.session.add(race)
+    db.session.commit()
+    get_race_cache().invalidate()
+    assert test_client.get(url, headers={"If-None-Match": etag}).status_code == 200
+    update_url: str = f"/update-race/{race.id}"
+    form: TestResponse = test_client.get(update_url)
+    assert test_client.get(update_url, headers={"If-None-Match": form.headers["ETag"]}).status_code == 304
+
+    test_client.get(f"/delete-race/{race.id}")
+    flashed: TestResponse = test_client.get(url, headers={"If-None-Match": etag})
+    assert flashed.status_code == 200
+    assert "ETag" not in flashed.headers
+
+    # A write of another process (worker, CLI command, job runner) does not invalidate this process' cache
+    stale_etag: str = test_client.get(url).headers["ETag"]
+    other_process: Engine = create_engine(db.engine.url)
+    with other_process.begin() as connection:
+        connection.execute(insert(RaceDAO).values(name="Etag Race 2", time=datetime(1994, 6, 2, 9), city="Etagville"))
+    other_process.dispose()
+    fresh: TestResponse = test_client.get(url, headers={"If-None-Match": stale_etag})
+    assert fresh.status_code == 200 and b"Etag Race 2" in fresh.data
+    assert test_client.get(url, headers={"If-None-Match": fresh.headers["ETag"]}).status_code == 304
+    delete_races(*RaceDAO.query.filter_by(name="Etag Race 2").all())
+
+
+def test_change_feed(test_client: FlaskClient) -> None:
+    """Test the changes-since API, tombstones, compaction and the Server-Sent Events stream."""
+    # Initial sync: walk the feed from the beginning, then keep the sync cursor
+    url: str = "/api/races/changes?limit=2"
+    while True:
+        page: dict[str, Any] = test_client.get(url).get_json()
+        assert all(not change["deleted"] for change in page["changes"])
+        cursor: str = page["cursor"]
+        url = f"/api/races/changes?limit=2&cursor={cursor}"
+        if not page["has_more"]:
+            break
+    # The sync cursor replays whatever was written while the sync ran (nothing here), then the feed is quiet
+    synced: dict[str, Any] = test_client.get(f"/api/races/changes?cursor={cursor}").get_json()
+    assert all(change["deleted"] for change in synced["changes"])
+    cursor = synced["cursor"]
+    assert test_client.get(f"/api/races/changes?cursor={cursor}").get_json() == {
+        "cursor": cursor,
+        "has_more": False,
+        "changes": [],
+    }
+
+    service: RaceService = RaceService()
+    race: Race = Race(name="Feed Run", time=datetime(1993, 3, 3, 9, 0), city="Feedville", distance=7000, website="")
+    created: Race = service.create_new_race(race=race)
+    assert created.id is not None
+    service.update_race(race_id=created.id, race=race.model_copy(update={"distance": 7500}))
+    changes: list[dict[str, Any]] = test_client.get(f"/api/races/changes?cursor={cursor}").get_json()["changes"]
+    assert [(c["id"], c["deleted"], c["race"]["distance"]) for c in changes] == [(created.id, False, 7500)]
+    assert changes[0]["updated_at"].endswith("+00:00")
+
+    service.delete_race_by_id(created.id)
+    changes = test_client.get(f"/api/races/changes?cursor={cursor}").get_json()["changes"]
+    assert [(c["id"], c["deleted"], c["race"]) for c in changes] == [(created.id, True, None)]
+    assert created.id not in [c["id"] for c in test_client.get("/api/races/changes").get_json()["changes"]]
+    assert test_client.get("/api/races/changes?cursor=bogus").status_code == 400
+
+    # Stream: pending changes first, then a write of this process wakes the stream up at once
+    feed: ChangeFeed = ChangeFeed(config=ChangesConfig(stream_poll_seconds=30, stream_max_seconds=60))
+    events = cast(Generator[str, None, None], feed.iter_events(cursor=cursor))
+    assert next(events).startswith("retry:")
+    assert f'"id": {created.id}' in next(events)
+    started: float = time.monotonic()
+    other: Race = service.create_new_race(race=race.model_copy(update={"name": "Feed Run 2"}))
+    event: str = next(events)
+    assert time.monotonic() - started < 5
+    assert event.startswith("id: r") and "event: changes" in event and "Feed Run 2" in event
+    events.close()
+
+    # Past max_streams per worker the stream endpoint answers 503 instead of taking another request thread
+    streams: ChangeFeed = ChangeFeed()
+    slots: list[bool] = [streams.acquire_stream_slot() for _ in range(settings.changes.max_streams)]
+    assert all(slots) and not streams.acquire_stream_slot()
+    busy: TestResponse = test_client.get(f"/api/races/changes/stream?cursor={cursor}")
+    assert busy.status_code == 503
+    assert busy.headers["Retry-After"] == str(STREAM_BUSY_RETRY_SECONDS)
+    streams.release_stream_slot()
+    stream: TestResponse = test_client.get(f"/api/races/changes/stream?cursor={cursor}", buffered=False)
+    assert stream.status_code == 200
+    assert not streams.acquire_stream_slot()
+    stream.close()  # closing the response frees its slot
+    assert streams.acquire_stream_slot()
+    for _ in slots:
+        streams.release_stream_slot()
+
+    # Compaction purges the tombstones: older sync cursors must start over, new initial syncs are unaffected
+    assert feed.compact_tombstones(older_than=timedelta(0)) >= 1
+    expired: TestResponse = test_client.get(f"/api/races/changes?cursor={cursor}")
+    assert expired.status_code == 410
+    assert expired.get_json()["reset"] is True
+    fresh: str = test_client.get("/api/races/changes?limit=5000").get_json()["cursor"]
+    assert test_client.get(f"/api/races/changes?cursor={fresh}").status_code == 200
+    assert other.id is not None
+
+    # A race deleted during an initial sync, after the client got it, is replayed as a tombstone afterwards
+    last: Race = service.create_new_race(race=race.model_copy(update={"name": "Feed Run 3"}))
+    assert last.id is not None
+    url = "/api/races/changes?limit=1"
+    received: list[int] = []
+    while other.id not in received:
+        page = test_client.get(url).get_json()
+        received += [change["id"] for change in page["changes"]]
+        url = f"/api/races/changes?limit=1&cursor={page['cursor']}"
+    assert page["has_more"] and page["cursor"].startswith("i")
+    service.delete_race_by_id(other.id)
+    service.update_race(race_id=last.id, race=race.model_copy(update={"name": "Feed Run 3", "distance": 9000}))
+    while page["has_more"]:
+        page = test_client.get(url).get_json()
+        url = f"/api/races/changes?limit=1&cursor={page['cursor']}"
+    replayed: list[dict[str, Any]] = test_client.get(f"/api/races/changes?cursor={page['cursor']}").get_json()[
+        "changes"
+    ]
+    assert (other.id, True) in [(c["id"], c["deleted"]) for c in replayed]
+    service.delete_race_by_id(last.id)
+
+
+def test_race_snapshots(test_client: FlaskClient, tmp_path: Path) -> None:
+    """Test the published race list and calendar files, republished in the background after writes."""
+    test_client.get("/races")  # consume any pending flashed message
+    race: RaceDAO = RaceDAO(
+        name="Corsa del Calendario",
+        time=datetime(1995, 4, 9, 9, 30),
+        city="Snapville",
+        distance=21097,
+        website="https://snapville.example",
+    )
+    add_races(race)
+    calendar: str = test_client.get("/races.ics").get_data(as_text=True)
+    assert calendar.startswith("BEGIN:VCALENDAR\r\n") and calendar.endswith("END:VCALENDAR\r\n")
+    assert "DTSTART:19950409T093000\r\n" in calendar and "SUMMARY:Corsa del Calendario\r\n" in calendar
+    assert all(len(line.encode()) <= 75 for line in calendar.split("\r\n"))
+
+    flask_app: Flask = test_client.application
+    config: SnapshotsConfig = SnapshotsConfig(enabled=True, directory=str(tmp_path), debounce_seconds=0.05)
+    publisher = configure_snapshots(flask_app, config)
+    assert publisher is not None
+    try:
+        publisher.publish()
+        page: TestResponse = test_client.get("/")
+        assert page.status_code == 200
+        assert page.data == (tmp_path / "index.html").read_bytes()
+        assert page.headers["Cache-Control"] == "no-cache"
+        assert test_client.get("/", headers={"If-None-Match": page.headers["ETag"]}).status_code == 304
+        gzipped: TestResponse = test_client.get("/races", headers={"Accept-Encoding": "gzip"})
+        assert gzipped.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(gzipped.data) == page.data
+        races: list[dict[str, Any]] = test_client.get("/races.json").get_json()
+        assert {"id": race.id, "name": "Corsa del Calendario", "city": "Snapville"}.items() <= next(
+            r for r in races if r["id"] == race.id
+        ).items()
+        assert "URL:https://snapville.example" in test_client.get("/races.ics").get_data(as_text=True)
+
+        # A write republishes the files in the background
+        service: RaceService = RaceService()
+        service.update_race(
+            race_id=race.id, race=Race.model_validate(race).model_copy(update={"name": "Corsa Rinviata"})
+        )
+        deadline: float = time.monotonic() + 10
+        while "Corsa Rinviata" not in (tmp_path / "races.ics").read_text() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert "Corsa Rinviata" in test_client.get("/races.ics").get_data(as_text=True)
+
+        # A write of another process (e.g. a CLI command) is rendered at once, and republished
+        other_process: Engine = create_engine(db.engine.url)
+        with other_process.begin() as connection:
+            connection.execute(update(RaceDAO).where(RaceDAO.id == race.id).values(name="Corsa Anticipata"))
+        other_process.dispose()
+        assert "Corsa Anticipata" in test_client.get("/races.ics").get_data(as_text=True)
+        deadline = time.monotonic() + 10
+        while "Corsa Anticipata" not in (tmp_path / "races.ics").read_text() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert test_client.get("/races.ics").data == (tmp_path / "races.ics").read_bytes()
+    finally:
+        configure_snapshots(flask_app, SnapshotsConfig())
+    assert "Content-Length" not in test_client.get("/races.json").headers  # streamed export
+    delete_races(race)
+
+
+def test_calendar_feed(test_client: FlaskClient) -> None:
+    """Test the filtered iCalendar feed: streamed when generated, then cached until the next write."""
+    test_client.get("/races")  # consume any pending flashed message
+    short: RaceDAO = RaceDAO(name="Corsa, Breve", time=datetime(1996, 2, 4, 10, 0), city="Icsville", distance=5000)
+    long: RaceDAO = RaceDAO(
+        name="Maratona; Ics", time=datetime(1996, 3, 3, 8, 30), city="Icsville", distance=42195, website="-"
+    )
+    add_races(short, long)
+
+    url: str = "/races.ics?city=Icsville&distance_min=10000"
+    generated: TestResponse = test_client.get(url)
+    assert generated.status_code == 200
+    assert "Content-Length" not in generated.headers  # streamed while generated
+    assert generated.mimetype == "text/calendar"
+    calendar: str = generated.get_data(as_text=True)
+    assert calendar.count("BEGIN:VEVENT") == 1
+    assert "SUMMARY:Maratona\\; Ics\r\n" in calendar and "DURATION:PT5H0M\r\n" in calendar
+    assert "URL:" not in calendar
+
+    cached: TestResponse = test_client.get(url)
+    assert cached.headers["Content-Length"] == str(len(generated.data))
+    assert cached.get_data(as_text=True) == calendar
+    assert cached.headers["ETag"] == generated.headers["ETag"]
+    assert test_client.get(url, headers={"If-None-Match": cached.headers["ETag"]}).status_code == 304
+    assert "SUMMARY:Corsa\\, Breve\r\n" in test_client.get("/races.ics?city=Icsville").get_data(as_text=True)
+    assert [r["name"] for r in test_client.get("/races.json?city=Icsville&distance_max=5000").get_json()] == [
+        "Corsa, Breve"
+    ]
+    assert test_client.get("/races.ics?distance_min=-1").status_code == 400
+
+    # A write changes the data version: the next poll regenerates the feed
+    RaceService().update_race(race_id=long.id, race=Race.model_validate(long).model_copy(update={"distance": 21097}))
+    updated: TestResponse = test_client.get(url, headers={"If-None-Match": cached.headers["ETag"]})
+    assert updated.status_code == 200
+    assert "Content-Length" not in updated.headers
+    assert "DESCRIPTION:21.097 km\r\n" in updated.get_data(as_text=True)
+    delete_races(short, long)
+
+
+def test_race_stats(test_client: FlaskClient) -> None:
+    """Test the statistics kept up to date by the summary table triggers, and their full rebuild."""
+
+    def counts() -> dict[str, dict[str, int]]:
+        stats: dict[str, Any] = test_client.get("/api/races/stats").get_json()
+        assert stats["total"] == sum(bucket["races"] for bucket in stats["by_distance"])
+        return {
+            dimension: {bucket["key"]: bucket["races"] for bucket in stats[dimension]}
+            for dimension in ("by_month", "by_city", "by_distance")
+        }
+
+    service: RaceService = RaceService()
+    before: dict[str, dict[str, int]] = counts()
+    race: Race = Race(name="Statistica", time=datetime(1997, 6, 8, 9, 0), city="Statville", distance=3000, website="")
+    short: Race = service.create_new_race(race=race)
+    long: Race = service.create_new_race(race=race.model_copy(update={"distance": 42195}))
+    assert short.id is not None and long.id is not None
+    after: dict[str, dict[str, int]] = counts()
+    assert after["by_month"]["1997-06"] == before["by_month"].get("1997-06", 0) + 2
+    assert after["by_city"]["Statville"] == 2
+    assert after["by_distance"]["42195"] == before["by_distance"].get("42195", 0) + 1
+
+    # Moving a race changes two buckets; a soft delete removes it; empty buckets disappear
+    service.update_race(race_id=long.id, race=long.model_copy(update={"time": datetime(1997, 7, 6, 9, 0)}))
+    service.delete_race_by_id(short.id)
+    after = counts()
+    assert after["by_month"].get("1997-06", 0) == before["by_month"].get("1997-06", 0)
+    assert after["by_month"]["1997-07"] == before["by_month"].get("1997-07", 0) + 1
+    assert after["by_city"]["Statville"] == 1
+    assert after["by_distance"]["0"] == before["by_distance"].get("0", 0)
+    with db.engine.begin() as connection:
+        incremental: list[tuple[Any, ...]] = sorted(map(tuple, read_stats(connection)))
+        rebuild_stats(connection)
+        assert sorted(map(tuple, read_stats(connection))) == incremental
+
+    page: TestResponse = test_client.get("/stats")
+    assert page.status_code == 200
+    assert "Luglio 1997" in page.get_data(as_text=True)
+    service.delete_race_by_id(long.id)
+    assert "Statville" not in counts()["by_city"]
+
+
+def test_nearby_races(test_client: FlaskClient, tmp_path: Path) -> None:
+    """Test the proximity search through the gazetteer, the race-city triggers and the R*Tree."""
+    gazetteer: Path = tmp_path / "gazetteer.csv"
+    gazetteer.write_text(
+        "name,province,latitude,longitude\n"
+        "Quercetta,XX,40.0,10.0\n"
+        "Borgo Finto,XX,40.05,10.0\n"
+        "Lontania,XX,41.0,10.0\n"
+        "Doppiano,XX,40.0,10.02\n"
+        "Doppiano,YY,45.0,10.0\n",
+        encoding="utf-8",
+    )
+    runner: FlaskCliRunner = test_client.application.test_cli_runner()
+    result = runner.invoke(args=["load-cities", "--file", str(gazetteer)])
+    assert result.exit_code == 0, result.output
+    assert "Loaded 5 localities" in result.output
+
+    service: RaceService = RaceService()
+    race: Race = Race(name="Vicina", time=datetime(1996, 4, 14, 9, 0), city="Quercetta(XX)", distance=5000, website="")
+    here: Race = service.create_new_race(race=race)
+    near: Race = service.create_new_race(race=race.model_copy(update={"city": "Borgo Finto (XX)"}))
+    far: Race = service.create_new_race(race=race.model_copy(update={"city": "Lontania"}))
+    # An ambiguous name without province and an unknown city are not located
+    service.create_new_race(race=race.model_copy(update={"city": "Doppiano"}))
+    doppiano: Race = service.create_new_race(race=race.model_copy(update={"city": "Doppiano(XX)"}))
+    service.create_new_race(race=race.model_copy(update={"city": "Nessunluogo"}))
+    assert here.id and near.id and far.id and doppiano.id
+
+    response: TestResponse = test_client.get("/api/races/nearby?city=Quercetta&radius_km=10")
+    assert response.status_code == 200
+    body: dict[str, Any] = response.get_json()
+    assert (body["latitude"], body["longitude"], body["radius_km"]) == (40.0, 10.0, 10.0)
+    assert [race["id"] for race in body["races"]] == [here.id, doppiano.id, near.id]
+    assert [race["distance_km"] for race in body["races"]] == [0.0, 1.7, 5.6]
+
+    response = test_client.get("/api/races/nearby?lat=40.0&lon=10.0&radius_km=150&limit=10")
+    assert [race["id"] for race in response.get_json()["races"]] == [here.id, doppiano.id, near.id, far.id]
+    response = test_client.get("/api/races/nearby?lat=40.0&lon=10.0&radius_km=150&limit=2&date_from=1996-04-15")
+    assert response.get_json()["races"] == []
+
+    # Triggers follow city changes and deletions
+    service.update_race(race_id=near.id, race=near.model_copy(update={"city": "Nessunluogo"}))
+    service.delete_race_by_id(here.id)
+    response = test_client.get("/api/races/nearby?lat=40.0&lon=10.0&radius_km=10")
+    assert [race["id"] for race in response.get_json()["races"]] == [doppiano.id]
+
+    assert test_client.get("/api/races/nearby?lat=40.0").status_code == 400
+    assert test_client.get("/api/races/nearby?lat=95&lon=10").status_code == 400
+    assert test_client.get("/api/races/nearby?lat=40&lon=10&radius_km=0").status_code == 400
+    assert test_client.get("/api/races/nearby?lat=40&lon=10&date_from=ieri").status_code == 400
+    assert test_client.get("/api/races/nearby?city=Atlantide").status_code == 404
+
+
+def test_duplicate_detection(test_client: FlaskClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the pre-insert duplicate check, its form override and the duplicate report."""
+    service: RaceService = RaceService()
+    original: Race = service.create_new_race(
+        race=Race(
+            name="Corsa del Bicentenario",
+            time=datetime(1998, 9, 13, 9, 30),
+            city="Vallefinta(RM)",
+            distance=10200,
+            website="http://www.bicentenario-test.it/",
+        )
+    )
+    # Same day and website, similar name, other city: the same race
+    relisted: Race = Race(
+        name="Corsa del Bicentenario Aeronautica",
+        time=datetime(1998, 9, 13, 10, 0),
+        city="Borgofinto (RM)",
+        distance=10000,
+        website="https://bicentenario-test.it",
+    )
+    with pytest.raises(DuplicateRaceError) as error:
+        service.create_new_race(race=relisted, check_duplicates=True)
+    assert [match.race.id for match in error.value.matches] == [original.id]
+    assert error.value.matches[0].reasons == ("website", "name")
+
+    # A typo two days later is found through the name index; another course of the event and
+    # the same name a month later are different races
+    typo: Race = relisted.model_copy(update={"name": "Corsa del Bicentenarrio", "time": datetime(1998, 9, 15, 9, 30)})
+    assert [(match.race.id, match.reasons) for match in service.find_duplicates(typo)] == [(original.id, ("name",))]
+    assert service.find_duplicates(relisted.model_copy(update={"distance": 48000})) == []
+    assert service.find_duplicates(typo.model_copy(update={"time": datetime(1998, 10, 13, 9, 30)})) == []
+
+    # The form refuses the duplicate unless told otherwise
+    form: dict[str, str] = {
+        "name": relisted.name,
+        "date": "1998-09-13",
+        "time": "10:00",
+        "city": relisted.city,
+        "distance": "10000",
+        "website": relisted.website,
+    }
+    response: TestResponse = test_client.post("/create-race", data=form, follow_redirects=True)
+    assert "Gara non aggiunta" in response.get_data(as_text=True)
+    assert RaceDAO.query.filter_by(name=relisted.name).first() is None
+    test_client.post("/create-race", data={**form, "allow_duplicate": "1"})
+    duplicate: RaceDAO | None = RaceDAO.query.filter_by(name=relisted.name).first()
+    assert duplicate is not None
+
+    # The report is a job scanning the table page by page, with the same pairs as a single scan
+    monkeypatch.setattr(duplicates, "SCAN_PAGE_SIZE", 3)
+    response = test_client.post("/api/races/duplicates")
+    assert response.status_code == 202
+    job: dict[str, Any] = wait_for_job(test_client, response.headers["Location"])
+    report: dict[str, Any] = job["result"]
+    assert job["status"] == "succeeded" and job["progress_done"] == job["progress_total"] == report["races"]
+    assert report["pairs"] == DuplicateDetector().find_all_duplicates().to_dict()["pairs"]
+    pairs: dict[tuple[int, int], list[str]] = {
+        (pair["race"]["id"], pair["duplicate"]["id"]): pair["reasons"] for pair in report["pairs"]
+    }
+    assert original.id is not None
+    assert pairs[(original.id, duplicate.id)] == ["website", "name"]
+    assert report["comparisons"] < report["races"] * 5
+
+    result = test_client.application.test_cli_runner().invoke(args=["find-duplicates"])
+    assert result.exit_code == 0, result.output
+    assert f"{original.id} 'Corsa del Bicentenario' (Vallefinta(RM)) ~ {duplicate.id}" in result.output
+
+
+class StandInSiteHandler(BaseHTTPRequestHandler):
+    """Race websites for the link checker: /ok (with ETag), /gone (404), /no-head (405 on HEAD), /slow."""
+
+    requests: list[tuple[float, str, str, str | None]] = []
+
+    def do_HEAD(self) -> None:
+        self._answer(send_body=False)
+
+    def do_GET(self) -> None:
+        self._answer(send_body=True)
+
+    def _answer(self, send_body: bool) -> None:
+        StandInSiteHandler.requests.append(
+            (time.monotonic(), self.command, self.path, self.headers.get("If-None-Match"))
+        )
+        if self.path == "/ok" and self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+        elif self.path == "/ok":
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+        elif self.path == "/no-head" and not send_body:
+            self.send_response(405)
+        elif self.path == "/no-head":
+            self.send_response(200)
+        elif self.path == "/slow":
+            time.sleep(0.5)
+            self.send_response(200)
+        else:
+            self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def test_link_checker(test_client: FlaskClient) -> None:
+    """Test the link checker against a local stand-in server: outcomes, TTL, conditional requests, rate limit."""
+    server: ThreadingHTTPServer = ThreadingHTTPServer(("127.0.0.1", 0), StandInSiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base: str = f"http://127.0.0.1:{server.server_address[1]}"
+    service: RaceService = RaceService()
+    races: dict[str, Race] = {
+        path: service.create_new_race(
+            race=Race(
+                name=f"Linkrace {path}",
+                time=datetime(1995, 3, 5, 9, 0),
+                city="Linkville",
+                distance=10000,
+                website=f"{base}/{path}",
+            )
+        )
+        for path in ("ok", "gone", "no-head", "slow")
+    }
+    # Shared and non-http websites are probed once and never, respectively
+    service.create_new_race(race=races["ok"].model_copy(update={"id": None, "name": "Linkrace copy"}))
+    service.create_new_race(race=races["ok"].model_copy(update={"id": None, "website": "ftp://linkville"}))
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE race SET website = 'http://checked.invalid/' WHERE website LIKE 'http%'")
+        connection.exec_driver_sql(f"UPDATE race SET website = '{base}/' || substr(name, 10) WHERE city = 'Linkville'")
+        connection.exec_driver_sql(f"UPDATE race SET website = '{base}/ok' WHERE name = 'Linkrace copy'")
+    # Only the stand-in server is probed: every other race points to a URL already checked
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO link_check (url, status, checked_at, failures) "
+            "VALUES ('http://checked.invalid/', 'broken', strftime('%Y-%m-%d %H:%M:%f', 'now'), 0)"
+        )
+
+    config: LinksConfig = LinksConfig(batch_size=2, max_workers=4, timeout_seconds=0.2, per_host_interval_seconds=0.05)
+    StandInSiteHandler.requests.clear()
+    try:
+        version_before: int = service.get_data_version().version
+        started: float = time.monotonic()
+        report = LinkChecker(config=config).check_links()
+        assert (report.checked, report.ok, report.broken, report.changed) == (4, 2, 2, 2)
+        checks: dict[str, Any] = {check.url.removeprefix(base): check for check in LinkChecker().get_checks()}
+        assert (checks["/ok"].status, checks["/ok"].etag) == ("ok", '"v1"')
+        assert (checks["/gone"].status, checks["/gone"].status_code) == ("broken", 404)
+        assert (checks["/no-head"].status, checks["/no-head"].status_code) == ("ok", 200)
+        assert checks["/slow"].status == "broken" and "timed out" in checks["/slow"].error
+        # HEAD refused, then GET; requests to the one host are spaced by the rate limit
+        assert [(method, path) for _, method, path, _ in StandInSiteHandler.requests if path == "/no-head"] == [
+            ("HEAD", "/no-head"),
+            ("GET", "/no-head"),
+        ]
+        times: list[float] = sorted(at for at, *_ in StandInSiteHandler.requests)
+        # Arrivals lag the reserved slots by a varying delay: only the last slot is bounded from the start
+        assert times[-1] - started >= config.per_host_interval_seconds * (len(times) - 1)
+        assert service.get_data_version().version > version_before
+
+        # Broken links are shown in the list
+        page: str = test_client.get("/races?city=Linkville").get_data(as_text=True)
+        assert page.count("Link non valido") == 2
+        assert "Sito web non raggiungibile (HTTP 404)" in page
+        assert test_client.get("/api/links?status=broken").get_json()["links"][0]["status_code"] == 404
+
+        # Nothing is probed again within the TTL; once expired, working links are asked conditionally
+        StandInSiteHandler.requests.clear()
+        assert LinkChecker(config=config).check_links().checked == 0
+        expired: LinksConfig = config.model_copy(update={"ok_ttl_hours": 0, "broken_ttl_hours": 1})
+        report = LinkChecker(config=expired).check_links()
+        assert (report.checked, report.not_modified, report.changed) == (2, 1, 0)
+        assert ("HEAD", "/ok", '"v1"') in [request[1:] for request in StandInSiteHandler.requests]
+
+        # Each stored batch is reported; raising from the callback stops the run (e.g. a cancelled job)
+        checker: LinkChecker = LinkChecker(config=expired.model_copy(update={"batch_size": 1}))
+        assert checker.count_expired_links() == 2
+        reported: list[int] = []
+
+        def cancel(report: LinkCheckReport) -> None:
+            reported.append(report.checked)
+            raise JobCancelledError("cancelled")
+
+        StandInSiteHandler.requests.clear()
+        with pytest.raises(JobCancelledError):
+            checker.check_links(on_batch=cancel)
+        assert reported == [1]
+        assert [path for _, _, path, _ in StandInSiteHandler.requests] == ["/ok"]
+
+        result = test_client.application.test_cli_runner().invoke(args=["check-links"])
+        assert result.exit_code == 0 and f"{base}/gone: HTTP 404" in result.output
+        assert "Checked 0 links" in result.output
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_background_jobs(test_client: FlaskClient, tmp_path: Path) -> None:
+    """Test jobs: progress and files, cancellation, retries, and recovery from a dead runner with resume."""
+    flask_app: Flask = test_client.application
+    config: JobsConfig = JobsConfig(
+        directory=str(tmp_path),
+        poll_seconds=0.05,
+        heartbeat_seconds=0.05,
+        stale_after_seconds=0.5,
+        progress_interval_seconds=0,
+        max_attempts=2,
+    )
+    runner = configure_jobs(flask_app, config)
+    assert runner is not None
+    races: list[RaceDAO] = [
+        RaceDAO(name=f"Corsa in Coda {day}", time=datetime(1996, 5, day, 9), city="Jobville", distance=10000)
+        for day in range(1, 6)
+    ]
+    add_races(*races)
+    flaky_runs: list[int] = []
+
+    def wait_until_cancelled(context: JobContext) -> dict[str, Any]:
+        deadline: float = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            context.progress(0, message="waiting")
+            time.sleep(0.01)
+        return {}
+
+    def fail_once(context: JobContext) -> dict[str, Any]:
+        flaky_runs.append(context.job.id)
+        if len(flaky_runs) == 1:
+            raise RuntimeError("first run fails")
+        return {"runs": len(flaky_runs)}
+
+    JOB_KINDS["test-wait"] = JobKind(run=wait_until_cancelled)
+    JOB_KINDS["test-flaky"] = JobKind(run=fail_once)
+    try:
+        # An export runs in the background, reports its progress and leaves a file to download
+        response: TestResponse = test_client.post(
+            "/api/jobs", json={"kind": "export-races", "params": {"format": "ndjson", "filters": {"city": "Jobville"}}}
+        )
+        assert response.status_code == 202 and response.get_json()["status"] in ("queued", "running")
+        job: dict[str, Any] = wait_for_job(test_client, response.headers["Location"])
+        assert (job["status"], job["progress_done"], job["progress_total"]) == ("succeeded", 5, 5)
+        assert job["result"]["races"] == 5 and job["attempts"] == 1
+        download: TestResponse = test_client.get(f"/api/jobs/{job['id']}/file")
+        assert download.mimetype == "application/x-ndjson"
+        assert [json.loads(line)["name"] for line in download.get_data(as_text=True).splitlines()] == [
+            race.name for race in races
+        ]
+        succeeded: dict[str, Any] = test_client.get("/api/jobs?status=succeeded").get_json()
+        assert any(listed["id"] == job["id"] for listed in succeeded["jobs"])
+
+        assert test_client.post("/api/jobs", json={"kind": "format-disk"}).status_code == 400
+        bad_format: dict[str, Any] = {"kind": "export-races", "params": {"format": "xml"}}
+        assert test_client.post("/api/jobs", json=bad_format).status_code == 400
+        assert test_client.post("/api/jobs", json={"kind": "import-races"}).status_code == 400
+        assert test_client.get("/api/jobs/999999").status_code == 404
+
+        # A running job stops at its next progress report once cancelled; a failed job can be retried
+        location: str = test_client.post("/api/jobs", json={"kind": "test-wait"}).headers["Location"]
+        deadline: float = time.monotonic() + 10
+        while test_client.get(location).get_json()["status"] != "running" and time.monotonic() < deadline:
+            time.sleep(0.02)
+        cancelling: dict[str, Any] = test_client.post(f"{location}/cancel").get_json()
+        assert cancelling["cancel_requested"] is True
+        assert wait_for_job(test_client, location)["status"] == "cancelled"
+        assert test_client.post(f"{location}/cancel").status_code == 409
+
+        location = test_client.post("/api/jobs", json={"kind": "test-flaky"}).headers["Location"]
+        assert wait_for_job(test_client, location)["error"] == "first run fails"
+        assert test_client.post(f"{location}/retry").status_code == 202
+        assert wait_for_job(test_client, location)["result"] == {"runs": 2}
+        assert test_client.post(f"{location}/retry").status_code == 409
+
+        # While no runner is alive, jobs stay queued and a queued job is cancelled at once
+        runner.stop()
+        location = test_client.post("/api/jobs", json={"kind": "test-wait"}).headers["Location"]
+        cancelled: dict[str, Any] = test_client.post(f"{location}/cancel").get_json()
+        assert cancelled["status"] == "cancelled"
+
+        # A runner dies after committing the first batch of an import, and another after a job's last attempt
+        csv_content: str = "".join(
+            f"{day},Corsa Ripresa {day},1996-06-0{day} 09:00:00,Jobville,5000,\n" for day in range(1, 4)
+        )
+        response = test_client.post(
+            "/api/races/import?batch_size=1",
+            data={"file": (io.BytesIO(csv_content.encode()), "gare.csv")},
+            content_type="multipart/form-data",
+        )
+        import_location: str = response.headers["Location"]
+        lost_location: str = test_client.post("/api/jobs", json={"kind": "test-wait"}).headers["Location"]
+        add_races(RaceDAO(name="Corsa Ripresa 1", time=datetime(1996, 6, 1, 9), city="Jobville", distance=5000))
+        first_batch: dict[str, Any] = {
+            "total_rows": 1,
+            "inserted_rows": 1,
+            "rejected_rows": 0,
+            "batches": 1,
+            "elapsed_seconds": 0.1,
+            "rejections": [],
+        }
+        for location, attempts in ((import_location, 1), (lost_location, 2)):
+            db.session.execute(
+                update(JobDAO)
+                .where(JobDAO.id == int(location.rsplit("/", 1)[1]))
+                .values(
+                    status="running",
+                    attempts=attempts,
+                    worker="lost-host:1",
+                    heartbeat_at=datetime(2000, 1, 1),
+                    checkpoint=first_batch,
+                )
+            )
+        db.session.commit()
+
+        runner.start()
+        job = wait_for_job(test_client, import_location)
+        assert (job["status"], job["attempts"]) == ("succeeded", 2)
+        assert (job["result"]["total_rows"], job["result"]["inserted_rows"], job["result"]["batches"]) == (3, 3, 3)
+        resumed: list[RaceDAO] = RaceDAO.query.filter(RaceDAO.name.startswith("Corsa Ripresa")).all()
+        assert sorted(race.name for race in resumed) == ["Corsa Ripresa 1", "Corsa Ripresa 2", "Corsa Ripresa 3"]
+        lost: dict[str, Any] = wait_for_job(test_client, lost_location)
+        assert lost["status"] == "failed" and lost["error"] == "Runner lost-host:1 stopped sending heartbeats"
+    finally:
+        JOB_KINDS.pop("test-wait")
+        JOB_KINDS.pop("test-flaky")
+        configure_jobs(flask_app, settings.jobs)
+    delete_races(*races, *resumed)
+
+
+def test_race_batch(test_client: FlaskClient) -> None:
+    """Test creating, updating and deleting races in one batch request and transaction."""
+    kept: RaceDAO = RaceDAO(name="Corsa Lotto 1", time=datetime(1997, 5, 1, 9), city="Batchville", distance=5000)
+    gone: RaceDAO = RaceDAO(name="Corsa Lotto 2", time=datetime(1997, 5, 2, 9), city="Batchville", distance=10000)
+    add_races(kept, gone)
+    race: dict[str, Any] = {"time": "1997-06-01T09:00:00", "city": "Batchville", "distance": 21097, "website": ""}
+    batch: dict[str, Any] = {
+        "create": [{**race, "name": "Corsa Lotto 3"}, {**race, "name": "Corsa Lotto 4"}],
+        "update": [{**race, "id": kept.id, "name": "Corsa Lotto 1 (update)"}, {**race, "id": 999998, "name": "X"}],
+        "delete": [gone.id, 999999],
+    }
+
+    # Invalid items are all reported and nothing is applied
+    response: TestResponse = test_client.post("/api/races/batch", json={**batch, "delete": ["x"], "create": [{}]})
+    assert response.status_code == 400
+    assert [(item["operation"], item["index"]) for item in response.get_json()["items"]] == [
+        ("create", 0),
+        ("delete", 0),
+    ]
+    assert test_client.post("/api/races/batch", json={"create": {}}).status_code == 400
+    # Races already deleted are reported as not found on the next batch
+    response = test_client.post("/api/races/batch", json={"delete": [gone.id]})
+    assert response.status_code == 200 and response.get_json()["deleted"] == 1
+    response = test_client.post("/api/races/batch", json={"delete": [kept.id, kept.id]})
+    assert response.status_code == 400 and "more than once" in response.get_json()["error"]
+
+    commits: list[int] = []
+    record_commit = lambda connection: commits.append(threading.get_ident())  # noqa: E731
+    event.listen(db.engine, "commit", record_commit)
+    try:
+        response = test_client.post("/api/races/batch", json=batch)
+    finally:
+        event.remove(db.engine, "commit", record_commit)
+    assert response.status_code == 200
+    assert commits.count(threading.get_ident()) == 1
+    result: dict[str, Any] = response.get_json()
+    assert (result["created"], result["updated"], result["deleted"], result["not_found"]) == (2, 1, 0, 3)
+    assert [(item["operation"], item["index"], item["status"]) for item in result["items"]] == [
+        ("create", 0, "created"),
+        ("create", 1, "created"),
+        ("update", 0, "updated"),
+        ("update", 1, "not_found"),
+        ("delete", 0, "not_found"),
+        ("delete", 1, "not_found"),
+    ]
+    assert result["items"][2]["race"] == {**race, "id": kept.id, "name": "Corsa Lotto 1 (update)"}
+
+    db.session.expire_all()
+    races: list[RaceDAO] = RaceDAO.query.filter_by(city="Batchville").order_by(RaceDAO.id).all()
+    assert [(r.name, r.deleted_at is None) for r in races] == [
+        ("Corsa Lotto 1 (update)", True),
+        ("Corsa Lotto 2", False),
+        ("Corsa Lotto 3", True),
+        ("Corsa Lotto 4", True),
+    ]
+    assert [item["id"] for item in result["items"][:2]] == [races[2].id, races[3].id]
+    assert RaceService().get_race_by_id(kept.id).name == "Corsa Lotto 1 (update)"
+    delete_races(*races)